@@ -0,0 +1,60 @@
+"""
+Общие части админки для больших таблиц
+Стандартный changelist на каждой странице считает COUNT(*) по всей
+выборке и еще раз по всей таблице; на миллионах строк это секунды
+"""
+
+from django.conf import settings
+from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+def estimated_row_count(model, using):
+    """
+    Оценка числа строк таблицы из статистики PostgreSQL (pg_class.reltuples)
+    без прохода по таблице. None в других БД и для таблиц без статистики
+    """
+    connection = connections[using]
+    if connection.vendor != "postgresql":
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)",
+            [model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    # -1 - таблицу еще ни разу не анализировали
+    if row is None or row[0] < 0:
+        return None
+    return row[0]
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator, который не считает большие выборки целиком.
+    Выборка без фильтров в PostgreSQL берет размер из статистики таблицы,
+    остальные считаются не дальше ADMIN_EXACT_COUNT_LIMIT строк:
+    COUNT(*) по подзапросу с LIMIT. Пока строк меньше лимита, число точное
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        limit = settings.ADMIN_EXACT_COUNT_LIMIT
+        if not queryset.query.has_filters():
+            estimate = estimated_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate > limit:
+                return estimate
+        return queryset.order_by()[:limit].count()
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    ModelAdmin для больших таблиц: приблизительное число строк
+    и без второго COUNT(*) по всей таблице при включенных фильтрах
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
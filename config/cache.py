@@ -0,0 +1,153 @@
+"""
+Версии данных и кэширование результатов аналитических эндпоинтов
+У каждого ресурса есть токен версии, который меняется при каждой записи.
+Токен входит в ключи кэша (старые значения просто перестают находиться
+и вытесняются по таймауту) и в ETag ответов API (см. conditional.py)
+"""
+
+import secrets
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+# Любая запись в задачи или сотрудников
+DATA = "data"
+TASKS = "tasks"
+EMPLOYEES = "employees"
+BUSY_EMPLOYEES = "busy-employees"
+IMPORTANT_TASKS = "important-tasks"
+
+STATS = ("hits", "misses", "rebuilds", "invalidations")
+
+# Значение-маркер для отличия промаха от закэшированного None
+MISSING = object()
+
+
+def new_version():
+    """Токен версии: время в наносекундах плюс случайный суффикс"""
+    return f"{time.time_ns()}-{secrets.token_hex(4)}"
+
+
+def version_key(resource):
+    return f"version:{resource}"
+
+
+def get_version(resource):
+    """
+    Текущая версия ресурса; при отсутствии в кэше создается новая.
+    Если кэш не сохранил версию (DummyCache, вытеснение между add и get),
+    возвращается только что созданная: такой ответ просто не совпадет
+    ни с одним ETag клиента
+    """
+    key = version_key(resource)
+    version = cache.get(key)
+    if version is None:
+        created = new_version()
+        # add не перезапишет версию, если ее успел создать другой процесс
+        cache.add(key, created, None)
+        version = cache.get(key, created)
+    return version
+
+
+def get_versions(resources):
+    """Версии нескольких ресурсов одним обращением к кэшу: {ресурс: версия}"""
+    keys = {version_key(resource): resource for resource in resources}
+    found = cache.get_many(keys)
+    return {
+        resource: found[key] if key in found else get_version(resource)
+        for key, resource in keys.items()
+    }
+
+
+def version_timestamp(version):
+    """Время создания версии в секундах (первая часть токена - наносекунды)"""
+    return int(version.split("-", 1)[0]) // 10**9
+
+
+def bump_versions(*resources):
+    """Немедленно меняет версии ресурсов"""
+    cache.set_many(
+        {version_key(resource): new_version() for resource in resources}, None
+    )
+    increment_stat("invalidations", len(resources))
+
+
+def invalidate(*resources):
+    """
+    Меняет версии ресурсов и общую версию данных сразу и еще раз
+    после фиксации транзакции. Первая инвалидация не дает отдать старые данные из кэша, пока идет
+    транзакция. Вторая убирает значения, которые конкурирующий запрос
+    успел построить из еще не зафиксированного состояния: устаревшее чтение
+    не переживает фиксацию записи
+    """
+    resources = tuple({DATA, *resources})
+    bump_versions(*resources)
+    transaction.on_commit(lambda: bump_versions(*resources))
+
+
+def increment_stat(name, delta=1):
+    key = f"stats:{name}"
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        # Ключ вытеснили между add и incr - начинаю счет заново
+        cache.set(key, delta, None)
+
+
+def get_stats():
+    """Счетчики попаданий, промахов, пересборок и инвалидаций"""
+    values = cache.get_many([f"stats:{name}" for name in STATS])
+    return {name: values.get(f"stats:{name}", 0) for name in STATS}
+
+
+def analytics_key(resource, variant):
+    return f"analytics:{resource}:{get_version(resource)}:{variant}"
+
+
+def lookup(key):
+    """Значение из кэша или MISSING; заодно считает попадания и промахи"""
+    value = cache.get(key, MISSING)
+    increment_stat("hits" if value is not MISSING else "misses")
+    return value
+
+
+def store(key, value):
+    increment_stat("rebuilds")
+    cache.set(key, value, settings.ANALYTICS_CACHE_TIMEOUT)
+
+
+def get_or_build(resource, variant, build):
+    """
+    Возвращает (значение, попадание ли в кэш) для варианта ответа ресурса.
+    variant различает ответы одного ресурса, например, разные страницы
+    """
+    key = analytics_key(resource, variant)
+    value = lookup(key)
+    if value is not MISSING:
+        return value, True
+    value = build()
+    store(key, value)
+    return value, False
+
+
+async def aget_or_build(resource, variant, build):
+    """
+    Вариант get_or_build для async-представлений: build - корутина.
+    Обращения к кэшу синхронные - локальный и файловый кэш не ходят в сеть
+    """
+    key = analytics_key(resource, variant)
+    value = lookup(key)
+    if value is not MISSING:
+        return value, True
+    value = await build()
+    store(key, value)
+    return value, False
+
+
+def mark_response(response, hit):
+    """Заголовок X-Cache показывает клиенту, был ли ответ взят из кэша"""
+    response["X-Cache"] = "HIT" if hit else "MISS"
+    return response
@@ -0,0 +1,86 @@
+"""
+Условные GET-запросы (ETag / If-None-Match) на основе версий данных
+Проверка выполняется до вызова обработчика, поэтому ответ 304 обходится
+без запросов к БД и без сериализации
+"""
+
+import hashlib
+
+from django.utils.http import http_date, parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+from .cache import get_versions, version_timestamp
+
+
+class NotModified(Exception):
+    """Данные не изменились с версии, которая уже есть у клиента"""
+
+
+def make_etag(request, versions):
+    """
+    Слабый ETag из версий ресурсов и самого запроса: у разных URL
+    и форматов ответа при одинаковых данных разные теги
+    """
+    digest = hashlib.sha1()
+    for resource in sorted(versions):
+        digest.update(f"{resource}={versions[resource]};".encode())
+    digest.update(request.get_full_path().encode())
+    digest.update(request.META.get("HTTP_ACCEPT", "").encode())
+    return f'W/"{digest.hexdigest()}"'
+
+
+def etag_matches(etag, header):
+    """Слабое сравнение по RFC 9110: префикс W/ не учитывается"""
+    if not header:
+        return False
+    tags = parse_etags(header)
+    if "*" in tags:
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.removeprefix("W/") == opaque for tag in tags)
+
+
+class ConditionalGetMixin:
+    """
+    Добавляет ETag и Last-Modified к GET-ответам ViewSet и отвечает 304,
+    если If-None-Match совпадает с текущим ETag.
+
+    etag_resources - ресурсы (см. config.cache), от которых зависят ответы,
+    etag_action_resources - переопределение для отдельных действий
+    """
+
+    etag_resources = ()
+    etag_action_resources = {}
+
+    def get_etag_resources(self):
+        return self.etag_action_resources.get(
+            getattr(self, "action", None), self.etag_resources
+        )
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.etag = self.last_modified = None
+        resources = self.get_etag_resources()
+        if request.method not in ("GET", "HEAD") or not resources:
+            return
+        # Версии читаются до данных: если запись произойдет во время
+        # запроса, ответ получит старый тег и клиент запросит его снова
+        versions = get_versions(resources)
+        self.etag = make_etag(request, versions)
+        self.last_modified = max(map(version_timestamp, versions.values()))
+        if etag_matches(self.etag, request.META.get("HTTP_IF_NONE_MATCH")):
+            raise NotModified()
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return Response(status=status.HTTP_304_NOT_MODIFIED)
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        etag = getattr(self, "etag", None)
+        if etag and (response.status_code < 300 or response.status_code == 304):
+            response["ETag"] = etag
+            response["Last-Modified"] = http_date(self.last_modified)
+        return response
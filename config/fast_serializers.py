@@ -0,0 +1,162 @@
+"""
+Быстрая read-only сериализация списков через values()
+ModelSerializer на каждую строку создает модель и для каждого поля вызывает
+get_attribute и to_representation. Здесь по сериализатору один раз строится
+план: какую колонку читать из values() и чем преобразовать значение.
+Строка из базы сразу превращается в словарь с теми же ключами, в том же
+порядке и с теми же значениями, что выдал бы сериализатор
+"""
+
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from rest_framework import serializers
+from rest_framework.response import Response
+
+# Поля, у которых to_representation возвращает значение из БД без изменений.
+# Сравнение по точному типу: у наследников to_representation может отличаться
+PASSTHROUGH_FIELDS = (
+    serializers.IntegerField,
+    serializers.CharField,
+    serializers.ChoiceField,
+)
+
+
+def limit_per_parent(queryset, fk, limit, order_by):
+    """
+    Не больше limit строк на каждое значение внешнего ключа fk.
+    Считается в БД через ROW_NUMBER() OVER (PARTITION BY fk), в отличие
+    от среза такой QuerySet можно передать в Prefetch и дальше фильтровать
+    """
+    return queryset.alias(
+        row_number=Window(RowNumber(), partition_by=F(fk), order_by=F(order_by).asc())
+    ).filter(row_number__lte=limit)
+
+
+class ValuesReader:
+    """
+    План чтения для ModelSerializer: простые поля модели, связи
+    по первичному ключу и вложенные many=True сериализаторы по обратной
+    связи ForeignKey (задачи сотрудника). Вложенные объекты загружаются
+    одним запросом на всю пачку строк, как prefetch_related
+
+    :param fields: ключи ответа, остальные поля сериализатора не читаются
+    :param children: {ключ вложенного списка: (QuerySet потомков или None,
+        максимум потомков на строку или None)} - фильтр и лимит вложенных
+    """
+
+    def __init__(self, serializer_class, fields=None, children=None):
+        self.model = serializer_class.Meta.model
+        self.pk = self.model._meta.pk.attname
+        self.columns = [self.pk]
+        # [(ключ ответа, колонка values(), преобразователь или None)]
+        self.plan = []
+        # [(ключ ответа, ValuesReader потомков, колонка внешнего ключа потомка,
+        #   QuerySet потомков, лимит)]
+        self.nested = []
+        children = children or {}
+
+        for name, field in serializer_class().fields.items():
+            if field.write_only or (fields is not None and name not in fields):
+                continue
+            if isinstance(field, serializers.ListSerializer):
+                relation = self.model._meta.get_field(field.source)
+                reader = ValuesReader(type(field.child))
+                queryset, limit = children.get(name, (None, None))
+                self.nested.append(
+                    (name, reader, relation.field.attname, queryset, limit)
+                )
+                self.plan.append((name, None, None))
+                continue
+            if isinstance(field, serializers.PrimaryKeyRelatedField):
+                column, convert = self.model._meta.get_field(field.source).attname, None
+            elif isinstance(
+                field, (serializers.BaseSerializer, serializers.RelatedField)
+            ):
+                raise TypeError(f"Поле {name} не поддерживается ValuesReader")
+            else:
+                column = field.source
+                convert = (
+                    None
+                    if type(field) in PASSTHROUGH_FIELDS
+                    else field.to_representation
+                )
+            if column not in self.columns:
+                self.columns.append(column)
+            self.plan.append((name, column, convert))
+
+    def values(self, queryset, *extra):
+        """
+        queryset.values() с колонками плана. extra - дополнительные колонки,
+        например, поля сортировки для курсорной пагинации
+        """
+        return queryset.values(*dict.fromkeys([*self.columns, *extra]))
+
+    def serialize(self, rows):
+        """Список словарей из строк values(), как Serializer(many=True).data"""
+        rows = list(rows)
+        children = {
+            name: self.load_children(rows, *nested) for name, *nested in self.nested
+        }
+        result = []
+        for row in rows:
+            item = {}
+            for name, column, convert in self.plan:
+                if column is None:
+                    item[name] = children[name].get(row[self.pk], [])
+                    continue
+                value = row[column]
+                # Как и Serializer, None не передаю в to_representation
+                if convert is not None and value is not None:
+                    value = convert(value)
+                item[name] = value
+            result.append(item)
+        return result
+
+    def load_children(self, rows, reader, fk, queryset=None, limit=None):
+        """
+        {id родителя: [словари потомков]} для пачки строк одним запросом.
+        Лимит на родителя считается в БД через ROW_NUMBER() по родителю
+        """
+        if not rows:
+            return {}
+        if queryset is None:
+            queryset = reader.model._default_manager.all()
+        queryset = queryset.filter(**{f"{fk}__in": [row[self.pk] for row in rows]})
+        if limit is not None:
+            queryset = limit_per_parent(queryset, fk, limit, reader.pk)
+        child_rows = list(reader.values(queryset.order_by(reader.pk), fk))
+        grouped = {}
+        for child_row, item in zip(child_rows, reader.serialize(child_rows)):
+            grouped.setdefault(child_row[fk], []).append(item)
+        return grouped
+
+
+class ValuesListMixin:
+    """
+    list() через ValuesReader вместо сериализатора представления
+    Представление задает values_reader или переопределяет get_values_reader().
+    Поля сортировки из keyset_ordering и keyset_orderings добавляются
+    в values(), они нужны курсору
+    """
+
+    values_reader = None
+
+    def get_values_reader(self):
+        return self.values_reader
+
+    def list(self, request, *args, **kwargs):
+        reader = self.get_values_reader()
+        queryset = reader.values(
+            self.filter_queryset(self.get_queryset()), *self.ordering_columns()
+        )
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            return Response(reader.serialize(queryset))
+        return self.get_paginated_response(reader.serialize(page))
+
+    def ordering_columns(self):
+        orderings = [
+            getattr(self, "keyset_ordering", ()),
+            *getattr(self, "keyset_orderings", {}).values(),
+        ]
+        return [field.lstrip("-") for ordering in orderings for field in ordering]
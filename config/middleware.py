@@ -0,0 +1,164 @@
+"""
+Инструментирование SQL-запросов в рамках одного HTTP-запроса
+Через connection.execute_wrapper считаю количество и суммарное время
+запросов, запоминаю самые медленные и ищу повторяющиеся формы запросов -
+признак N+1. Результат уходит в заголовки Server-Timing и X-Query-Count
+и в структурированный лог. Инструментируется только доля запросов
+SQL_INSTRUMENTATION_SAMPLE_RATE, остальные проходят без накладных расходов
+"""
+
+import heapq
+import json
+import logging
+import random
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger("config.sql")
+
+# Списки параметров IN (%s, %s, ...) разной длины дают одну форму запроса
+PLACEHOLDER_LIST = re.compile(r"%s(?:\s*,\s*%s)+")
+# Длина текста запроса в логе
+LOGGED_SQL_LENGTH = 500
+
+
+def query_shape(sql):
+    """
+    Форма запроса - его текст без значений параметров. Django передает
+    параметры отдельно, поэтому достаточно схлопнуть списки плейсхолдеров
+    """
+    return PLACEHOLDER_LIST.sub("%s, ...", sql)
+
+
+class QueryRecorder:
+    """Обертка для connection.execute_wrapper, собирающая статистику запросов"""
+
+    def __init__(self, slow_limit):
+        self.slow_limit = slow_limit
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+        # Куча из slow_limit самых медленных запросов: (время, номер, sql)
+        self.slowest = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.count += 1
+            self.duration += elapsed
+            self.shapes[query_shape(sql)] += 1
+            item = (elapsed, self.count, sql)
+            if len(self.slowest) < self.slow_limit:
+                heapq.heappush(self.slowest, item)
+            elif self.slowest:
+                heapq.heappushpop(self.slowest, item)
+
+    def slowest_queries(self):
+        """[(время в секундах, sql)] от самого медленного"""
+        return [
+            (elapsed, sql) for elapsed, _, sql in sorted(self.slowest, reverse=True)
+        ]
+
+    def repeated_shapes(self, threshold):
+        """Формы, выполненные не меньше threshold раз - вероятные N+1"""
+        return [
+            (shape, count)
+            for shape, count in self.shapes.most_common()
+            if count >= threshold
+        ]
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Считает SQL-запросы каждого инструментируемого HTTP-запроса
+    Ставится в начало MIDDLEWARE, чтобы учитывать запросы сессий
+    и аутентификации. У потоковых ответов учитываются только запросы
+    до начала отдачи, поэтому заголовки им не добавляются
+    """
+
+    sync_capable = True
+    # Синхронный middleware заставил бы Django выполнять async-представления
+    # в отдельном потоке на каждый запрос, и под ASGI они потеряли бы смысл
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if random.random() >= settings.SQL_INSTRUMENTATION_SAMPLE_RATE:
+            return self.get_response(request)
+
+        recorder = QueryRecorder(settings.SQL_INSTRUMENTATION_SLOW_QUERIES)
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            self.attach(stack, recorder)
+            response = self.get_response(request)
+        self.finish(request, response, recorder, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        if random.random() >= settings.SQL_INSTRUMENTATION_SAMPLE_RATE:
+            return await self.get_response(request)
+
+        recorder = QueryRecorder(settings.SQL_INSTRUMENTATION_SLOW_QUERIES)
+        started = time.perf_counter()
+        # Async ORM выполняет запросы через sync_to_async в отдельном потоке,
+        # и у этого потока свои соединения. Обертки ставлю в том же потоке,
+        # иначе они оказались бы на соединениях цикла событий
+        stack = ExitStack()
+        await sync_to_async(self.attach)(stack, recorder)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        self.finish(request, response, recorder, time.perf_counter() - started)
+        return response
+
+    @staticmethod
+    def attach(stack, recorder):
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+
+    def finish(self, request, response, recorder, total):
+        if not response.streaming:
+            response["X-Query-Count"] = str(recorder.count)
+            response["Server-Timing"] = (
+                f'db;dur={recorder.duration * 1000:.1f};desc="{recorder.count} queries", '
+                f"total;dur={total * 1000:.1f}"
+            )
+        self.log(request, response, recorder, total)
+
+    def log(self, request, response, recorder, total):
+        repeated = recorder.repeated_shapes(settings.SQL_INSTRUMENTATION_N_PLUS_ONE)
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "streaming": response.streaming,
+            "queries": recorder.count,
+            "db_ms": round(recorder.duration * 1000, 1),
+            "total_ms": round(total * 1000, 1),
+            "slowest": [
+                {"ms": round(elapsed * 1000, 1), "sql": sql[:LOGGED_SQL_LENGTH]}
+                for elapsed, sql in recorder.slowest_queries()
+            ],
+            "n_plus_one": [
+                {"count": count, "sql": shape[:LOGGED_SQL_LENGTH]}
+                for shape, count in repeated
+            ],
+        }
+        level = logging.WARNING if repeated else logging.INFO
+        logger.log(level, json.dumps(record, ensure_ascii=False), extra={"sql": record})
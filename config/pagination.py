@@ -0,0 +1,257 @@
+import base64
+import binascii
+import json
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def keyset_filter(ordering, values):
+    """
+    Строит условие "строго после позиции values" для сортировки ordering.
+    Для ("deadline", "id") это (deadline > d) OR (deadline = d AND id > i),
+    такое условие обслуживается индексом и не требует OFFSET
+    """
+    condition = Q()
+    equal_prefix = Q()
+    for field, value in zip(ordering, values):
+        name = field.lstrip("-")
+        lookup = "lt" if field.startswith("-") else "gt"
+        condition |= equal_prefix & Q(**{f"{name}__{lookup}": value})
+        equal_prefix &= Q(**{name: value})
+    return condition
+
+
+def ordering_field(queryset, name):
+    """Поле модели или аннотации queryset, по которому идет сортировка"""
+    if name in queryset.query.annotations:
+        return queryset.query.annotations[name].output_field
+    try:
+        return queryset.model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+
+
+def reverse_ordering(ordering):
+    """Разворачивает направление каждого поля сортировки"""
+    return tuple(f[1:] if f.startswith("-") else f"-{f}" for f in ordering)
+
+
+def get_position(item, ordering):
+    """Возвращает значения полей сортировки для модели или словаря из .values()"""
+    names = [field.lstrip("-") for field in ordering]
+    if isinstance(item, dict):
+        return [item[name] for name in names]
+    return [getattr(item, name) for name in names]
+
+
+class KeysetPagination(BasePagination):
+    """
+    Курсорная (keyset) пагинация по уникальной сортировке
+    В отличие от OFFSET каждая страница - это индексный поиск "после позиции",
+    поэтому глубокие страницы стоят столько же, сколько первая.
+    Поля сортировки должны быть NOT NULL, а последнее из них - уникальным (id)
+
+    Представление может задать:
+    - keyset_ordering - сортировку по умолчанию
+    - keyset_orderings - словарь допустимых значений параметра ?ordering=
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    ordering_query_param = "ordering"
+    ordering = ("id",)
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = settings.API_MAX_PAGE_SIZE
+    invalid_cursor_message = "Некорректный курсор."
+
+    def __init__(self, ordering=None):
+        if ordering is not None:
+            self.ordering = tuple(ordering)
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_ordering(self, request, view):
+        if view is None:
+            return self.ordering
+        orderings = getattr(view, "keyset_orderings", {})
+        requested = request.query_params.get(self.ordering_query_param)
+        if requested in orderings:
+            return tuple(orderings[requested])
+        return tuple(getattr(view, "keyset_ordering", self.ordering))
+
+    def decode_cursor(self, request, queryset=None):
+        """
+        Возвращает (позиция, признак движения назад) или (None, False).
+        Значения позиции приводятся к типам полей сортировки queryset:
+        подделанный курсор дает 404, а не ошибку в фильтре
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            position, backwards = data["p"], bool(data.get("r"))
+        except (TypeError, ValueError, KeyError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        if queryset is not None:
+            position = self.convert_position(queryset, position)
+        return position, backwards
+
+    def convert_position(self, queryset, position):
+        """Значения позиции в типах полей сортировки; поля сортировки NOT NULL"""
+        converted = []
+        for field, value in zip(self.ordering, position):
+            model_field = ordering_field(queryset, field.lstrip("-"))
+            try:
+                if value is None or isinstance(value, (dict, list)):
+                    raise ValueError(value)
+                if model_field is not None:
+                    value = model_field.to_python(value)
+            except (ValidationError, TypeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+            converted.append(value)
+        return converted
+
+    def encode_cursor(self, position, backwards):
+        data = {"p": position}
+        if backwards:
+            data["r"] = 1
+        raw = json.dumps(data, cls=DjangoJSONEncoder, separators=(",", ":"))
+        encoded = base64.urlsafe_b64encode(raw.encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.build_page(list(self.page_queryset(queryset, request, view)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Асинхронный вариант paginate_queryset для async-представлений"""
+        queryset = self.page_queryset(queryset, request, view)
+        return self.build_page([item async for item in queryset.aiterator()])
+
+    def paginate_querysets(self, querysets, request, view=None):
+        """
+        Одна страница из нескольких источников с одинаковыми полями сортировки,
+        например, задач и архивных задач. От каждого источника берется
+        страница после позиции курсора, и они сливаются в памяти
+        """
+        pages = [self.page_queryset(queryset, request, view) for queryset in querysets]
+        return self.build_page(self.merge_pages([list(page) for page in pages]))
+
+    async def apaginate_querysets(self, querysets, request, view=None):
+        """Асинхронный вариант paginate_querysets"""
+        pages = []
+        for queryset in querysets:
+            page = self.page_queryset(queryset, request, view)
+            pages.append([item async for item in page.aiterator()])
+        return self.build_page(self.merge_pages(pages))
+
+    def merge_pages(self, pages):
+        """Сливает страницы источников в порядке выборки (плюс одна строка)"""
+        ordering = reverse_ordering(self.ordering) if self.backwards else self.ordering
+        rows = [row for page in pages for row in page]
+        # Устойчивая сортировка по полям с конца учитывает направление каждого
+        for field in reversed(ordering):
+            rows.sort(
+                key=lambda row: get_position(row, [field])[0],
+                reverse=field.startswith("-"),
+            )
+        return rows[: self.current_page_size + 1]
+
+    def page_queryset(self, queryset, request, view=None):
+        """Запрос одной страницы (плюс одна строка) без его выполнения"""
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, view)
+        self.current_page_size = self.get_page_size(request)
+        self.position, self.backwards = self.decode_cursor(request, queryset)
+
+        # При движении назад выбираю строки "перед позицией" в обратном порядке
+        ordering = reverse_ordering(self.ordering) if self.backwards else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if self.position is not None:
+            queryset = queryset.filter(keyset_filter(ordering, self.position))
+        # Лишняя строка показывает, есть ли еще одна страница в этом направлении
+        return queryset[: self.current_page_size + 1]
+
+    def build_page(self, results):
+        """Обрезает лишнюю строку и строит ссылки next/previous"""
+        position, backwards = self.position, self.backwards
+        has_more = len(results) > self.current_page_size
+        results = results[: self.current_page_size]
+        if backwards:
+            results.reverse()
+
+        self.next_url = self.previous_url = None
+        if results:
+            first = get_position(results[0], self.ordering)
+            last = get_position(results[-1], self.ordering)
+            if has_more or backwards:
+                self.next_url = self.encode_cursor(last, backwards=False)
+            if position is not None and (has_more or not backwards):
+                self.previous_url = self.encode_cursor(first, backwards=True)
+        elif backwards:
+            self.next_url = remove_query_param(self.base_url, self.cursor_query_param)
+        return results
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.next_url,
+                "previous": self.previous_url,
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Курсор страницы из полей next/previous",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Размер страницы (ограничен сервером)",
+                "schema": {"type": "integer"},
+            },
+        ]
+
+    @classmethod
+    def is_requested(cls, request):
+        """Запрошен ли постраничный режим для эндпоинтов, где он опционален"""
+        return (
+            cls.cursor_query_param in request.query_params
+            or cls.page_size_query_param in request.query_params
+        )
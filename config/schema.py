@@ -0,0 +1,71 @@
+"""
+Схема OpenAPI, сгенерированная заранее
+SpectacularAPIView на каждый запрос заново обходит все ViewSet'ы
+и сериализаторы. Здесь схема строится один раз: командой openapi_schema
+при сборке (файл OPENAPI_SCHEMA_FILE) или, если файла нет, при первом
+запросе. Дальше она отдается из памяти процесса с сильным ETag
+по содержимому, и клиенты с актуальной схемой получают 304
+"""
+
+import hashlib
+from functools import lru_cache
+
+import yaml
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.views import View
+from drf_spectacular.generators import SchemaGenerator
+from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+
+from .conditional import etag_matches
+
+RENDERERS = {"yaml": OpenApiYamlRenderer, "json": OpenApiJsonRenderer}
+
+
+def generate_schema():
+    """Схема по текущему коду в YAML, как у команды spectacular"""
+    schema = SchemaGenerator().get_schema(request=None, public=True)
+    return OpenApiYamlRenderer().render(schema, renderer_context={})
+
+
+@lru_cache
+def stored_schema():
+    """YAML схемы из файла или, если его нет, сгенерированный по коду"""
+    try:
+        with open(settings.OPENAPI_SCHEMA_FILE, "rb") as file:
+            return file.read()
+    except FileNotFoundError:
+        return generate_schema()
+
+
+@lru_cache
+def schema_document(schema_format):
+    """(тело ответа, тип содержимого, ETag) схемы в формате yaml или json"""
+    content = stored_schema()
+    renderer = RENDERERS[schema_format]()
+    if schema_format != "yaml":
+        content = renderer.render(yaml.safe_load(content), renderer_context={})
+    etag = f'"{hashlib.sha256(content).hexdigest()}"'
+    return content, renderer.media_type, etag
+
+
+class SchemaView(View):
+    """
+    Схема OpenAPI: YAML по умолчанию, JSON по ?format=json
+    или Accept: application/vnd.oai.openapi+json
+    """
+
+    def get(self, request):
+        accept = request.headers.get("Accept", "")
+        schema_format = request.GET.get("format")
+        if schema_format not in RENDERERS:
+            schema_format = "json" if "json" in accept else "yaml"
+        content, content_type, etag = schema_document(schema_format)
+        if etag_matches(etag, request.headers.get("If-None-Match")):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(content, content_type=content_type)
+        response["ETag"] = etag
+        # Схема меняется только с выкладкой кода: клиент проверяет ETag
+        response["Cache-Control"] = "no-cache"
+        return response
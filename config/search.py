@@ -0,0 +1,99 @@
+"""
+Поиск ?search= по текстовым полям с ранжированием
+В PostgreSQL подстрока и нечеткое совпадение ищутся через pg_trgm:
+GIN-индексы по UPPER(поле) с gin_trgm_ops (миграции tasks 0007 и
+employees 0004) обслуживают и ILIKE-подобное icontains, и операцию
+word similarity <%, поэтому поиск не проходит всю таблицу. Результаты
+упорядочены по word_similarity. В других БД - icontains с простым рангом:
+точное совпадение, затем начало строки, затем подстрока
+"""
+
+from django.db import connection
+from django.db.models import BooleanField, Case, FloatField, Func, Q, Value, When
+from django.db.models.functions import Greatest, Upper
+from rest_framework.filters import BaseFilterBackend
+
+SEARCH_PARAM = "search"
+# Аннотация с рангом совпадения и сортировка по ней для курсорной пагинации
+RANK = "search_rank"
+RANK_ORDERING = ("-search_rank", "id")
+
+
+class WordSimilarity(Func):
+    """word_similarity(строка поиска, текст) из pg_trgm, от 0 до 1"""
+
+    function = "WORD_SIMILARITY"
+    output_field = FloatField()
+
+
+class WordSimilar(Func):
+    """
+    строка <% текст: word_similarity выше порога pg_trgm.word_similarity_threshold.
+    В отличие от сравнения word_similarity() > x эту операцию обслуживает индекс
+    """
+
+    arg_joiner = " <%% "
+    template = "(%(expressions)s)"
+    output_field = BooleanField()
+
+
+def get_search_term(request):
+    return request.query_params.get(SEARCH_PARAM, "").strip()
+
+
+def search_queryset(queryset, fields, term):
+    """Строки queryset, где term встречается в одном из fields, с аннотацией ранга"""
+    if connection.vendor == "postgresql":
+        pattern = Value(term.upper())
+        condition = Q()
+        for field in fields:
+            condition |= Q(**{f"{field}__icontains": term})
+            condition |= Q(WordSimilar(pattern, Upper(field)))
+        ranks = [WordSimilarity(pattern, Upper(field)) for field in fields]
+    else:
+        condition = Q()
+        for field in fields:
+            condition |= Q(**{f"{field}__icontains": term})
+        ranks = [
+            Case(
+                When(**{f"{field}__iexact": term}, then=Value(1.0)),
+                When(**{f"{field}__istartswith": term}, then=Value(0.5)),
+                When(**{f"{field}__icontains": term}, then=Value(0.25)),
+                default=Value(0.0),
+                output_field=FloatField(),
+            )
+            for field in fields
+        ]
+    rank = ranks[0] if len(ranks) == 1 else Greatest(*ranks)
+    return queryset.filter(condition).annotate(**{RANK: rank})
+
+
+def search_requested(request):
+    return request is not None and bool(get_search_term(request))
+
+
+class TrigramSearchFilter(BaseFilterBackend):
+    """
+    ?search= по полям из атрибута представления search_fields.
+    Порядок по рангу задает представление через keyset_ordering
+    (RANK_ORDERING), ?ordering= по-прежнему переопределяет его
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        term = get_search_term(request)
+        if not term:
+            return queryset
+        return search_queryset(queryset, view.search_fields, term)
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": SEARCH_PARAM,
+                "required": False,
+                "in": "query",
+                "description": "Поиск по полям: "
+                + ", ".join(view.search_fields)
+                + ". Результаты упорядочены по релевантности",
+                "schema": {"type": "string"},
+            }
+        ]
@@ -50,6 +50,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Первым, чтобы учитывать SQL-запросы всех остальных слоев
+    "config.middleware.QueryInstrumentationMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -113,9 +115,89 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Необязательные параметры: пустое значение (ключ без значения из env.sample)
+# означает значение по умолчанию, поэтому "os.getenv(...) or ..."
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    # Курсорная пагинация: глубокие страницы стоят столько же, сколько первая
+    "DEFAULT_PAGINATION_CLASS": "config.pagination.KeysetPagination",
+    "PAGE_SIZE": int(os.getenv("API_PAGE_SIZE") or 100),
 }
+# Максимальный размер страницы, который клиент может запросить через ?page_size=
+API_MAX_PAGE_SIZE = int(os.getenv("API_MAX_PAGE_SIZE") or 1000)
+# Размер порции при потоковой выдаче больших ответов
+STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE") or 500)
+# Максимальное количество задач в одном запросе к /api/v1/tasks/bulk/
+TASKS_BULK_MAX_ITEMS = int(os.getenv("TASKS_BULK_MAX_ITEMS") or 5000)
+# Максимальная глубина обхода иерархии задач (защищает и от зацикленных ссылок)
+TASK_TREE_MAX_DEPTH = int(os.getenv("TASK_TREE_MAX_DEPTH") or 10000)
+# Окно безопасности признака устаревания представления нагрузки (сек):
+# записи моложе стольких секунд до обновления считаются не вошедшими в него
+TASK_CHANGES_SAFETY_WINDOW = int(os.getenv("TASK_CHANGES_SAFETY_WINDOW") or 5)
+
+# Интервал обновления материализованного представления нагрузки
+# (tasks/workload_view.py, только PostgreSQL) командой
+# refresh_workload_view --interval: на столько секунд, плюс время обновления,
+# представление может отставать от задач. Время обновления и последней
+# записи хранится в базе, общий кэш для этого не нужен
+WORKLOAD_VIEW_MAX_STALENESS = int(os.getenv("WORKLOAD_VIEW_MAX_STALENESS") or 30)
+
+# Админка (config/admin.py): до стольких строк выборка считается точно,
+# больше - по статистике PostgreSQL или с ограничением
+ADMIN_EXACT_COUNT_LIMIT = int(os.getenv("ADMIN_EXACT_COUNT_LIMIT") or 10000)
+
+# Заранее сгенерированная схема OpenAPI (команда openapi_schema).
+# Без файла схема строится при первом запросе к /api/schema/
+OPENAPI_SCHEMA_FILE = os.getenv("OPENAPI_SCHEMA_FILE") or BASE_DIR / "openapi.yaml"
+
+# Архивация (команда archive_tasks): задачи, закрытые больше стольких
+# дней назад, и размер пачки, переносимой одной транзакцией
+TASK_ARCHIVE_AFTER_DAYS = int(os.getenv("TASK_ARCHIVE_AFTER_DAYS") or 90)
+TASK_ARCHIVE_BATCH_SIZE = int(os.getenv("TASK_ARCHIVE_BATCH_SIZE") or 1000)
+
+# Кэш результатов аналитики (busy-employees, important-tasks).
+# По умолчанию - память процесса. При нескольких процессах сервера нужен
+# общий кэш, иначе инвалидация дойдет только до одного из них:
+# например, CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache
+# и CACHE_LOCATION=/var/tmp/employee_task_tracker_cache
+CACHES = {
+    "default": {
+        "BACKEND": (
+            os.getenv("CACHE_BACKEND")
+            or "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION") or "employee-task-tracker",
+    }
+}
+# Время жизни закэшированного ответа в секундах. Актуальность обеспечивает
+# инвалидация, таймаут лишь ограничивает память под старые версии
+ANALYTICS_CACHE_TIMEOUT = int(os.getenv("ANALYTICS_CACHE_TIMEOUT") or 300)
+
+# Инструментирование SQL (config/middleware.py): доля инструментируемых запросов
+# от 0 до 1, сколько самых медленных запросов логировать и сколько повторов
+# одной формы запроса считать вероятной проблемой N+1
+SQL_INSTRUMENTATION_SAMPLE_RATE = float(
+    os.getenv("SQL_INSTRUMENTATION_SAMPLE_RATE") or 0.05
+)
+SQL_INSTRUMENTATION_SLOW_QUERIES = int(
+    os.getenv("SQL_INSTRUMENTATION_SLOW_QUERIES") or 3
+)
+SQL_INSTRUMENTATION_N_PLUS_ONE = int(os.getenv("SQL_INSTRUMENTATION_N_PLUS_ONE") or 5)
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        # Одна JSON-строка на инструментированный запрос
+        "config.sql": {
+            "handlers": ["console"],
+            "level": os.getenv("SQL_INSTRUMENTATION_LOG_LEVEL") or "INFO",
+            "propagate": False,
+        },
+    },
+}
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
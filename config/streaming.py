@@ -0,0 +1,99 @@
+"""
+Инструменты для потоковой выдачи больших ответов.
+Память процесса ограничена размером одной порции, а не размером таблицы
+"""
+
+import csv
+import io
+from itertools import islice
+
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+from .pagination import get_position, keyset_filter
+
+NDJSON_CONTENT_TYPE = "application/x-ndjson"
+
+
+def iterate_in_chunks(queryset, ordering, chunk_size):
+    """
+    Выдает QuerySet порциями по chunk_size объектов.
+    Каждая порция - отдельный keyset-запрос "после последней строки предыдущей",
+    поэтому стоимость порции не растет с номером, как у OFFSET
+    """
+    ordering = tuple(ordering)
+    position = None
+    while True:
+        chunk_queryset = queryset.order_by(*ordering)
+        if position is not None:
+            chunk_queryset = chunk_queryset.filter(keyset_filter(ordering, position))
+        chunk = list(chunk_queryset[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        if len(chunk) < chunk_size:
+            return
+        position = get_position(chunk[-1], ordering)
+
+
+def make_json_encoder():
+    """Кодировщик с теми же настройками, что и у JSONRenderer из DRF"""
+    return JSONEncoder(
+        ensure_ascii=not api_settings.UNICODE_JSON,
+        separators=(",", ":") if api_settings.COMPACT_JSON else (", ", ": "),
+    )
+
+
+def stream_json_array(chunks):
+    """
+    Превращает порции словарей в JSON-массив, который отдается по частям:
+    одна порция - одна запись в сокет
+    """
+    encoder = make_json_encoder()
+    yield b"["
+    first = True
+    for chunk in chunks:
+        if not chunk:
+            continue
+        body = ",".join(encoder.encode(item) for item in chunk)
+        yield (body if first else "," + body).encode()
+        first = False
+    yield b"]"
+
+
+def stream_ndjson(chunks):
+    """Превращает порции словарей в NDJSON: по одному JSON-объекту на строку"""
+    encoder = make_json_encoder()
+    for chunk in chunks:
+        if chunk:
+            yield "".join(encoder.encode(item) + "\n" for item in chunk).encode()
+
+
+def batched(rows, size):
+    """Разбивает поток строк на списки по size элементов"""
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+def stream_csv(header, rows, batch_size):
+    """
+    Превращает поток кортежей в CSV с заголовком.
+    Строки пишутся пачками по batch_size, чтобы не отправлять каждую отдельно
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    yield buffer.getvalue().encode()
+    for batch in batched(rows, batch_size):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(batch)
+        yield buffer.getvalue().encode()
+
+
+def stream_ndjson_rows(header, rows, batch_size):
+    """Превращает поток кортежей в NDJSON, используя header как ключи объектов"""
+    return stream_ndjson(
+        [dict(zip(header, row)) for row in batch] for batch in batched(rows, batch_size)
+    )
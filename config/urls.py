@@ -1,14 +1,24 @@
 from django.contrib import admin
 from django.urls import include, path
-from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
+from drf_spectacular.views import SpectacularSwaggerView
+
+from .schema import SchemaView
+from .views import CacheStatsView, DataVersionView
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     # Подключаем URL из приложений
     path("api/v1/", include("employees.urls")),
     path("api/v1/", include("tasks.urls")),
+    path(
+        "api/v1/analytics/cache-stats/",
+        CacheStatsView.as_view(),
+        name="analytics-cache-stats",
+    ),
+    path("api/v1/data-version/", DataVersionView.as_view(), name="data-version"),
     # URL для автодокументации Swagger
-    path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
+    # Схема строится один раз, а не на каждый запрос (см. config/schema.py)
+    path("api/schema/", SchemaView.as_view(), name="schema"),
     path(
         "api/docs/",
         SpectacularSwaggerView.as_view(url_name="schema"),
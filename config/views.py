@@ -0,0 +1,44 @@
+from drf_spectacular.utils import extend_schema, inline_serializer
+from rest_framework import serializers
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .cache import DATA, EMPLOYEES, STATS, TASKS, get_stats, get_versions
+from .conditional import ConditionalGetMixin
+
+
+class CacheStatsView(APIView):
+    """
+    Статистика кэша аналитических эндпоинтов: попадания, промахи,
+    пересборки и инвалидации. Счетчики хранятся в самом кэше,
+    поэтому с локальным кэшем они относятся к текущему процессу
+    """
+
+    @extend_schema(
+        responses=inline_serializer(
+            "CacheStats", {name: serializers.IntegerField() for name in STATS}
+        )
+    )
+    def get(self, request):
+        return Response(get_stats())
+
+
+class DataVersionView(ConditionalGetMixin, APIView):
+    """
+    Текущие версии данных: общая и отдельно по задачам и сотрудникам.
+    Версия меняется при каждой записи, поэтому клиенту достаточно
+    опрашивать этот дешевый эндпоинт и перезапрашивать списки
+    только при смене версии
+    """
+
+    etag_resources = (DATA,)
+    version_resources = (DATA, TASKS, EMPLOYEES)
+
+    @extend_schema(
+        responses=inline_serializer(
+            "DataVersions",
+            {name: serializers.CharField() for name in version_resources},
+        )
+    )
+    def get(self, request):
+        return Response(get_versions(self.version_resources))
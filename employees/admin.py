@@ -1,5 +1,19 @@
 from django.contrib import admin
 
+from config.admin import LargeTableAdmin
+
 from .models import Employee
 
-admin.site.register(Employee)
+
+@admin.register(Employee)
+class EmployeeAdmin(LargeTableAdmin):
+    """
+    Админка сотрудников. search_fields нужны и автодополнению
+    исполнителя в админке задач
+    """
+
+    list_display = ("id", "full_name", "position", "active_task_count")
+    # Сортировка только по индексированным колонкам
+    sortable_by = ("id", "active_task_count")
+    search_fields = ("=id", "^full_name")
+    readonly_fields = ("active_task_count", "created_at", "updated_at")
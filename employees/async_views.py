@@ -0,0 +1,78 @@
+"""
+Асинхронные версии эндпоинтов сотрудников для запуска под ASGI-сервером
+(см. tasks/async_views.py)
+"""
+
+from django.db.models import aprefetch_related_objects
+from django.views.decorators.http import require_GET
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.request import Request
+
+from config.cache import BUSY_EMPLOYEES, aget_or_build, mark_response
+from config.pagination import KeysetPagination
+from tasks.async_views import json_response
+
+from .models import Employee
+from .serializers import EmployeeSerializer
+from .views import EmployeeViewSet, parse_read_options, tasks_prefetch
+
+
+async def paginated_employees(request, queryset, paginator):
+    """Страница сотрудников с задачами в формате пагинированного ответа"""
+    page = await paginator.apaginate_queryset(queryset, request)
+    # Задачи всей страницы - одним запросом, как prefetch_related
+    await aprefetch_related_objects(page, "tasks")
+    data = EmployeeSerializer(page, many=True, context={"request": request}).data
+    return paginator.get_paginated_response(data).data
+
+
+@require_GET
+async def employee_list(request):
+    """
+    Список сотрудников с курсорной пагинацией, как GET /api/v1/employees/,
+    с теми же параметрами ?fields=, ?include=tasks и ?search=
+    """
+    request = Request(request)
+    try:
+        fields, tasks = parse_read_options(request.query_params)
+    except ValidationError as error:
+        return json_response(error.detail, status=400)
+    view = EmployeeViewSet(request=request)
+    paginator = KeysetPagination()
+    queryset = view.filter_queryset(
+        Employee.objects.only(*[name for name in fields if name != "tasks"] or ["id"])
+    )
+    try:
+        page = await paginator.apaginate_queryset(queryset, request, view=view)
+    except NotFound as error:
+        return json_response({"detail": error.detail}, status=404)
+    if tasks is not None:
+        await aprefetch_related_objects(page, tasks_prefetch(tasks))
+    data = EmployeeSerializer(page, many=True, fields=fields).data
+    return json_response(paginator.get_paginated_response(data).data)
+
+
+@require_GET
+async def busy_employees(request):
+    """
+    Сотрудники по убыванию активных задач, как GET /api/v1/employees/busy-employees/
+    Без ?page_size= и ?cursor= возвращает всех сотрудников
+    """
+    request = Request(request)
+    employees = Employee.objects.order_by(*EmployeeViewSet.busy_ordering)
+
+    async def build():
+        if KeysetPagination.is_requested(request):
+            paginator = KeysetPagination(ordering=EmployeeViewSet.busy_ordering)
+            return await paginated_employees(request, employees, paginator)
+        page = [employee async for employee in employees.aiterator()]
+        await aprefetch_related_objects(page, "tasks")
+        return list(EmployeeSerializer(page, many=True).data)
+
+    try:
+        data, hit = await aget_or_build(
+            BUSY_EMPLOYEES, request.build_absolute_uri(), build
+        )
+    except NotFound as error:
+        return json_response({"detail": error.detail}, status=404)
+    return mark_response(json_response(data), hit)
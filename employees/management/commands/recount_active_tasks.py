@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from config.cache import BUSY_EMPLOYEES, EMPLOYEES, IMPORTANT_TASKS, invalidate
+from tasks.workload import find_counter_drift, recount_active_task_counts
+
+
+class Command(BaseCommand):
+    """
+    Сверяет Employee.active_task_count с реальным количеством задач
+    в работе и исправляет расхождения
+    """
+
+    help = "Пересчитывает счетчики активных задач сотрудников и чинит расхождения"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Только показать расхождения, ничего не исправляя",
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Пересчитать счетчики всех сотрудников, а не только разошедшихся",
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            drift = list(
+                find_counter_drift().values_list(
+                    "id", "full_name", "active_task_count", "actual_count"
+                )
+            )
+            for employee_id, full_name, stored, actual in drift:
+                self.stdout.write(
+                    f"#{employee_id} {full_name}: в счетчике {stored}, на самом деле {actual}"
+                )
+
+            if options["dry_run"]:
+                self.stdout.write(f"Найдено расхождений: {len(drift)}")
+                return
+
+            if options["all"]:
+                updated = recount_active_task_counts()
+            else:
+                updated = recount_active_task_counts(
+                    employee_id for employee_id, *_ in drift
+                )
+            # Счетчики обновляются в обход сигналов моделей
+            invalidate(EMPLOYEES, BUSY_EMPLOYEES, IMPORTANT_TASKS)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Найдено расхождений: {len(drift)}, пересчитано сотрудников: {updated}"
+            )
+        )
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:29
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_active_task_count(apps, schema_editor):
+    """Заполняет счетчик по текущим данным одним UPDATE с подзапросом"""
+    Employee = apps.get_model("employees", "Employee")
+    Task = apps.get_model("tasks", "Task")
+    active_tasks = (
+        Task.objects.filter(assignee=OuterRef("pk"), status="in_progress")
+        .order_by()
+        .values("assignee")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    Employee.objects.update(
+        active_task_count=Coalesce(Subquery(active_tasks), Value(0))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("employees", "0001_initial"),
+        ("tasks", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="employee",
+            name="active_task_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Активных задач"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="employee",
+            index=models.Index(
+                fields=["-active_task_count", "id"], name="employee_active_count_idx"
+            ),
+        ),
+        migrations.RunPython(fill_active_task_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("employees", "0002_active_task_count"),
+    ]
+
+    # Существующим строкам проставляется время применения миграции
+    operations = [
+        migrations.AddField(
+            model_name="employee",
+            name="created_at",
+            field=models.DateTimeField(
+                auto_now_add=True,
+                db_index=True,
+                default=django.utils.timezone.now,
+                verbose_name="Создан",
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="employee",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True,
+                default=django.utils.timezone.now,
+                verbose_name="Изменен",
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name="employee",
+            index=models.Index(
+                fields=["updated_at", "id"], name="employee_updated_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:40
+
+from django.db import migrations
+
+# Индексы по тем же выражениям, что строят icontains (UPPER(...) LIKE) и поиск
+# (config/search.py), поэтому они обслуживают и подстроку, и операцию <%
+CREATE_INDEX_SQL = (
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS employee_full_name_trgm_idx "
+    "ON employees_employee USING gin (UPPER(full_name) gin_trgm_ops)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS employee_position_trgm_idx "
+    "ON employees_employee USING gin (UPPER(position) gin_trgm_ops)",
+)
+INDEX_NAMES = ("employee_full_name_trgm_idx", "employee_position_trgm_idx")
+
+
+def create_trigram_indexes(apps, schema_editor):
+    """pg_trgm есть только в PostgreSQL"""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for sql in CREATE_INDEX_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name in INDEX_NAMES:
+        schema_editor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY не выполняется внутри транзакции,
+    # зато не блокирует запись в таблицу на время построения индекса
+    atomic = False
+
+    dependencies = [
+        ("employees", "0003_timestamps"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
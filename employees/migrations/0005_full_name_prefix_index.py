@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:20
+
+from django.db import migrations
+
+# Поиск админки и автодополнения исполнителя по началу ФИО
+# (search_fields "^full_name") строит UPPER(full_name::text) LIKE 'X%'.
+# B-tree с text_pattern_ops обслуживает такой префикс диапазоном по индексу
+# при любой сортировке базы; UPPER возвращает text, поэтому класс операторов
+# text_pattern_ops, а не varchar_pattern_ops
+CREATE_INDEX_SQL = (
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS employee_full_name_upper_prefix_idx "
+    "ON employees_employee (UPPER(full_name) text_pattern_ops)"
+)
+
+
+def create_prefix_index(apps, schema_editor):
+    """Классы операторов *_pattern_ops есть только в PostgreSQL"""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(CREATE_INDEX_SQL)
+
+
+def drop_prefix_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        "DROP INDEX CONCURRENTLY IF EXISTS employee_full_name_upper_prefix_idx"
+    )
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY не выполняется внутри транзакции,
+    # зато не блокирует запись в таблицу на время построения индекса
+    atomic = False
+
+    dependencies = [
+        ("employees", "0004_search_trigram"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_prefix_index, drop_prefix_index),
+    ]
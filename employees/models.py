@@ -9,6 +9,16 @@ class Employee(models.Model):
 
     full_name = models.CharField(max_length=255, verbose_name="ФИО")
     position = models.CharField(max_length=150, verbose_name="Должность")
+    # Денормализованный счетчик задач со статусом "В работе".
+    # Поддерживается кодом модели Task (см. tasks/workload.py), поэтому
+    # сортировка по загрузке - это чтение индекса, а не GROUP BY по всем задачам
+    active_task_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name="Активных задач"
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True, db_index=True, verbose_name="Создан"
+    )
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Изменен")
 
     def __str__(self):
         """
@@ -21,3 +31,12 @@ class Employee(models.Model):
         # Задаю человекочитаемые имена для модели в единственном и множественном числе
         verbose_name = "Сотрудник"
         verbose_name_plural = "Сотрудники"
+        indexes = [
+            # Порядок "Занятых сотрудников"; обратный проход по индексу
+            # дает наименее загруженного сотрудника
+            models.Index(
+                fields=["-active_task_count", "id"], name="employee_active_count_idx"
+            ),
+            # Выборка сотрудников, измененных после заданного момента
+            models.Index(fields=["updated_at", "id"], name="employee_updated_idx"),
+        ]
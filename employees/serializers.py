@@ -20,3 +20,27 @@ class EmployeeSerializer(serializers.ModelSerializer):
         model = Employee
         # Добавляем 'tasks' в список полей для вывода
         fields = ("id", "full_name", "position", "tasks")
+
+    def __init__(self, *args, fields=None, **kwargs):
+        """fields - ключи ответа для ?fields=, остальные поля убираются"""
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class TaskCountsSerializer(serializers.Serializer):
+    """Количество задач сотрудника в каждом статусе"""
+
+    todo = serializers.IntegerField(read_only=True)
+    in_progress = serializers.IntegerField(read_only=True)
+    done = serializers.IntegerField(read_only=True)
+    canceled = serializers.IntegerField(read_only=True)
+
+
+class EmployeeWorkloadSerializer(serializers.Serializer):
+    """Сотрудник и количество его задач по статусам для эндпоинта нагрузки"""
+
+    id = serializers.IntegerField(read_only=True)
+    full_name = serializers.CharField(read_only=True)
+    task_counts = TaskCountsSerializer(read_only=True)
@@ -1,3 +1,5 @@
+import json
+
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
@@ -82,7 +84,7 @@ class TestEmployeeAPI(APITestCase):
         # Проверяем, что ответ успешный (200 OK)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         # Проверяем, что в ответе 3 сотрудника, созданных в setUp
-        self.assertEqual(len(response.data), 3)
+        self.assertEqual(len(response.data["results"]), 3)
 
     def test_busy_employees_endpoint_order(self):
         """
@@ -100,3 +102,163 @@ class TestEmployeeAPI(APITestCase):
 
         expected_order = ["Петров", "Сидоров", "Иванов"]
         self.assertEqual(employee_names_in_order, expected_order)
+
+    def test_busy_employees_paginated(self):
+        """
+        Проверяет постраничный режим эндпоинта "Занятые сотрудники".
+        """
+        url = reverse("employee-busy-employees")
+        first = self.client.get(url, {"page_size": 2}, format="json")
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [emp["full_name"] for emp in first.data["results"]], ["Петров", "Сидоров"]
+        )
+
+        second = self.client.get(first.data["next"], format="json")
+        self.assertEqual(
+            [emp["full_name"] for emp in second.data["results"]], ["Иванов"]
+        )
+        self.assertIsNone(second.data["next"])
+
+    def test_busy_employees_stream(self):
+        """
+        Проверяет, что потоковый режим отдает те же данные, что и обычный,
+        и читает сотрудников порциями.
+        """
+        url = reverse("employee-busy-employees")
+        expected = self.client.get(url, format="json").json()
+
+        # 3 сотрудника порциями по 2: на каждую порцию запрос сотрудников и задач
+        with self.settings(STREAM_CHUNK_SIZE=2), self.assertNumQueries(4):
+            response = self.client.get(url, {"stream": 1})
+            self.assertTrue(response.streaming)
+            body = b"".join(response.streaming_content)
+        self.assertEqual(json.loads(body), expected)
+
+        with self.settings(STREAM_CHUNK_SIZE=2):
+            response = self.client.get(url, {"stream": "ndjson"})
+            lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertEqual([json.loads(line) for line in lines], expected)
+
+    def test_list_without_tasks_by_default(self):
+        """
+        Проверяет, что задачи в список попадают только по ?include=tasks.
+        """
+        url = reverse("employee-list")
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(
+            list(response.data["results"][0]), ["id", "full_name", "position"]
+        )
+
+        response = self.client.get(url, {"fields": "full_name"})
+        self.assertEqual(
+            [emp for emp in response.data["results"]],
+            [
+                {"full_name": "Иванов"},
+                {"full_name": "Петров"},
+                {"full_name": "Сидоров"},
+            ],
+        )
+
+    def test_include_tasks_with_status_and_limit(self):
+        """
+        Проверяет фильтр по статусу и лимит вложенных задач.
+        """
+        url = reverse("employee-list")
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                url, {"include": "tasks", "tasks_status": "in_progress"}
+            )
+        tasks = {emp["full_name"]: emp["tasks"] for emp in response.data["results"]}
+        self.assertEqual(tasks["Иванов"], [])
+        self.assertEqual(len(tasks["Петров"]), 2)
+
+        response = self.client.get(url, {"fields": "id,tasks", "tasks_limit": 1})
+        self.assertEqual(list(response.data["results"][0]), ["id", "tasks"])
+        self.assertEqual(
+            [len(emp["tasks"]) for emp in response.data["results"]], [1, 1, 1]
+        )
+        self.assertEqual(
+            response.data["results"][1]["tasks"][0]["name"], "Task 1 for Petrov"
+        )
+
+    def test_retrieve_fields_and_tasks(self):
+        """
+        Проверяет ?fields= и ?include=tasks у карточки сотрудника.
+        """
+        url = reverse("employee-detail", args=[self.petrov.id])
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {"fields": "full_name"})
+        self.assertEqual(response.data, {"full_name": "Петров"})
+
+        response = self.client.get(url, {"include": "tasks", "tasks_limit": 1})
+        self.assertEqual(len(response.data["tasks"]), 1)
+
+    def test_invalid_read_options(self):
+        """
+        Проверяет ошибки в параметрах ?fields=, ?include= и вложенных задач.
+        """
+        url = reverse("employee-list")
+        for params in (
+            {"fields": "salary"},
+            {"include": "projects"},
+            {"include": "tasks", "tasks_status": "lost"},
+            {"include": "tasks", "tasks_limit": "many"},
+        ):
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn(list(params)[-1], response.data)
+
+    def test_workload_counts_by_status(self):
+        """
+        Проверяет счетчики задач по статусам. На SQLite материализованного
+        представления нет, и счетчики считаются по таблице задач.
+        """
+        url = reverse("employee-workload")
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["X-Workload-Source"], "live")
+        # Порядок как в "Занятых сотрудниках": по убыванию задач в работе
+        results = response.data["results"]
+        self.assertEqual(
+            [item["full_name"] for item in results],
+            ["Петров", "Сидоров", "Иванов"],
+        )
+        self.assertEqual(
+            results[2]["task_counts"],
+            {"todo": 0, "in_progress": 0, "done": 1, "canceled": 0},
+        )
+        self.assertEqual(results[0]["task_counts"]["in_progress"], 2)
+
+        # Постранично: страница сотрудников и счетчики для нее - два запроса
+        with self.assertNumQueries(2):
+            first = self.client.get(url, {"page_size": 2})
+        second = self.client.get(first.data["next"])
+        self.assertEqual(
+            [item["full_name"] for item in first.data["results"]]
+            + [item["full_name"] for item in second.data["results"]],
+            ["Петров", "Сидоров", "Иванов"],
+        )
+
+    def test_search_by_name_and_position(self):
+        """
+        Проверяет поиск ?search= по ФИО и должности. Точное совпадение
+        выше совпадения в начале строки.
+        """
+        Employee.objects.create(full_name="Иванова", position="Менеджер")
+        url = reverse("employee-list")
+
+        response = self.client.get(url, {"search": "Иванов"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item["full_name"] for item in response.data["results"]],
+            ["Иванов", "Иванова"],
+        )
+
+        response = self.client.get(url, {"search": "Тестировщик"})
+        self.assertEqual(
+            [item["full_name"] for item in response.data["results"]], ["Петров"]
+        )
@@ -1,8 +1,18 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
 
+from . import async_views
 from .views import EmployeeViewSet
 
 router = DefaultRouter()
 router.register(r"employees", EmployeeViewSet, basename="employee")
 
-urlpatterns = router.urls
+urlpatterns = router.urls + [
+    # Асинхронные версии эндпоинтов для запуска под ASGI (см. async_views.py)
+    path("async/employees/", async_views.employee_list, name="async-employee-list"),
+    path(
+        "async/employees/busy-employees/",
+        async_views.busy_employees,
+        name="async-employee-busy-employees",
+    ),
+]
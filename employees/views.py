@@ -1,17 +1,109 @@
-from django.db.models import Count, Q
+from django.conf import settings
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
+from drf_spectacular.utils import OpenApiParameter, extend_schema, extend_schema_view
 from rest_framework import viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 
-from tasks.models import TaskStatus
+from config.cache import BUSY_EMPLOYEES, EMPLOYEES, TASKS, get_or_build, mark_response
+from config.conditional import ConditionalGetMixin
+from config.fast_serializers import ValuesListMixin, ValuesReader, limit_per_parent
+from config.pagination import KeysetPagination
+from config.search import RANK_ORDERING, TrigramSearchFilter, search_requested
+from config.streaming import (
+    NDJSON_CONTENT_TYPE,
+    iterate_in_chunks,
+    stream_json_array,
+    stream_ndjson,
+)
+from tasks.exporting import export_response
+from tasks.models import Task, TaskStatus
+from tasks.workload_view import workload_counts
 
 from .models import Employee
 
 # Главный сериализатор
-from .serializers import EmployeeSerializer
+from .serializers import EmployeeSerializer, EmployeeWorkloadSerializer
 
+# Поля сотрудника в списке и карточке по умолчанию. Задачи вложенным
+# списком тянут всю таблицу задач, поэтому включаются только ?include=tasks
+DEFAULT_FIELDS = ("id", "full_name", "position")
 
-class EmployeeViewSet(viewsets.ModelViewSet):
+READ_PARAMETERS = [
+    OpenApiParameter(
+        "fields",
+        str,
+        description="Поля ответа через запятую: "
+        + ", ".join(EmployeeSerializer.Meta.fields),
+    ),
+    OpenApiParameter("include", str, description="tasks - добавить список задач"),
+    OpenApiParameter(
+        "tasks_status", str, description="Статусы вложенных задач через запятую"
+    ),
+    OpenApiParameter(
+        "tasks_limit", int, description="Не больше стольких задач на сотрудника"
+    ),
+]
+
+
+def split_param(query_params, name):
+    return [value for value in query_params.get(name, "").split(",") if value]
+
+
+def parse_read_options(query_params):
+    """
+    Разбирает ?fields=, ?include=tasks, ?tasks_status= и ?tasks_limit=.
+    Возвращает (ключи ответа, (QuerySet задач, лимит на сотрудника) или None,
+    если задачи не запрошены). При ошибке в параметрах - ValidationError
+    """
+    errors = {}
+    fields = split_param(query_params, "fields") or list(DEFAULT_FIELDS)
+    unknown = set(fields) - set(EmployeeSerializer.Meta.fields)
+    if unknown:
+        errors["fields"] = [f"Неизвестные поля: {', '.join(sorted(unknown))}."]
+    include = split_param(query_params, "include")
+    if set(include) - {"tasks"}:
+        errors["include"] = ["Допустимое значение: tasks."]
+    elif include and "tasks" not in fields:
+        fields.append("tasks")
+
+    tasks = Task.objects.order_by("id")
+    statuses = split_param(query_params, "tasks_status")
+    if set(statuses) - set(TaskStatus.values):
+        errors["tasks_status"] = [
+            f"Допустимые статусы: {', '.join(TaskStatus.values)}."
+        ]
+    elif statuses:
+        tasks = tasks.filter(status__in=statuses)
+    limit = None
+    if "tasks_limit" in query_params:
+        try:
+            limit = int(query_params["tasks_limit"])
+        except ValueError:
+            limit = 0
+        if limit <= 0:
+            errors["tasks_limit"] = ["Ожидается целое число больше нуля."]
+
+    if errors:
+        raise ValidationError(errors)
+    return fields, (tasks, limit) if "tasks" in fields else None
+
+
+def tasks_prefetch(tasks):
+    """Prefetch задач сотрудников с фильтром и лимитом из parse_read_options"""
+    queryset, limit = tasks
+    if limit is not None:
+        queryset = limit_per_parent(queryset, "assignee_id", limit, "id")
+    return Prefetch("tasks", queryset)
+
+
+@extend_schema_view(
+    list=extend_schema(parameters=READ_PARAMETERS),
+    retrieve=extend_schema(parameters=READ_PARAMETERS),
+)
+class EmployeeViewSet(ConditionalGetMixin, ValuesListMixin, viewsets.ModelViewSet):
     """
     ViewSet для CRUD-операций с сотрудниками
     Содержит кастомный эндпоинт для получения занятых сотрудников
@@ -19,6 +111,61 @@ class EmployeeViewSet(viewsets.ModelViewSet):
 
     queryset = Employee.objects.all()
     serializer_class = EmployeeSerializer
+    # Список и "Занятые сотрудники" читаются через values(): задачи всей
+    # страницы загружаются одним запросом, модели не создаются
+    values_reader = ValuesReader(EmployeeSerializer)
+    # Поиск ?search= по ФИО и должности (см. config/search.py)
+    filter_backends = [TrigramSearchFilter]
+    search_fields = ("full_name", "position")
+    # Порядок "Занятых сотрудников", id делает его уникальным для курсора
+    busy_ordering = ("-active_task_count", "id")
+    # Версии данных для ETag: в сотрудниках есть вложенный список задач,
+    # а в выгрузке - счетчик активных задач
+    etag_resources = (EMPLOYEES, TASKS)
+    etag_action_resources = {
+        "busy_employees": (BUSY_EMPLOYEES,),
+        # Материализованное представление обновляется без записи в задачи,
+        # версии данных его содержимое не описывают
+        "workload": (),
+    }
+
+    @property
+    def keyset_ordering(self):
+        """Список по id, а с поиском - по релевантности"""
+        if search_requested(getattr(self, "request", None)):
+            return RANK_ORDERING
+        return ("id",)
+
+    def read_options(self):
+        """Разобранные параметры ?fields= и ?include= текущего запроса"""
+        if not hasattr(self, "_read_options"):
+            self._read_options = parse_read_options(self.request.query_params)
+        return self._read_options
+
+    def get_values_reader(self):
+        """Список читает только запрошенные колонки, задачи - по ?include=tasks"""
+        fields, tasks = self.read_options()
+        return ValuesReader(
+            EmployeeSerializer, fields, {"tasks": tasks} if tasks else None
+        )
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action != "retrieve":
+            return queryset
+        fields, tasks = self.read_options()
+        # Только колонки запрошенных полей; без задач - без prefetch
+        queryset = queryset.only(
+            *[name for name in fields if name != "tasks"] or ["id"]
+        )
+        if tasks is not None:
+            queryset = queryset.prefetch_related(tasks_prefetch(tasks))
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        if self.action == "retrieve":
+            kwargs.setdefault("fields", self.read_options()[0])
+        return super().get_serializer(*args, **kwargs)
 
     @action(detail=False, methods=["get"], url_path="busy-employees")
     def busy_employees(self, request):
@@ -26,20 +173,91 @@ class EmployeeViewSet(viewsets.ModelViewSet):
         Возвращает список сотрудников и их задачи, отсортированный
         по убыванию количества активных задач (статус 'В работе')
         """
-        # Фильтр для подсчета только задач со статусом IN_PROGRESS
-        active_tasks_filter = Q(tasks__status=TaskStatus.IN_PROGRESS)
+        stream = request.query_params.get("stream", "").lower()
+        if stream in ("1", "true", "json", "ndjson"):
+            return self.stream_busy_employees(ndjson=stream == "ndjson")
 
-        employees = (
-            # Для каждого сотрудника создаю временное поле 'active_task_count'
-            Employee.objects.annotate(
-                active_task_count=Count("tasks", filter=active_tasks_filter)
-            )
-            # КРИТИЧЕСКИ ВАЖНАЯ ОПТИМИЗАЦИЯ:
-            # .prefetch_related('tasks') заранее загружает все задачи для всех найденных
-            # сотрудников одним дополнительным запросом. Без этого для каждого сотрудника
-            # был бы сделан отдельный запрос в базу за его задачами (проблема "N+1")
-            .prefetch_related("tasks").order_by("-active_task_count")
+        # Сортировка по денормализованному счетчику active_task_count
+        # обслуживается индексом, без подсчета задач по всей таблице
+        employees = self.values_reader.values(
+            Employee.objects.order_by(*self.busy_ordering), "active_task_count"
         )
 
-        serializer = self.get_serializer(employees, many=True)
-        return Response(serializer.data)
+        def build():
+            # Постраничный режим включается параметрами ?page_size= или ?cursor=,
+            # без них эндпоинт, как и раньше, возвращает всех сотрудников
+            if KeysetPagination.is_requested(request):
+                paginator = KeysetPagination(ordering=self.busy_ordering)
+                page = paginator.paginate_queryset(employees, request)
+                data = self.values_reader.serialize(page)
+                return paginator.get_paginated_response(data).data
+            # Задачи всех сотрудников загружаются одним дополнительным
+            # запросом (как prefetch_related), без N+1
+            return self.values_reader.serialize(employees)
+
+        # Ответ кэшируется до ближайшего изменения задач или сотрудников.
+        # Ссылки next/previous абсолютные, поэтому ключ - полный URL запроса
+        data, hit = get_or_build(BUSY_EMPLOYEES, request.build_absolute_uri(), build)
+        return mark_response(Response(data), hit)
+
+    @extend_schema(responses=EmployeeWorkloadSerializer(many=True))
+    @action(detail=False, methods=["get"])
+    def workload(self, request):
+        """
+        Количество задач сотрудников по статусам, постранично, в порядке
+        "Занятых сотрудников": по убыванию задач в работе, затем по id.
+        Страница сотрудников читается из индекса по active_task_count,
+        счетчики - одним запросом для сотрудников страницы: в PostgreSQL
+        из материализованного представления, иначе по таблице задач
+        (см. tasks/workload_view.py). Заголовок X-Workload-Source - view или live
+        """
+        paginator = KeysetPagination(ordering=self.busy_ordering)
+        page = paginator.paginate_queryset(
+            Employee.objects.values("id", "full_name", "active_task_count"), request
+        )
+        counts, source = workload_counts(row["id"] for row in page)
+        data = [
+            {
+                "id": row["id"],
+                "full_name": row["full_name"],
+                "task_counts": counts[row["id"]],
+            }
+            for row in page
+        ]
+        response = paginator.get_paginated_response(
+            EmployeeWorkloadSerializer(data, many=True).data
+        )
+        response["X-Workload-Source"] = source
+        return response
+
+    @action(detail=False, methods=["get"], url_path="export")
+    def export(self, request):
+        """
+        Потоковая выгрузка всех сотрудников в CSV или NDJSON (?file_format=)
+        """
+        return export_response(request, "employees")
+
+    def stream_busy_employees(self, ndjson=False):
+        """
+        Потоковый режим "Занятых сотрудников" (?stream=1 или ?stream=ndjson)
+        Сотрудники читаются порциями по STREAM_CHUNK_SIZE, задачи подгружаются
+        отдельно для каждой порции, а JSON пишется в ответ по мере готовности.
+        Пиковая память определяется размером порции, а не размером таблицы
+        """
+
+        def serialized_chunks():
+            chunks = iterate_in_chunks(
+                self.values_reader.values(Employee.objects.all(), "active_task_count"),
+                self.busy_ordering,
+                settings.STREAM_CHUNK_SIZE,
+            )
+            for chunk in chunks:
+                yield self.values_reader.serialize(chunk)
+
+        if ndjson:
+            return StreamingHttpResponse(
+                stream_ndjson(serialized_chunks()), content_type=NDJSON_CONTENT_TYPE
+            )
+        return StreamingHttpResponse(
+            stream_json_array(serialized_chunks()), content_type="application/json"
+        )
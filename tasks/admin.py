@@ -1,5 +1,67 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.contrib.admin import DateFieldListFilter
 
-from .models import Task
+from config.admin import LargeTableAdmin
 
-admin.site.register(Task)
+from .models import Task, TaskStatus
+
+
+@admin.register(Task)
+class TaskAdmin(LargeTableAdmin):
+    """
+    Админка задач, рассчитанная на миллионы строк:
+    связи выбираются через автодополнение, а не <select> со всеми строками,
+    фильтры и сортировки идут по индексам, смена статуса - одним UPDATE
+    """
+
+    list_display = ("id", "name", "status", "deadline", "assignee", "parent")
+    # Исполнитель и родитель выводятся в списке - без JOIN это N+1
+    list_select_related = ("assignee", "parent")
+    # status - индекс (status, id), срок - индекс (deadline, id)
+    list_filter = ("status", ("deadline", DateFieldListFilter))
+    # Сортировка только по индексированным колонкам
+    sortable_by = ("id", "deadline")
+    # Точный id и начало наименования
+    search_fields = ("=id", "^name")
+    autocomplete_fields = ("parent", "assignee")
+    readonly_fields = ("created_at", "updated_at")
+    actions = ("mark_todo", "mark_in_progress", "mark_done", "mark_canceled")
+
+    def change_status(self, request, queryset, status):
+        """
+        Меняет статус выбранных задач одним UPDATE.
+        TaskQuerySet.update пересчитывает счетчики активных задач
+        и сообщает об изменении для кэша и ETag
+        """
+        skipped = 0
+        if status == TaskStatus.DONE:
+            # Как и в API, задачу без исполнителя завершить нельзя
+            skipped = queryset.filter(assignee__isnull=True).count()
+            queryset = queryset.filter(assignee__isnull=False)
+        updated = queryset.update(status=status)
+        self.message_user(
+            request,
+            f'Статус "{TaskStatus(status).label}" установлен задачам: {updated}',
+        )
+        if skipped:
+            self.message_user(
+                request,
+                f"Пропущено задач без исполнителя: {skipped}",
+                level=messages.WARNING,
+            )
+
+    @admin.action(description='Перевести в статус "К выполнению"')
+    def mark_todo(self, request, queryset):
+        self.change_status(request, queryset, TaskStatus.TODO)
+
+    @admin.action(description='Перевести в статус "В работе"')
+    def mark_in_progress(self, request, queryset):
+        self.change_status(request, queryset, TaskStatus.IN_PROGRESS)
+
+    @admin.action(description='Перевести в статус "Выполнено"')
+    def mark_done(self, request, queryset):
+        self.change_status(request, queryset, TaskStatus.DONE)
+
+    @admin.action(description='Перевести в статус "Отменено"')
+    def mark_canceled(self, request, queryset):
+        self.change_status(request, queryset, TaskStatus.CANCELED)
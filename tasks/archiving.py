@@ -0,0 +1,70 @@
+"""
+Перенос закрытых задач в архив (ArchivedTask)
+Аналитика читает только задачи "К выполнению" и "В работе", а закрытые
+задачи копятся в рабочей таблице и раздувают ее индексы. Задачи,
+закрытые раньше порога, переносятся пачками, каждая пачка - в своей
+транзакции: копия в архив, удаление из рабочей таблицы и надгробия
+для ленты изменений (для синхронизирующихся клиентов задача удалена).
+
+Переносится только задача без дочерних задач в рабочей таблице, поэтому
+ссылки на родителя не обрываются: дочерние задачи уходят в архив раньше
+родителя (родитель станет кандидатом в одной из следующих пачек),
+а задача с незакрытыми потомками остается в рабочей таблице
+"""
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from .models import ArchivedTask, Task, TaskStatus
+
+CLOSED_STATUSES = (TaskStatus.DONE, TaskStatus.CANCELED)
+ARCHIVED_FIELDS = (
+    "id",
+    "name",
+    "parent_id",
+    "assignee_id",
+    "status",
+    "deadline",
+    "created_at",
+    "updated_at",
+)
+
+
+def archivable_tasks(cutoff):
+    """Задачи, закрытые (последний раз измененные) раньше cutoff и без потомков"""
+    return Task.objects.filter(
+        status__in=CLOSED_STATUSES, updated_at__lt=cutoff
+    ).filter(~Exists(Task.objects.filter(parent_id=OuterRef("pk"))))
+
+
+def archive_batch(cutoff, batch_size):
+    """Переносит в архив одну пачку задач. Возвращает число перенесенных задач"""
+    with transaction.atomic():
+        # Блокировка не дает изменить или переоткрыть задачу, пока она переносится
+        rows = list(
+            archivable_tasks(cutoff)
+            .select_for_update()
+            .order_by("id")
+            .values(*ARCHIVED_FIELDS)[:batch_size]
+        )
+        if not rows:
+            return 0
+        ids = [row["id"] for row in rows]
+        ArchivedTask.objects.bulk_create(ArchivedTask(**row) for row in rows)
+        # Обычное удаление TaskQuerySet: счетчики активных задач, связи
+        # и сигналы post_delete (надгробия для ленты изменений, версии данных
+        # и кэш аналитики) - как при любом другом удалении задач
+        Task.objects.filter(pk__in=ids).delete()
+    return len(rows)
+
+
+def archive_tasks(cutoff, batch_size, log=None):
+    """Переносит пачками все подходящие задачи. Возвращает их число"""
+    total = 0
+    while True:
+        moved = archive_batch(cutoff, batch_size)
+        if not moved:
+            return total
+        total += moved
+        if log:
+            log(total)
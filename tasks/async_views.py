@@ -0,0 +1,74 @@
+"""
+Асинхронные версии эндпоинтов задач для запуска под ASGI-сервером
+DRF не поддерживает async-представления, поэтому это обычные async-функции
+Django: запросы идут через async ORM (aiterator, afirst), а сериализация и
+пагинация переиспользуют те же классы, что и синхронные эндпоинты, поэтому
+тела ответов совпадают
+"""
+
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from config.cache import IMPORTANT_TASKS, aget_or_build, mark_response
+from config.pagination import KeysetPagination
+
+from .filters import include_archived
+from .models import ArchivedTask, Task
+from .serializers import ImportantTaskSerializer, TaskSerializer
+from .services import abuild_important_tasks_report
+from .views import TaskViewSet
+
+
+def json_response(data, status=200):
+    """Ответ, отрендеренный так же, как JSONRenderer в DRF"""
+    return HttpResponse(
+        JSONRenderer().render(data), status=status, content_type="application/json"
+    )
+
+
+@require_GET
+async def task_list(request):
+    """
+    Список задач с фильтрами и курсорной пагинацией, как GET /api/v1/tasks/,
+    в том числе с ?include_archived=1
+    """
+    request = Request(request)
+    # Фильтры, поиск и допустимые ?ordering= - те же, что у TaskViewSet
+    view = TaskViewSet(request=request)
+    paginator = KeysetPagination()
+    sources = [Task.objects.all()]
+    if include_archived(request.query_params):
+        sources.append(ArchivedTask.objects.all())
+    try:
+        querysets = [view.filter_queryset(queryset) for queryset in sources]
+        page = await paginator.apaginate_querysets(querysets, request, view=view)
+    except ValidationError as error:
+        return json_response(error.detail, status=400)
+    except NotFound as error:
+        return json_response({"detail": error.detail}, status=404)
+    data = TaskSerializer(page, many=True, context={"request": request}).data
+    return json_response(paginator.get_paginated_response(data).data)
+
+
+@require_GET
+async def important_tasks(request):
+    """Отчет по "важным" задачам, как GET /api/v1/tasks/important-tasks/"""
+
+    async def build():
+        result_data = await abuild_important_tasks_report()
+        if result_data is None:
+            return None
+        return list(ImportantTaskSerializer(instance=result_data, many=True).data)
+
+    # Общий с синхронным эндпоинтом кэш: ключ и версия данных те же
+    data, hit = await aget_or_build(IMPORTANT_TASKS, "report", build)
+    if data is None:
+        response = json_response(
+            {"message": "В системе нет сотрудников для назначения задач."}, status=404
+        )
+    else:
+        response = json_response(data)
+    return mark_response(response, hit)
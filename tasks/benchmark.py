@@ -0,0 +1,362 @@
+"""
+Набор замеров производительности эндпоинтов API
+Для каждого масштаба данных база заполняется seed_data, затем каждый
+эндпоинт вызывается через тестовый клиент DRF (весь стек middleware)
+и для него считаются перцентили времени ответа и число SQL-запросов.
+Отдельно замеряется скорость сериализации списков в строках в секунду:
+через ModelSerializer и через ValuesReader, и время первой страницы
+поиска ?search= в сравнении с простым icontains
+"""
+
+import math
+import statistics
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection
+from django.db.models import Q
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from config.cache import (
+    BUSY_EMPLOYEES,
+    DATA,
+    EMPLOYEES,
+    IMPORTANT_TASKS,
+    TASKS,
+    bump_versions,
+)
+from config.fast_serializers import ValuesReader
+from config.pagination import KeysetPagination
+from config.search import RANK_ORDERING, search_queryset
+from employees.models import Employee
+from employees.serializers import EmployeeSerializer
+
+from .models import Task
+from .seeding import clear_data, seed_data
+from .serializers import TaskSerializer
+
+# Допустимое ухудшение медианы относительно базовой линии
+DEFAULT_TOLERANCE = 0.2
+# Изменения медианы меньше этого порога (мс) считаются шумом
+MIN_DELTA_MS = 1.0
+# Все версии данных приложения: их смена делает холодными кэш аналитики
+# и ETag, не трогая чужие ключи в общем кэше (Redis, Memcached)
+CACHED_RESOURCES = (DATA, TASKS, EMPLOYEES, BUSY_EMPLOYEES, IMPORTANT_TASKS)
+
+
+def benchmark_endpoints():
+    """
+    Возвращает список (название, функция, возвращающая URL) замеряемых эндпоинтов.
+    URL строится после заполнения базы, поэтому detail-эндпоинты получают
+    id существующих объектов
+    """
+
+    def first_task():
+        return Task.objects.order_by("id").values_list("id", flat=True).first()
+
+    def first_employee():
+        return Employee.objects.order_by("id").values_list("id", flat=True).first()
+
+    return [
+        ("tasks-list", lambda: reverse("task-list")),
+        ("tasks-detail", lambda: reverse("task-detail", args=[first_task()])),
+        ("tasks-subtree", lambda: reverse("task-subtree", args=[first_task()])),
+        ("employees-list", lambda: reverse("employee-list")),
+        (
+            "employees-detail",
+            lambda: reverse("employee-detail", args=[first_employee()]),
+        ),
+        (
+            "busy-employees",
+            lambda: reverse("employee-busy-employees") + "?page_size=100",
+        ),
+        ("busy-employees-full", lambda: reverse("employee-busy-employees")),
+        ("important-tasks", lambda: reverse("task-important-tasks")),
+        ("tasks-search", lambda: reverse("task-list") + "?search=отчет"),
+        ("employees-search", lambda: reverse("employee-list") + "?search=Иван"),
+    ]
+
+
+def percentile(values, percent):
+    """Перцентиль методом ближайшего ранга"""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(percent / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def measure(client, url, repeat):
+    """
+    Вызывает url repeat раз (плюс один прогревочный вызов) и возвращает
+    статистику. Перед каждым вызовом вне замера времени меняются версии
+    данных, чтобы мерить построение ответа, а не чтение из кэша. Сам кэш
+    не очищается: он может быть общим с другими приложениями
+    """
+    bump_versions(*CACHED_RESOURCES)
+    response = client.get(url)
+    if response.status_code != 200:
+        raise RuntimeError(f"{url}: статус {response.status_code}")
+
+    timings, query_counts = [], []
+    for _ in range(repeat):
+        bump_versions(*CACHED_RESOURCES)
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = client.get(url)
+            # Потоковые ответы нужно дочитать, иначе замер неполный
+            if response.streaming:
+                b"".join(response.streaming_content)
+            timings.append((time.perf_counter() - started) * 1000)
+        query_counts.append(len(queries))
+    return {
+        "p50_ms": round(percentile(timings, 50), 3),
+        "p95_ms": round(percentile(timings, 95), 3),
+        "p99_ms": round(percentile(timings, 99), 3),
+        "mean_ms": round(statistics.fmean(timings), 3),
+        "queries": max(query_counts),
+    }
+
+
+def serialization_cases():
+    """
+    (название, сериализатор, QuerySet) для замера скорости сериализации.
+    QuerySet для ModelSerializer - такой же, как у эндпоинтов до перехода
+    на ValuesReader
+    """
+    return [
+        ("serialize-tasks", TaskSerializer, Task.objects.order_by("id")),
+        (
+            "serialize-employees",
+            EmployeeSerializer,
+            Employee.objects.order_by("id").prefetch_related("tasks"),
+        ),
+    ]
+
+
+def rows_per_second(build, repeat):
+    """Лучшая из repeat попыток скорость build() в строках в секунду"""
+    best, rows = math.inf, 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rows = len(build())
+        best = min(best, time.perf_counter() - started)
+    return rows, round(rows / best, 1) if best else 0.0
+
+
+def measure_serialization(serializer_class, queryset, repeat):
+    """
+    Скорость сериализации всех строк queryset двумя путями, включая чтение
+    из БД: ModelSerializer по моделям и ValuesReader по строкам values()
+    """
+    reader = ValuesReader(serializer_class)
+    rows, serializer_speed = rows_per_second(
+        lambda: serializer_class(queryset.all(), many=True).data, repeat
+    )
+    _, values_speed = rows_per_second(
+        lambda: reader.serialize(reader.values(queryset.all())), repeat
+    )
+    return {
+        "rows": rows,
+        "serializer_rows_per_sec": serializer_speed,
+        "values_rows_per_sec": values_speed,
+    }
+
+
+def search_cases():
+    """(название, QuerySet, поля поиска, строка поиска) для замера поиска"""
+    return [
+        ("search-tasks", Task.objects.all(), ("name",), "отчет"),
+        (
+            "search-employees",
+            Employee.objects.all(),
+            ("full_name", "position"),
+            "Иван",
+        ),
+    ]
+
+
+def median_time_ms(build, repeat):
+    """Медиана времени build() в мс по repeat попыткам"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        build()
+        timings.append((time.perf_counter() - started) * 1000)
+    return round(percentile(timings, 50), 3)
+
+
+def measure_search(queryset, fields, term, repeat, page_size=None):
+    """
+    Время первой страницы поиска двумя путями: search_queryset с рангом
+    (в PostgreSQL через индексы pg_trgm) и простой icontains по тем же полям
+    в порядке id - так список фильтровался бы без поиска
+    """
+    page_size = page_size or KeysetPagination.page_size
+    plain = Q()
+    for field in fields:
+        plain |= Q(**{f"{field}__icontains": term})
+    plain_queryset = queryset.filter(plain).order_by("id")
+    search = search_queryset(queryset, fields, term).order_by(*RANK_ORDERING)
+    return {
+        "term": term,
+        "rows": plain_queryset.count(),
+        "search_p50_ms": median_time_ms(lambda: list(search[:page_size]), repeat),
+        "icontains_p50_ms": median_time_ms(
+            lambda: list(plain_queryset[:page_size]), repeat
+        ),
+    }
+
+
+def scale_name(employees, tasks):
+    return f"{employees}x{tasks}"
+
+
+def run_benchmarks(scales, repeat, seed_options=None, log=None):
+    """
+    Заполняет базу для каждого масштаба (сотрудники, задачи) и замеряет
+    все эндпоинты. Возвращает {масштаб: {эндпоинт: статистика}}.
+    Данные в текущей базе удаляются
+    """
+    client = APIClient()
+    results = {}
+    for employees, tasks in scales:
+        clear_data()
+        seed_data(employees, tasks, **(seed_options or {}))
+        name = scale_name(employees, tasks)
+        results[name] = {}
+        for endpoint, build_url in benchmark_endpoints():
+            stats = measure(client, build_url(), repeat)
+            results[name][endpoint] = stats
+            if log:
+                log(name, endpoint, stats)
+        for case, serializer_class, queryset in serialization_cases():
+            stats = measure_serialization(serializer_class, queryset, repeat)
+            results[name][case] = stats
+            if log:
+                log(name, case, stats)
+        for case, queryset, fields, term in search_cases():
+            stats = measure_search(queryset, fields, term, repeat)
+            results[name][case] = stats
+            if log:
+                log(name, case, stats)
+    return results
+
+
+def compare_results(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Сравнивает результаты с базовой линией. Регрессия - рост медианы
+    больше чем на tolerance или рост числа запросов, для сериализации -
+    падение скорости values-пути больше чем на tolerance, для поиска -
+    рост медианы search_queryset.
+    Возвращает список строк с описанием регрессий
+    """
+    regressions = []
+    for scale, endpoints in results.items():
+        for endpoint, stats in endpoints.items():
+            base = baseline.get(scale, {}).get(endpoint)
+            if base is None:
+                continue
+            if "values_rows_per_sec" in stats:
+                speed, base_speed = (
+                    stats["values_rows_per_sec"],
+                    base["values_rows_per_sec"],
+                )
+                if speed < base_speed * (1 - tolerance):
+                    regressions.append(
+                        f"{scale} {endpoint}: строк/с {base_speed} -> {speed}"
+                    )
+                continue
+            if "search_p50_ms" in stats:
+                took, base_took = stats["search_p50_ms"], base["search_p50_ms"]
+                if took > base_took * (1 + tolerance) and (
+                    took - base_took > MIN_DELTA_MS
+                ):
+                    regressions.append(
+                        f"{scale} {endpoint}: медиана поиска {base_took} -> {took} мс"
+                    )
+                continue
+            if stats["queries"] > base["queries"]:
+                regressions.append(
+                    f"{scale} {endpoint}: запросов {base['queries']} -> {stats['queries']}"
+                )
+            slower = stats["p50_ms"] - base["p50_ms"]
+            if stats["p50_ms"] > base["p50_ms"] * (1 + tolerance) and (
+                slower > MIN_DELTA_MS
+            ):
+                regressions.append(
+                    f"{scale} {endpoint}: медиана {base['p50_ms']} -> {stats['p50_ms']} мс"
+                )
+    return regressions
+
+
+def load_test_endpoints():
+    """
+    Пары путей (синхронный эндпоинт, его async-версия) для нагрузочного теста.
+    Под WSGI-сервером запрашиваются синхронные пути, под ASGI - асинхронные
+    """
+    return [
+        ("tasks-list", reverse("task-list"), reverse("async-task-list")),
+        ("employees-list", reverse("employee-list"), reverse("async-employee-list")),
+        (
+            "busy-employees",
+            reverse("employee-busy-employees") + "?page_size=100",
+            reverse("async-employee-busy-employees") + "?page_size=100",
+        ),
+        (
+            "important-tasks",
+            reverse("task-important-tasks"),
+            reverse("async-task-important-tasks"),
+        ),
+    ]
+
+
+def fetch(url, timeout):
+    """Время ответа в мс или None, если запрос завершился ошибкой"""
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            response.read()
+    except OSError:
+        return None
+    return (time.perf_counter() - started) * 1000
+
+
+def load_test(url, concurrency, requests, timeout=30):
+    """
+    Отправляет requests запросов на url, держа в работе concurrency запросов
+    одновременно. Возвращает пропускную способность и перцентили времени ответа
+    """
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(lambda _: fetch(url, timeout), range(requests)))
+    elapsed = time.perf_counter() - started
+    timings = [timing for timing in results if timing is not None]
+    stats = {
+        "rps": round(len(timings) / elapsed, 1),
+        "errors": len(results) - len(timings),
+    }
+    if timings:
+        stats.update(
+            p50_ms=round(percentile(timings, 50), 3),
+            p95_ms=round(percentile(timings, 95), 3),
+        )
+    return stats
+
+
+def run_load_tests(servers, concurrency, requests, log=None):
+    """
+    Нагрузочный тест уже запущенных серверов: servers - словарь
+    {"wsgi" или "asgi": базовый URL}. Возвращает {сервер: {эндпоинт: статистика}}
+    """
+    results = {}
+    for server, base_url in servers.items():
+        results[server] = {}
+        for endpoint, sync_path, async_path in load_test_endpoints():
+            path = async_path if server == "asgi" else sync_path
+            stats = load_test(base_url.rstrip("/") + path, concurrency, requests)
+            results[server][endpoint] = stats
+            if log:
+                log(server, endpoint, stats)
+    return results
@@ -0,0 +1,122 @@
+"""
+Лента изменений задач для инкрементальной синхронизации
+Курсор хранит две позиции: по (change_seq, id) измененных задач
+и по (change_seq, id) надгробий удаленных. Каждая страница - два
+индексных поиска "после позиции", поэтому стоимость синхронизации
+зависит от количества изменений, а не от размера таблицы.
+
+Порядок ленты - порядок фиксации транзакций, а не время записи: updated_at
+ставится до фиксации, и долгая транзакция (импорт, массовая смена статуса,
+архивация) зафиксировала бы строки позади курсоров, которые клиенты уже
+прошли. change_seq ставит триггер БД (миграция 0010): в PostgreSQL это id
+пишущей транзакции, и лента отдает только строки транзакций с id меньше
+pg_snapshot_xmin - все они уже завершены, а незавершенные получат номер
+не меньше этой границы, то есть после любого выданного курсора
+"""
+
+import base64
+import binascii
+import json
+
+from django.db import connection
+
+from config.pagination import get_position, keyset_filter
+
+from .models import Task, TaskTombstone
+
+CHANGE_ORDERING = ("change_seq", "id")
+
+
+def decode_since(value):
+    """
+    Разбирает курсор в пару позиций (задачи, надгробия).
+    Пустой курсор - синхронизация с самого начала
+    """
+    if not value:
+        return None, None
+    try:
+        data = json.loads(base64.urlsafe_b64decode(value.encode()).decode())
+        positions = tuple(
+            [int(data[key][0]), int(data[key][1])] if data[key] else None
+            for key in ("t", "d")
+        )
+    except (TypeError, ValueError, KeyError, IndexError, binascii.Error):
+        positions = ()
+    if len(positions) != 2:
+        raise ValueError("Некорректный курсор.")
+    return positions
+
+
+def encode_since(task_position, tombstone_position):
+    raw = json.dumps(
+        {"t": task_position, "d": tombstone_position}, separators=(",", ":")
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def commit_horizon():
+    """
+    Номер, меньше которого все транзакции уже завершены, или None,
+    если граница не нужна: пишущие транзакции SQLite идут по одной,
+    и номер незафиксированной строки больше любого видимого
+    """
+    if connection.vendor != "postgresql":
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint")
+        return cursor.fetchone()[0]
+
+
+def after(queryset, position, horizon):
+    queryset = queryset.order_by(*CHANGE_ORDERING)
+    if horizon is not None:
+        queryset = queryset.filter(change_seq__lt=horizon)
+    if position is not None:
+        queryset = queryset.filter(keyset_filter(CHANGE_ORDERING, position))
+    return queryset
+
+
+def fetch_changes(since, limit):
+    """
+    Возвращает (изменения, курсор следующей страницы, есть ли еще изменения).
+    Изменения упорядочены по фиксации, формат - см. TaskChangeSerializer
+    """
+    task_position, tombstone_position = since
+    horizon = commit_horizon()
+
+    # Лишняя строка каждого вида показывает, есть ли продолжение
+    tasks = list(after(Task.objects.all(), task_position, horizon)[: limit + 1])
+    tombstones = list(
+        after(TaskTombstone.objects.all(), tombstone_position, horizon)[: limit + 1]
+    )
+
+    # Слияние двух упорядоченных потоков: первые limit элементов
+    # объединения всегда среди первых limit + 1 каждого потока
+    merged = sorted(
+        [(task.change_seq, 0, task.id, task, None) for task in tasks]
+        + [(stone.change_seq, 1, stone.id, None, stone) for stone in tombstones],
+        key=lambda change: change[:3],
+    )
+    page = []
+    for *_, task, stone in merged[:limit]:
+        if task is not None:
+            task_position = get_position(task, CHANGE_ORDERING)
+            page.append(
+                {
+                    "op": "upsert",
+                    "id": task.id,
+                    "changed_at": task.updated_at,
+                    "task": task,
+                }
+            )
+        else:
+            tombstone_position = get_position(stone, CHANGE_ORDERING)
+            page.append(
+                {
+                    "op": "delete",
+                    "id": stone.task_id,
+                    "changed_at": stone.deleted_at,
+                    "task": None,
+                }
+            )
+    return page, encode_since(task_position, tombstone_position), len(merged) > limit
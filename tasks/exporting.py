@@ -0,0 +1,78 @@
+"""
+Потоковая выгрузка задач и сотрудников
+Строки читаются через values_list().iterator(): в PostgreSQL это серверный
+курсор, модели не создаются, и первый байт уходит клиенту сразу
+"""
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+
+from config.streaming import NDJSON_CONTENT_TYPE, stream_csv, stream_ndjson_rows
+from employees.models import Employee
+
+from .models import Task
+
+EXPORT_FORMATS = ("csv", "ndjson")
+
+# Колонки выгрузки: (заголовок, поле для values_list)
+TASK_COLUMNS = (
+    ("id", "id"),
+    ("name", "name"),
+    ("parent_id", "parent_id"),
+    ("assignee_id", "assignee_id"),
+    ("status", "status"),
+    ("deadline", "deadline"),
+)
+# Имена связанных объектов добавляются через JOIN, без отдельных запросов
+TASK_NAME_COLUMNS = (
+    ("assignee_name", "assignee__full_name"),
+    ("parent_name", "parent__name"),
+)
+EMPLOYEE_COLUMNS = (
+    ("id", "id"),
+    ("full_name", "full_name"),
+    ("position", "position"),
+    ("active_task_count", "active_task_count"),
+)
+
+
+def export_rows(resource, with_names=False):
+    """Возвращает (заголовок, ленивый поток кортежей) для tasks или employees"""
+    if resource == "tasks":
+        queryset = Task.objects.all()
+        columns = TASK_COLUMNS + (TASK_NAME_COLUMNS if with_names else ())
+    else:
+        queryset = Employee.objects.all()
+        columns = EMPLOYEE_COLUMNS
+    header = [name for name, _ in columns]
+    rows = (
+        queryset.order_by("id")
+        .values_list(*(field for _, field in columns))
+        .iterator(chunk_size=settings.STREAM_CHUNK_SIZE)
+    )
+    return header, rows
+
+
+def stream_export(resource, file_format="csv", with_names=False):
+    """Возвращает генератор байтов выгрузки в формате csv или ndjson"""
+    header, rows = export_rows(resource, with_names)
+    if file_format == "ndjson":
+        return stream_ndjson_rows(header, rows, settings.STREAM_CHUNK_SIZE)
+    return stream_csv(header, rows, settings.STREAM_CHUNK_SIZE)
+
+
+def export_response(request, resource):
+    """
+    StreamingHttpResponse с выгрузкой для эндпоинтов export
+    Параметры: ?file_format=csv|ndjson и ?with_names=1 (только для задач)
+    """
+    file_format = request.query_params.get("file_format", "csv")
+    if file_format not in EXPORT_FORMATS:
+        file_format = "csv"
+    with_names = request.query_params.get("with_names") in ("1", "true")
+    response = StreamingHttpResponse(
+        stream_export(resource, file_format, with_names),
+        content_type="text/csv" if file_format == "csv" else NDJSON_CONTENT_TYPE,
+    )
+    response["Content-Disposition"] = f'attachment; filename="{resource}.{file_format}"'
+    return response
@@ -0,0 +1,157 @@
+"""
+Фильтрация списка задач параметрами запроса
+Каждый фильтр обслуживается индексом (см. Task.Meta.indexes), это
+проверяется через EXPLAIN в query_plans.py для всех сочетаний фильтров
+и сортировок. Поэтому набор фильтров закрытый, а не произвольные lookup'ы
+"""
+
+from django.db.models import Exists, OuterRef
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from .models import TaskStatus
+
+TRUE_VALUES = ("1", "true")
+FALSE_VALUES = ("0", "false")
+# Фильтры, которые сами по себе сужают выборку по индексу
+INDEXED_FILTERS = ("status", "assignee", "parent", "deadline__gte", "deadline__lte")
+# Все фильтры списка, они же допустимы в фильтре массовой смены статуса
+LIST_FILTERS = (*INDEXED_FILTERS, "has_children")
+# Диапазон по сроку обслуживается индексом (deadline, id) только в его порядке
+DEADLINE_FILTERS = ("deadline__gte", "deadline__lte")
+DEADLINE_ORDERINGS = ("deadline", "-deadline")
+
+
+def has_deadline_range(params):
+    return any(params.get(name) for name in DEADLINE_FILTERS)
+
+
+def parse_id(value):
+    """id связанного объекта или None для "null" (задачи без связи)"""
+    if value == "null":
+        return None
+    if not value.isdigit():
+        raise ValueError("Ожидается id или null.")
+    return int(value)
+
+
+def include_archived(params):
+    """Запрошены ли вместе с задачами и архивные (?include_archived=1)"""
+    return params.get("include_archived", "").lower() in TRUE_VALUES
+
+
+def filter_tasks(queryset, params):
+    """
+    Применяет к queryset фильтры из словаря параметров запроса.
+    Подходит и для задач, и для архивных задач: дочерние задачи ищутся
+    в той же таблице. Ошибки в значениях собираются в ValidationError
+    по имени параметра
+    """
+    model = queryset.model
+    errors = {}
+    conditions = {}
+
+    if params.get("status"):
+        statuses = params["status"].split(",")
+        if set(statuses) - set(TaskStatus.values):
+            errors["status"] = [f"Допустимые статусы: {', '.join(TaskStatus.values)}."]
+        conditions["status__in"] = statuses
+
+    for name in ("assignee", "parent"):
+        if params.get(name):
+            try:
+                value = parse_id(params[name])
+            except ValueError as error:
+                errors[name] = [str(error)]
+                continue
+            if value is None:
+                conditions[f"{name}__isnull"] = True
+            else:
+                conditions[f"{name}_id"] = value
+
+    for name in DEADLINE_FILTERS:
+        if params.get(name):
+            try:
+                value = parse_date(params[name])
+            except ValueError:
+                value = None
+            if value is None:
+                errors[name] = ["Ожидается дата в формате YYYY-MM-DD."]
+            conditions[name] = value
+
+    has_children = params.get("has_children", "").lower()
+    if has_children in TRUE_VALUES:
+        # IN по подзапросу: id родителей берутся из индекса по parent,
+        # а задачи находятся по первичному ключу
+        conditions["id__in"] = model.objects.filter(parent__isnull=False).values(
+            "parent_id"
+        )
+    elif has_children in FALSE_VALUES:
+        # Задачи без потомков индекс перечислить не может, поэтому такой
+        # фильтр допускается только вместе с индексным фильтром
+        if not any(params.get(name) for name in INDEXED_FILTERS):
+            errors["has_children"] = [
+                "has_children=false используется вместе с другим фильтром: "
+                + ", ".join(INDEXED_FILTERS)
+                + "."
+            ]
+        queryset = queryset.filter(
+            ~Exists(model.objects.filter(parent_id=OuterRef("pk")))
+        )
+    elif has_children:
+        errors["has_children"] = ["Ожидается true или false."]
+
+    if errors:
+        raise ValidationError(errors)
+    return queryset.filter(**conditions)
+
+
+class TaskFilterBackend(BaseFilterBackend):
+    """
+    Фильтры списка задач: ?status=todo,in_progress, ?assignee=ID|null,
+    ?parent=ID|null, ?deadline__gte=, ?deadline__lte=, ?has_children=true|false
+    Параметр ?include_archived= разбирает само представление
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+        ordering = params.get("ordering")
+        if (
+            has_deadline_range(params)
+            and ordering
+            and ordering not in DEADLINE_ORDERINGS
+        ):
+            # Иначе пришлось бы выбирать между индексом по сроку с сортировкой
+            # всего диапазона и проходом по всей таблице в порядке id
+            raise ValidationError(
+                {
+                    "ordering": [
+                        "С фильтром по сроку допустимо только deadline или -deadline."
+                    ]
+                }
+            )
+        return filter_tasks(queryset, params)
+
+    def get_schema_operation_parameters(self, view):
+        descriptions = {
+            "status": ("string", "Статусы через запятую"),
+            "assignee": ("string", "id исполнителя или null"),
+            "parent": ("string", "id родительской задачи или null"),
+            "deadline__gte": ("string", "Срок не раньше даты (YYYY-MM-DD)"),
+            "deadline__lte": ("string", "Срок не позже даты (YYYY-MM-DD)"),
+            "has_children": (
+                "boolean",
+                "Есть ли дочерние задачи; false - только вместе с другим фильтром",
+            ),
+        }
+        return [
+            {
+                "name": name,
+                "required": False,
+                "in": "query",
+                "description": description,
+                "schema": {"type": schema_type},
+            }
+            for name, (schema_type, description) in descriptions.items()
+        ]
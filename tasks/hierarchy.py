@@ -0,0 +1,98 @@
+"""
+Обход иерархии задач одним запросом WITH RECURSIVE
+Поддерживается и PostgreSQL, и SQLite. Зацикленные ссылки на родителя
+обход останавливают сразу, а не на пределе глубины:
+- у каждой задачи один родитель, поэтому цикл среди потомков задачи
+  обязательно проходит через нее саму, и обход вниз не возвращается
+  в запрошенную задачу;
+- обход вверх идет через UNION без глубины: повтор строки на цикле
+  отбрасывается, а глубину и конец цепочки считает fetch_ancestors
+"""
+
+from .models import Task
+
+TASK_COLUMNS = "id, name, parent_id, assignee_id, status, deadline"
+
+SUBTREE_SQL = f"""
+WITH RECURSIVE tree ({TASK_COLUMNS}, depth) AS (
+    SELECT {TASK_COLUMNS}, 0 FROM {{table}} WHERE id = %s
+    UNION ALL
+    SELECT t.id, t.name, t.parent_id, t.assignee_id, t.status, t.deadline, tree.depth + 1
+    FROM {{table}} t JOIN tree ON t.parent_id = tree.id
+    WHERE tree.depth < %s AND t.id <> %s
+)
+SELECT {TASK_COLUMNS}, depth FROM tree ORDER BY depth, id
+"""
+
+# Строки цепочки выдаются по мере обхода, LIMIT останавливает его на max_depth
+ANCESTORS_SQL = f"""
+WITH RECURSIVE chain ({TASK_COLUMNS}) AS (
+    SELECT {TASK_COLUMNS} FROM {{table}} WHERE id = %s
+    UNION
+    SELECT t.id, t.name, t.parent_id, t.assignee_id, t.status, t.deadline
+    FROM {{table}} t JOIN chain ON t.id = chain.parent_id
+)
+SELECT {TASK_COLUMNS} FROM chain LIMIT %s
+"""
+
+
+def fetch_subtree(task_id, max_depth):
+    """
+    Задача и все ее потомки до глубины max_depth одним запросом.
+    Возвращает список Task с атрибутом depth, упорядоченный по уровням
+    """
+    sql = SUBTREE_SQL.format(table=Task._meta.db_table)
+    return list(Task.objects.raw(sql, [task_id, max_depth, task_id]))
+
+
+def fetch_ancestors(task_id, max_depth):
+    """
+    Задача и цепочка ее родителей до глубины max_depth одним запросом.
+    depth - расстояние от задачи: 0 - сама задача, 1 - родитель и т. д.
+    """
+    sql = ANCESTORS_SQL.format(table=Task._meta.db_table)
+    by_id = {row.id: row for row in Task.objects.raw(sql, [task_id, max_depth + 1])}
+    chain = []
+    row = by_id.get(task_id)
+    # На цикле цепочка заканчивается перед первой повторной задачей
+    while row is not None and len(chain) <= max_depth:
+        row.depth = len(chain)
+        chain.append(row)
+        row = by_id.pop(row.parent_id, None) if row.parent_id != task_id else None
+    return chain
+
+
+def flatten_tree(rows, link, statuses=None):
+    """
+    Добавляет каждой строке path - список id от запрошенной задачи до строки,
+    и фильтрует строки по статусу. Фильтр не разрывает обход: потомки
+    отфильтрованной задачи остаются в ответе.
+    link - функция, возвращающая id предыдущего узла пути
+    (родителя для поддерева, потомка для цепочки предков)
+
+    При зацикленных ссылках узел попадает в ответ один раз, на минимальной глубине
+    """
+    paths = {}
+    result = []
+    for row in rows:
+        if row.id in paths:
+            continue
+        previous = paths.get(link(row), ())
+        row.path = (*previous, row.id) if row.depth else (row.id,)
+        paths[row.id] = row.path
+        if statuses is None or row.status in statuses:
+            result.append(row)
+    return result
+
+
+def build_subtree(task_id, max_depth, statuses=None):
+    return flatten_tree(
+        fetch_subtree(task_id, max_depth), lambda row: row.parent_id, statuses
+    )
+
+
+def build_ancestors(task_id, max_depth, statuses=None):
+    rows = fetch_ancestors(task_id, max_depth)
+    # Для цепочки предков предыдущий узел пути - строка на уровень ниже
+    child_by_depth = {row.depth: row.id for row in rows}
+    return flatten_tree(rows, lambda row: child_by_depth.get(row.depth - 1), statuses)
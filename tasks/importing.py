@@ -0,0 +1,408 @@
+"""
+Потоковый импорт задач и сотрудников из CSV/NDJSON
+Строки читаются и проверяются порциями, загружаются во временные staging-таблицы
+(в PostgreSQL - через COPY) и затем переносятся в рабочие таблицы несколькими
+запросами над множествами. Память не зависит от размера входного файла
+"""
+
+import csv
+import io
+import json
+from datetime import date
+
+from django.core.management.color import no_style
+from django.db import connection
+from django.utils import timezone
+
+from config.cache import (
+    BUSY_EMPLOYEES,
+    EMPLOYEES,
+    IMPORTANT_TASKS,
+    TASKS,
+    invalidate,
+)
+from employees.models import Employee
+
+from .models import Task, TaskStatus
+from .workload import recount_active_task_counts
+
+TASK_STAGING = "import_task_staging"
+EMPLOYEE_STAGING = "import_employee_staging"
+# id строк, отбракованных очередной проверкой над staging
+REJECTED = "import_rejected"
+TASK_COLUMNS = ("id", "name", "parent_id", "assignee_id", "status", "deadline")
+EMPLOYEE_COLUMNS = ("id", "full_name", "position")
+# Сколько id проблемных строк показывать в сообщении об ошибке
+SAMPLE_SIZE = 10
+
+
+class TaskImportError(Exception):
+    """Данные не прошли проверку, импорт отменен"""
+
+
+def read_rows(stream, file_format):
+    """
+    Лениво читает строки файла, выдавая пары (номер строки, словарь)
+    Строку, которую не удалось разобрать, выдает как (номер, None)
+    """
+    if file_format == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield line_number, row if isinstance(row, dict) else None
+
+
+def _optional_id(value):
+    if value in (None, ""):
+        return None
+    return int(value)
+
+
+def _text(row, key, max_length, errors):
+    value = str(row.get(key) or "").strip()
+    if not value:
+        errors.append(f"{key}: обязательное поле.")
+    elif len(value) > max_length:
+        errors.append(f"{key}: не больше {max_length} символов.")
+    return value
+
+
+def validate_task_row(row, today=None):
+    """
+    Проверяет строку задачи по тем же правилам, что и TaskSerializer,
+    кроме правил, требующих родительскую задачу (они проверяются в staging).
+    today=None отключает проверку "дедлайн не в прошлом" для исторических данных.
+    Возвращает (кортеж для staging, список ошибок)
+    """
+    errors = []
+    name = _text(row, "name", 255, errors)
+    try:
+        task_id = int(row.get("id"))
+        if task_id <= 0:
+            raise ValueError
+    except (TypeError, ValueError):
+        task_id = None
+        errors.append("id: ожидается положительное целое число.")
+    try:
+        parent_id = _optional_id(row.get("parent_id", row.get("parent")))
+        assignee_id = _optional_id(row.get("assignee_id", row.get("assignee")))
+    except (TypeError, ValueError):
+        parent_id = assignee_id = None
+        errors.append("parent_id/assignee_id: ожидается целое число.")
+
+    status = row.get("status") or TaskStatus.TODO
+    if status not in TaskStatus.values:
+        errors.append(f"status: недопустимое значение {status!r}.")
+    elif status == TaskStatus.DONE and assignee_id is None:
+        errors.append("status: Нельзя завершить задачу, у которой нет исполнителя.")
+
+    try:
+        deadline = date.fromisoformat(str(row.get("deadline")))
+    except ValueError:
+        deadline = None
+        errors.append("deadline: ожидается дата в формате YYYY-MM-DD.")
+    else:
+        if today is not None and deadline < today:
+            errors.append("deadline: Дедлайн не может быть в прошлом.")
+
+    if errors:
+        return None, errors
+    return (
+        task_id,
+        name,
+        parent_id,
+        assignee_id,
+        status,
+        deadline.isoformat(),
+    ), errors
+
+
+def validate_employee_row(row):
+    """Проверяет строку сотрудника. Возвращает (кортеж для staging, ошибки)"""
+    errors = []
+    try:
+        employee_id = int(row.get("id"))
+    except (TypeError, ValueError):
+        employee_id = None
+        errors.append("id: ожидается целое число.")
+    full_name = _text(row, "full_name", 255, errors)
+    position = _text(row, "position", 150, errors)
+    if errors:
+        return None, errors
+    return (employee_id, full_name, position), errors
+
+
+class TaskImporter:
+    """
+    Импорт одного набора файлов. Вызывающий код отвечает за транзакцию:
+    при ошибке проверки бросается TaskImportError, и все изменения откатываются
+    """
+
+    def __init__(
+        self,
+        chunk_size=5000,
+        check_past_deadlines=True,
+        skip_invalid=False,
+        on_error=None,
+    ):
+        self.chunk_size = chunk_size
+        self.today = date.today() if check_past_deadlines else None
+        self.skip_invalid = skip_invalid
+        # on_error(источник, номер строки или None, список ошибок) - для вывода ошибок
+        self.on_error = on_error or (lambda source, line_number, errors: None)
+        self.rows_read = 0
+        self.rows_invalid = 0
+
+    # Staging-таблицы
+
+    def create_staging(self, cursor):
+        cursor.execute(
+            f"CREATE TEMPORARY TABLE {TASK_STAGING} ("
+            "id BIGINT NOT NULL, name VARCHAR(255) NOT NULL, parent_id BIGINT NULL, "
+            "assignee_id BIGINT NULL, status VARCHAR(20) NOT NULL, deadline DATE NOT NULL)"
+        )
+        cursor.execute(
+            f"CREATE TEMPORARY TABLE {EMPLOYEE_STAGING} ("
+            "id BIGINT NOT NULL, full_name VARCHAR(255) NOT NULL, "
+            "position VARCHAR(150) NOT NULL)"
+        )
+        cursor.execute(f"CREATE TEMPORARY TABLE {REJECTED} (id BIGINT NOT NULL)")
+
+    def drop_staging(self, cursor):
+        for table in (TASK_STAGING, EMPLOYEE_STAGING, REJECTED):
+            cursor.execute(f"DROP TABLE IF EXISTS {table}")
+
+    def copy_rows(self, cursor, table, columns, rows):
+        """Загружает порцию строк в staging: COPY в PostgreSQL, INSERT в прочих БД"""
+        if not rows:
+            return
+        if connection.vendor != "postgresql":
+            placeholders = ", ".join(["%s"] * len(columns))
+            cursor.executemany(
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})",
+                rows,
+            )
+            return
+        # В CSV для COPY пустое значение без кавычек - это NULL
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        buffer.seek(0)
+        sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+        raw_cursor = cursor.cursor
+        if hasattr(raw_cursor, "copy_expert"):
+            # psycopg2
+            raw_cursor.copy_expert(sql, buffer)
+        else:
+            # psycopg 3
+            with raw_cursor.copy(sql) as copy:
+                copy.write(buffer.getvalue())
+
+    def load(self, cursor, stream, file_format, validate, table, columns, source):
+        """Читает, проверяет и загружает файл в staging порциями"""
+        chunk = []
+        for line_number, row in read_rows(stream, file_format):
+            self.rows_read += 1
+            if row is None:
+                values, errors = None, ["строку не удалось разобрать."]
+            else:
+                values, errors = validate(row)
+            if errors:
+                self.rows_invalid += 1
+                self.on_error(source, line_number, errors)
+                continue
+            chunk.append(values)
+            if len(chunk) >= self.chunk_size:
+                self.copy_rows(cursor, table, columns, chunk)
+                chunk = []
+        self.copy_rows(cursor, table, columns, chunk)
+
+    # Проверки над множествами
+
+    def reject(self, cursor, table, select_sql, message):
+        """
+        Удаляет из staging строки, id которых выбирает select_sql, или прерывает
+        импорт. id собираются во временную таблицу и удаляются подзапросом
+        по ней: число отбракованных строк не ограничено числом параметров запроса
+        """
+        cursor.execute(f"DELETE FROM {REJECTED}")
+        cursor.execute(f"INSERT INTO {REJECTED} (id) {select_sql}")
+        cursor.execute(f"SELECT COUNT(*) FROM {REJECTED}")
+        count = cursor.fetchone()[0]
+        if not count:
+            return False
+        cursor.execute(f"SELECT id FROM {REJECTED} ORDER BY id LIMIT {SAMPLE_SIZE}")
+        sample = ", ".join(str(row[0]) for row in cursor.fetchall())
+        if not self.skip_invalid:
+            raise TaskImportError(f"{message}: {count} (id: {sample})")
+        cursor.execute(f"DELETE FROM {table} WHERE id IN (SELECT id FROM {REJECTED})")
+        self.rows_invalid += cursor.rowcount
+        self.on_error(table, None, [f"{message}, пропущено: {count} (id: {sample})"])
+        return True
+
+    def check_staging(self, cursor):
+        tasks = Task._meta.db_table
+        # Проверки соединяют staging саму с собой по id
+        cursor.execute(f"CREATE INDEX {TASK_STAGING}_id ON {TASK_STAGING} (id)")
+        employees = Employee._meta.db_table
+        for table in (EMPLOYEE_STAGING, TASK_STAGING):
+            self.reject(
+                cursor,
+                table,
+                f"SELECT id FROM {table} GROUP BY id HAVING COUNT(*) > 1",
+                "Повторяющиеся id",
+            )
+        self.reject(
+            cursor,
+            TASK_STAGING,
+            f"SELECT s.id FROM {TASK_STAGING} s "
+            f"LEFT JOIN {EMPLOYEE_STAGING} se ON se.id = s.assignee_id "
+            f"LEFT JOIN {employees} e ON e.id = s.assignee_id "
+            "WHERE s.assignee_id IS NOT NULL AND se.id IS NULL AND e.id IS NULL",
+            "Исполнитель не найден",
+        )
+        # Задача не может быть своим предком: иначе рекурсивный обход
+        # иерархии (hierarchy.py) ходил бы по циклу
+        self.reject(
+            cursor,
+            TASK_STAGING,
+            self.cycles_sql(tasks),
+            "Задача ссылается на себя или на своего потомка",
+        )
+        # Удаление строки может оставить без родителя ее дочерние задачи,
+        # поэтому проверки родителей повторяются, пока что-то удаляется
+        changed = True
+        while changed:
+            changed = self.reject(
+                cursor,
+                TASK_STAGING,
+                f"SELECT s.id FROM {TASK_STAGING} s "
+                f"LEFT JOIN {TASK_STAGING} p ON p.id = s.parent_id "
+                f"LEFT JOIN {tasks} t ON t.id = s.parent_id "
+                "WHERE s.parent_id IS NOT NULL AND p.id IS NULL AND t.id IS NULL",
+                "Родительская задача не найдена",
+            )
+            changed |= self.reject(
+                cursor,
+                TASK_STAGING,
+                f"SELECT s.id FROM {TASK_STAGING} s "
+                f"LEFT JOIN {TASK_STAGING} p ON p.id = s.parent_id "
+                f"LEFT JOIN {tasks} t ON t.id = s.parent_id "
+                "WHERE s.parent_id IS NOT NULL "
+                "AND s.deadline > COALESCE(p.deadline, t.deadline)",
+                "Дедлайн дочерней задачи не может быть позже дедлайна родительской",
+            )
+
+    @staticmethod
+    def cycles_sql(tasks):
+        """
+        id строк staging, которые после переноса окажутся в цикле по parent_id.
+        Обход идет вверх от каждой строки: родитель берется из staging, а для
+        задач, которых в файле нет, - из рабочей таблицы. UNION отбрасывает
+        повторные пары (строка, узел), поэтому обход конечен и на цикле,
+        в который строка ведет, но сама в нем не лежит (такую строку отбракует
+        проверка родителя, если ее родитель будет отбракован)
+        """
+        return (
+            "WITH RECURSIVE walk (start_id, node_id) AS ("
+            f"SELECT id, parent_id FROM {TASK_STAGING} WHERE parent_id IS NOT NULL "
+            "UNION "
+            "SELECT w.start_id, CASE WHEN s.id IS NULL THEN t.parent_id "
+            "ELSE s.parent_id END "
+            f"FROM walk w LEFT JOIN {TASK_STAGING} s ON s.id = w.node_id "
+            f"LEFT JOIN {tasks} t ON s.id IS NULL AND t.id = w.node_id "
+            "WHERE w.node_id <> w.start_id"
+            ") SELECT DISTINCT start_id FROM walk WHERE node_id = start_id"
+        )
+
+    # Перенос в рабочие таблицы
+
+    def merge(self, cursor):
+        """
+        Переносит staging в рабочие таблицы. Ссылки на родителя могут указывать
+        вперед по файлу, поэтому задачи сначала вставляются без родителя,
+        а parent_id проставляется вторым проходом одним UPDATE
+        """
+        tasks = Task._meta.db_table
+        employees = Employee._meta.db_table
+        # Время записи одно на весь импорт: auto_now в обход ORM не срабатывает
+        now = timezone.now()
+        # "WHERE 1 = 1" нужен SQLite, чтобы отличить ON CONFLICT от условия JOIN
+        cursor.execute(
+            f"INSERT INTO {employees} "
+            "(id, full_name, position, active_task_count, created_at, updated_at) "
+            f"SELECT id, full_name, position, 0, %s, %s FROM {EMPLOYEE_STAGING} "
+            "WHERE 1 = 1 ON CONFLICT (id) DO UPDATE SET full_name = excluded.full_name, "
+            "position = excluded.position, updated_at = excluded.updated_at",
+            [now, now],
+        )
+        cursor.execute(
+            f"INSERT INTO {tasks} "
+            "(id, name, parent_id, assignee_id, status, deadline, created_at, updated_at) "
+            "SELECT id, name, NULL, assignee_id, status, deadline, %s, %s "
+            f"FROM {TASK_STAGING} WHERE 1 = 1 ON CONFLICT (id) DO UPDATE SET "
+            "name = excluded.name, assignee_id = excluded.assignee_id, "
+            "status = excluded.status, deadline = excluded.deadline, "
+            "updated_at = excluded.updated_at",
+            [now, now],
+        )
+        cursor.execute(
+            f"UPDATE {tasks} SET parent_id = "
+            f"(SELECT s.parent_id FROM {TASK_STAGING} s WHERE s.id = {tasks}.id) "
+            f"WHERE id IN (SELECT id FROM {TASK_STAGING})"
+        )
+        cursor.execute(f"SELECT COUNT(*) FROM {TASK_STAGING}")
+        loaded_tasks = cursor.fetchone()[0]
+        cursor.execute(f"SELECT COUNT(*) FROM {EMPLOYEE_STAGING}")
+        loaded_employees = cursor.fetchone()[0]
+
+        # id пришли из файла, поэтому последовательности нужно сдвинуть
+        for sql in connection.ops.sequence_reset_sql(no_style(), [Employee, Task]):
+            cursor.execute(sql)
+        return loaded_tasks, loaded_employees
+
+    def run(
+        self, tasks_stream, tasks_format, employees_stream=None, employees_format="csv"
+    ):
+        """Выполняет импорт целиком. Возвращает (задач загружено, сотрудников загружено)"""
+        with connection.cursor() as cursor:
+            # Если импорт упадет, staging-таблицы исчезнут вместе с откатом
+            # транзакции: DDL в PostgreSQL и SQLite транзакционный
+            self.drop_staging(cursor)
+            self.create_staging(cursor)
+            if employees_stream is not None:
+                self.load(
+                    cursor,
+                    employees_stream,
+                    employees_format,
+                    validate_employee_row,
+                    EMPLOYEE_STAGING,
+                    EMPLOYEE_COLUMNS,
+                    "employees",
+                )
+            self.load(
+                cursor,
+                tasks_stream,
+                tasks_format,
+                lambda row: validate_task_row(row, self.today),
+                TASK_STAGING,
+                TASK_COLUMNS,
+                "tasks",
+            )
+            if self.rows_invalid and not self.skip_invalid:
+                raise TaskImportError(f"Некорректных строк: {self.rows_invalid}")
+            self.check_staging(cursor)
+            loaded = self.merge(cursor)
+            self.drop_staging(cursor)
+        # Импорт идет в обход ORM, поэтому счетчики загрузки пересчитываются целиком
+        recount_active_task_counts()
+        # Сигналы моделей при импорте не отправляются - меняю версии данных явно
+        invalidate(TASKS, EMPLOYEES, BUSY_EMPLOYEES, IMPORTANT_TASKS)
+        return loaded
@@ -0,0 +1,99 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from tasks.archiving import archivable_tasks, archive_tasks
+from tasks.benchmark import measure
+from tasks.models import ArchivedTask, Task
+
+# Эндпоинты аналитики, время ответа которых показывается до и после переноса
+MEASURED_ENDPOINTS = (
+    ("busy-employees", "employee-busy-employees", "?page_size=100"),
+    ("important-tasks", "task-important-tasks", ""),
+)
+
+
+class Command(BaseCommand):
+    """
+    Переносит закрытые задачи старше порога в архив (см. tasks/archiving.py)
+    и показывает размер рабочей таблицы до и после переноса
+    """
+
+    help = "Переносит выполненные и отмененные задачи в архив пачками"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than",
+            type=int,
+            default=settings.TASK_ARCHIVE_AFTER_DAYS,
+            help="Задачи, закрытые больше стольких дней назад",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.TASK_ARCHIVE_BATCH_SIZE,
+            help="Задач в одной транзакции",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Только посчитать задачи, готовые к переносу сейчас",
+        )
+        parser.add_argument(
+            "--measure",
+            type=int,
+            default=0,
+            metavar="REPEAT",
+            help="Замерить busy-employees и important-tasks до и после переноса "
+            "(REPEAT вызовов; кэш аналитики при этом очищается)",
+        )
+
+    def table_sizes(self, label):
+        self.stdout.write(
+            f"{label}: задач в рабочей таблице {Task.objects.count()}, "
+            f"в архиве {ArchivedTask.objects.count()}"
+        )
+
+    def measure_endpoints(self, label, repeat):
+        client = APIClient()
+        # Запросы идут через тестовый клиент с хостом testserver
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+            for name, url_name, query in MEASURED_ENDPOINTS:
+                stats = measure(client, reverse(url_name) + query, repeat)
+                self.stdout.write(
+                    f"{label}: {name:<16} p50 {stats['p50_ms']:>9.2f} мс  "
+                    f"p95 {stats['p95_ms']:>9.2f} мс  запросов {stats['queries']}"
+                )
+
+    def handle(self, *args, **options):
+        if options["older_than"] < 0 or options["batch_size"] < 1:
+            raise CommandError(
+                "--older-than не может быть меньше нуля, --batch-size - нуля"
+            )
+        cutoff = timezone.now() - timedelta(days=options["older_than"])
+
+        if options["dry_run"]:
+            # Без учета родителей, которые станут доступны после переноса потомков
+            count = archivable_tasks(cutoff).count()
+            self.stdout.write(f"Готово к переносу задач: {count}")
+            return
+
+        self.table_sizes("До")
+        if options["measure"]:
+            self.measure_endpoints("До", options["measure"])
+
+        moved = archive_tasks(
+            cutoff,
+            options["batch_size"],
+            log=lambda total: self.stdout.write(f"Перенесено задач: {total}"),
+        )
+
+        self.table_sizes("После")
+        if options["measure"]:
+            self.measure_endpoints("После", options["measure"])
+        self.stdout.write(self.style.SUCCESS(f"Всего перенесено в архив: {moved}"))
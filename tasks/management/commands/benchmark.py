@@ -0,0 +1,129 @@
+import json
+import platform
+from datetime import datetime, timezone
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+from tasks.benchmark import DEFAULT_TOLERANCE, compare_results, run_benchmarks
+
+
+def parse_scales(value):
+    """Разбирает "100:1000,1000:10000" в список пар (сотрудники, задачи)"""
+    try:
+        return [
+            tuple(int(number) for number in scale.split(":", 1))
+            for scale in value.split(",")
+        ]
+    except ValueError:
+        raise CommandError("Масштабы задаются как СОТРУДНИКИ:ЗАДАЧИ через запятую")
+
+
+class Command(BaseCommand):
+    """
+    Замеряет время ответа и число SQL-запросов эндпоинтов на нескольких
+    масштабах данных. Работает в отдельной тестовой базе, рабочие данные
+    не затрагиваются. Результат пишется в JSON и может сравниваться
+    с базовой линией: при регрессии команда завершается с ошибкой
+    """
+
+    help = "Замеры производительности эндпоинтов на сгенерированных данных"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scales",
+            default="50:1000,500:10000",
+            help="Масштабы СОТРУДНИКИ:ЗАДАЧИ через запятую",
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=20, help="Вызовов каждого эндпоинта"
+        )
+        parser.add_argument("--depth", type=int, default=3)
+        parser.add_argument("--fanout", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--output", default="benchmark.json", help="Файл для результатов"
+        )
+        parser.add_argument("--baseline", help="Файл результатов для сравнения")
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=DEFAULT_TOLERANCE,
+            help="Допустимый рост медианы (0.2 = 20%%)",
+        )
+
+    def log(self, scale, endpoint, stats):
+        if "values_rows_per_sec" in stats:
+            self.stdout.write(
+                f"{scale:>14} {endpoint:<22} строк {stats['rows']:>7}  "
+                f"ModelSerializer {stats['serializer_rows_per_sec']:>10.1f}/с  "
+                f"values() {stats['values_rows_per_sec']:>10.1f}/с"
+            )
+            return
+        if "search_p50_ms" in stats:
+            self.stdout.write(
+                f"{scale:>14} {endpoint:<22} найдено {stats['rows']:>7}  "
+                f"search {stats['search_p50_ms']:>9.2f} мс  "
+                f"icontains {stats['icontains_p50_ms']:>9.2f} мс"
+            )
+            return
+        self.stdout.write(
+            f"{scale:>14} {endpoint:<22} p50 {stats['p50_ms']:>9.2f} мс  "
+            f"p95 {stats['p95_ms']:>9.2f} мс  запросов {stats['queries']}"
+        )
+
+    def handle(self, *args, **options):
+        scales = parse_scales(options["scales"])
+        baseline = None
+        if options["baseline"]:
+            with open(options["baseline"], encoding="utf-8") as file:
+                baseline = json.load(file)["results"]
+
+        setup_test_environment()
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            # Инструментирование SQL добавило бы к замерам случайный шум
+            with override_settings(SQL_INSTRUMENTATION_SAMPLE_RATE=0):
+                results = run_benchmarks(
+                    scales,
+                    options["repeat"],
+                    {
+                        "depth": options["depth"],
+                        "fanout": options["fanout"],
+                        "seed": options["seed"],
+                    },
+                    log=self.log,
+                )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        report = {
+            "meta": {
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "database": connection.vendor,
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "repeat": options["repeat"],
+                "seed": options["seed"],
+            },
+            "results": results,
+        }
+        with open(options["output"], "w", encoding="utf-8") as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+        self.stdout.write(f"Результаты записаны в {options['output']}")
+
+        if baseline is not None:
+            regressions = compare_results(results, baseline, options["tolerance"])
+            if regressions:
+                raise CommandError(
+                    "Регрессии производительности:\n" + "\n".join(regressions)
+                )
+            self.stdout.write(self.style.SUCCESS("Регрессий не найдено"))
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.query_plans import check_query_plans
+
+
+class Command(BaseCommand):
+    """
+    Выполняет EXPLAIN для аналитических запросов и завершается с ошибкой,
+    если какой-то из них делает полный проход по таблице задач
+    """
+
+    help = "Проверяет через EXPLAIN, что аналитические запросы используют индексы"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force-index",
+            action="store_true",
+            help="PostgreSQL: запретить Seq Scan, чтобы проверить наличие индекса "
+            "даже на маленьких данных",
+        )
+        parser.add_argument(
+            "--show-plans", action="store_true", help="Вывести планы целиком"
+        )
+
+    def handle(self, *args, **options):
+        failed = []
+        for name, plan, scans in check_query_plans(options["force_index"]):
+            if scans:
+                failed.append(name)
+                self.stdout.write(
+                    self.style.ERROR(f"{name}: полный проход по {', '.join(scans)}")
+                )
+            else:
+                self.stdout.write(f"{name}: OK")
+            if options["show_plans"] or scans:
+                self.stdout.write(plan)
+
+        if failed:
+            raise CommandError(f"Запросов с полным проходом по таблице: {len(failed)}")
+        self.stdout.write(self.style.SUCCESS("Все запросы используют индексы"))
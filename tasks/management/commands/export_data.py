@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from tasks.exporting import EXPORT_FORMATS, stream_export
+
+
+class Command(BaseCommand):
+    """
+    Потоковая выгрузка задач или сотрудников в CSV/NDJSON
+    Память не зависит от размера таблицы: строки читаются серверным курсором
+    """
+
+    help = "Выгружает задачи или сотрудников в CSV или NDJSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument("resource", choices=("tasks", "employees"))
+        parser.add_argument("--format", choices=EXPORT_FORMATS, default="csv")
+        parser.add_argument(
+            "--with-names",
+            action="store_true",
+            help="Добавить ФИО исполнителя и название родительской задачи",
+        )
+        parser.add_argument("--output", help="Файл для выгрузки (по умолчанию stdout)")
+
+    def handle(self, *args, **options):
+        chunks = stream_export(
+            options["resource"], options["format"], options["with_names"]
+        )
+        if options["output"]:
+            with open(options["output"], "wb") as output:
+                for chunk in chunks:
+                    output.write(chunk)
+            return
+        for chunk in chunks:
+            self.stdout.write(chunk.decode(), ending="")
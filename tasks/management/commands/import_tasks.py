@@ -0,0 +1,101 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from tasks.importing import TaskImporter, TaskImportError
+
+FORMATS = ("csv", "ndjson")
+
+
+def detect_format(path, explicit):
+    """Формат из параметра --format или из расширения файла (по умолчанию CSV)"""
+    if explicit:
+        return explicit
+    if path.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    return "csv"
+
+
+def open_input(path):
+    if path == "-":
+        return sys.stdin
+    return open(path, encoding="utf-8", newline="")
+
+
+class Command(BaseCommand):
+    """
+    Потоковый импорт задач (и, опционально, сотрудников) из CSV или NDJSON
+    Колонки задач: id, name, parent_id, assignee_id, status, deadline.
+    Колонки сотрудников: id, full_name, position.
+    id сохраняются, поэтому parent_id может ссылаться на задачи ниже по файлу
+    """
+
+    help = "Импортирует задачи и сотрудников из CSV/NDJSON через staging-таблицы"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Файл с задачами или '-' для stdin")
+        parser.add_argument("--format", choices=FORMATS, help="Формат файла задач")
+        parser.add_argument("--employees", help="Файл с сотрудниками")
+        parser.add_argument(
+            "--employees-format", choices=FORMATS, help="Формат файла сотрудников"
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=5000, help="Размер порции строк"
+        )
+        parser.add_argument(
+            "--allow-past-deadlines",
+            action="store_true",
+            help="Не проверять, что дедлайн не в прошлом (исторические данные)",
+        )
+        parser.add_argument(
+            "--skip-invalid",
+            action="store_true",
+            help="Пропускать некорректные строки вместо отмены всего импорта",
+        )
+
+    def report_error(self, source, line_number, errors):
+        location = f"{source}:{line_number}" if line_number else source
+        self.stderr.write(f"{location}: {' '.join(errors)}")
+
+    def handle(self, *args, **options):
+        importer = TaskImporter(
+            chunk_size=options["chunk_size"],
+            check_past_deadlines=not options["allow_past_deadlines"],
+            skip_invalid=options["skip_invalid"],
+            on_error=self.report_error,
+        )
+        tasks_stream = open_input(options["path"])
+        employees_stream = None
+        if options["employees"]:
+            employees_stream = open_input(options["employees"])
+
+        started = time.monotonic()
+        try:
+            with transaction.atomic():
+                loaded_tasks, loaded_employees = importer.run(
+                    tasks_stream,
+                    detect_format(options["path"], options["format"]),
+                    employees_stream,
+                    detect_format(
+                        options["employees"] or "", options["employees_format"]
+                    ),
+                )
+        except TaskImportError as error:
+            raise CommandError(f"Импорт отменен. {error}")
+        finally:
+            for stream in (tasks_stream, employees_stream):
+                if stream not in (None, sys.stdin):
+                    stream.close()
+
+        elapsed = time.monotonic() - started
+        rate = importer.rows_read / elapsed if elapsed else importer.rows_read
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Загружено задач: {loaded_tasks}, сотрудников: {loaded_employees}, "
+                f"пропущено строк: {importer.rows_invalid}. "
+                f"Прочитано {importer.rows_read} строк за {elapsed:.2f} с "
+                f"({rate:.0f} строк/с)"
+            )
+        )
@@ -0,0 +1,57 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.benchmark import run_load_tests
+
+
+class Command(BaseCommand):
+    """
+    Нагрузочный тест запущенных серверов: синхронные эндпоинты под WSGI
+    и их async-версии под ASGI при одинаковом числе одновременных запросов.
+    Серверы запускаются отдельно на одной и той же базе (см. README)
+    """
+
+    help = "Сравнение пропускной способности эндпоинтов под WSGI и ASGI"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--wsgi", help="Базовый URL WSGI-сервера")
+        parser.add_argument("--asgi", help="Базовый URL ASGI-сервера")
+        parser.add_argument(
+            "--concurrency", type=int, default=50, help="Одновременных запросов"
+        )
+        parser.add_argument(
+            "--requests", type=int, default=500, help="Запросов к каждому эндпоинту"
+        )
+        parser.add_argument("--output", help="Файл для результатов в JSON")
+
+    def log(self, server, endpoint, stats):
+        line = f"{server:>5} {endpoint:<16} {stats['rps']:>8.1f} rps"
+        if "p50_ms" in stats:
+            line += f"  p50 {stats['p50_ms']:>9.2f} мс  p95 {stats['p95_ms']:>9.2f} мс"
+        if stats["errors"]:
+            line += f"  ошибок {stats['errors']}"
+        self.stdout.write(line)
+
+    def handle(self, *args, **options):
+        servers = {name: options[name] for name in ("wsgi", "asgi") if options[name]}
+        if not servers:
+            raise CommandError("Укажите хотя бы один из параметров --wsgi и --asgi")
+        if options["concurrency"] < 1 or options["requests"] < 1:
+            raise CommandError("--concurrency и --requests должны быть больше нуля")
+
+        results = run_load_tests(
+            servers, options["concurrency"], options["requests"], log=self.log
+        )
+        if options["output"]:
+            report = {
+                "meta": {
+                    "concurrency": options["concurrency"],
+                    "requests": options["requests"],
+                    "servers": servers,
+                },
+                "results": results,
+            }
+            with open(options["output"], "w", encoding="utf-8") as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+            self.stdout.write(f"Результаты записаны в {options['output']}")
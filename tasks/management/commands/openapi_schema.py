@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from config.schema import generate_schema
+
+
+class Command(BaseCommand):
+    """
+    Генерирует схему OpenAPI в файл, который отдает /api/schema/
+    (config/schema.py). С --check только сверяет файл с кодом:
+    расхождение означает, что после изменения API схему не пересобрали
+    """
+
+    help = "Генерирует схему OpenAPI в OPENAPI_SCHEMA_FILE или проверяет ее"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--file",
+            default=settings.OPENAPI_SCHEMA_FILE,
+            help="Файл схемы (по умолчанию OPENAPI_SCHEMA_FILE)",
+        )
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Завершиться с ошибкой, если файл не совпадает со схемой по коду",
+        )
+
+    def handle(self, *args, **options):
+        schema = generate_schema()
+        path = options["file"]
+        if options["check"]:
+            try:
+                with open(path, "rb") as file:
+                    stored = file.read()
+            except FileNotFoundError:
+                raise CommandError(f"Файл схемы {path} не найден")
+            if stored != schema:
+                raise CommandError(
+                    f"Схема в {path} расходится с кодом, "
+                    "пересоберите ее: python manage.py openapi_schema"
+                )
+            self.stdout.write(self.style.SUCCESS(f"Схема в {path} актуальна"))
+            return
+        with open(path, "wb") as file:
+            file.write(schema)
+        self.stdout.write(self.style.SUCCESS(f"Схема записана в {path}"))
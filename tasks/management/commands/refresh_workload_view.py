@@ -0,0 +1,63 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from tasks.workload_view import is_stale, refresh_view, view_exists
+
+
+class Command(BaseCommand):
+    """
+    Обновляет материализованное представление нагрузки сотрудников
+    (tasks/workload_view.py). Чтение представление не обновляет, поэтому
+    команду запускают по расписанию или постоянно с --interval
+    """
+
+    help = "Обновляет материализованное представление tasks_workload"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--if-stale",
+            action="store_true",
+            help="Обновлять, только если после прошлого обновления были записи",
+        )
+        parser.add_argument(
+            "--interval",
+            type=int,
+            nargs="?",
+            const=settings.WORKLOAD_VIEW_MAX_STALENESS,
+            help="Не завершаться, а проверять представление каждые INTERVAL "
+            "секунд (по умолчанию WORKLOAD_VIEW_MAX_STALENESS) и обновлять "
+            "устаревшее",
+        )
+        parser.add_argument(
+            "--blocking",
+            action="store_true",
+            help="REFRESH без CONCURRENTLY: быстрее, но блокирует чтение",
+        )
+
+    def handle(self, *args, **options):
+        if not view_exists():
+            raise CommandError(
+                "Представление tasks_workload есть только в PostgreSQL "
+                "после миграции tasks 0005, иначе нагрузка считается по задачам"
+            )
+        interval = options["interval"]
+        if interval is None:
+            self.refresh(options["if_stale"], options["blocking"])
+            return
+        if interval <= 0:
+            raise CommandError("--interval должен быть больше нуля")
+        while True:
+            self.refresh(True, options["blocking"])
+            # Долго живущий процесс: соединение не должно устареть между проверками
+            close_old_connections()
+            time.sleep(interval)
+
+    def refresh(self, if_stale, blocking):
+        if if_stale and not is_stale():
+            self.stdout.write("Представление актуально, обновление не требуется")
+            return
+        refresh_view(concurrently=not blocking)
+        self.stdout.write(self.style.SUCCESS("Представление tasks_workload обновлено"))
@@ -0,0 +1,82 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from tasks.seeding import SEED_EPOCH, clear_data, parse_status_mix, seed_data
+
+
+class Command(BaseCommand):
+    """
+    Заполняет базу воспроизводимым набором сотрудников и задач
+    Одинаковые параметры и --seed всегда дают одинаковые данные
+    """
+
+    help = "Генерирует сотрудников и иерархию задач через bulk_create"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--employees", type=int, default=1000)
+        parser.add_argument("--tasks", type=int, default=10000)
+        parser.add_argument(
+            "--depth", type=int, default=3, help="Максимальное число уровней иерархии"
+        )
+        parser.add_argument(
+            "--fanout",
+            type=int,
+            default=5,
+            help="Максимум дочерних задач у одной задачи (0 - без иерархии)",
+        )
+        parser.add_argument(
+            "--status-mix",
+            default="todo=40,in_progress=30,done=20,canceled=10",
+            help="Веса статусов задач",
+        )
+        parser.add_argument(
+            "--unassigned",
+            type=float,
+            default=0.1,
+            help="Доля задач без исполнителя",
+        )
+        parser.add_argument("--seed", type=int, default=0, help="Зерно генератора")
+        parser.add_argument(
+            "--epoch",
+            type=date.fromisoformat,
+            default=SEED_EPOCH,
+            help="Дата ГГГГ-ММ-ДД, от которой отсчитываются сроки задач "
+            f"(по умолчанию {SEED_EPOCH})",
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Удалить всех сотрудников и задачи перед генерацией",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            status_mix = parse_status_mix(options["status_mix"])
+        except ValueError as error:
+            raise CommandError(str(error))
+
+        started = time.monotonic()
+        with transaction.atomic():
+            if options["clear"]:
+                clear_data()
+            employees, tasks = seed_data(
+                options["employees"],
+                options["tasks"],
+                depth=options["depth"],
+                fanout=options["fanout"],
+                status_mix=status_mix,
+                unassigned=options["unassigned"],
+                seed=options["seed"],
+                batch_size=options["batch_size"],
+                epoch=options["epoch"],
+            )
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Создано сотрудников: {employees}, задач: {tasks} за {elapsed:.2f} с"
+            )
+        )
@@ -0,0 +1,75 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("employees", "0002_active_task_count"),
+        ("tasks", "0001_initial"),
+    ]
+
+    # Сначала создаю составные индексы, и только потом удаляю одиночные
+    # индексы FK, чтобы запросы ни в какой момент не остались без индекса
+    operations = [
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                fields=["parent", "status"], name="task_parent_status_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                fields=["assignee", "status"], name="task_assignee_status_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                condition=models.Q(("status", "in_progress")),
+                fields=["parent"],
+                name="task_active_parent_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                condition=models.Q(("status", "in_progress")),
+                fields=["assignee"],
+                name="task_active_assignee_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(fields=["status", "id"], name="task_status_idx"),
+        ),
+        migrations.AlterField(
+            model_name="task",
+            name="assignee",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="tasks",
+                to="employees.employee",
+                verbose_name="Исполнитель",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="task",
+            name="parent",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="children",
+                to="tasks.task",
+                verbose_name="Родительская задача",
+            ),
+        ),
+    ]
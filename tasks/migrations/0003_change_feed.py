@@ -0,0 +1,98 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+import tasks.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("employees", "0003_timestamps"),
+        ("tasks", "0002_workload_indexes"),
+    ]
+
+    # Существующим строкам проставляется время применения миграции
+    operations = [
+        migrations.AddField(
+            model_name="task",
+            name="created_at",
+            field=models.DateTimeField(
+                auto_now_add=True,
+                db_index=True,
+                default=django.utils.timezone.now,
+                verbose_name="Создана",
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="task",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True,
+                default=django.utils.timezone.now,
+                verbose_name="Изменена",
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(fields=["updated_at", "id"], name="task_updated_idx"),
+        ),
+        # Меняется только поведение Django при удалении, схема БД та же
+        migrations.AlterField(
+            model_name="task",
+            name="assignee",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=tasks.models.set_null_and_touch,
+                related_name="tasks",
+                to="employees.employee",
+                verbose_name="Исполнитель",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="task",
+            name="parent",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=tasks.models.set_null_and_touch,
+                related_name="children",
+                to="tasks.task",
+                verbose_name="Родительская задача",
+            ),
+        ),
+        migrations.CreateModel(
+            name="TaskTombstone",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("task_id", models.BigIntegerField(verbose_name="ID задачи")),
+                (
+                    "deleted_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now, verbose_name="Удалена"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Удаленная задача",
+                "verbose_name_plural": "Удаленные задачи",
+                "indexes": [
+                    models.Index(fields=["deleted_at", "id"], name="task_tombstone_idx")
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tasks", "0003_change_feed"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(fields=["deadline", "id"], name="task_deadline_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                fields=["status", "deadline", "id"], name="task_status_deadline_idx"
+            ),
+        ),
+    ]
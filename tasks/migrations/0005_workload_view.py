@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:10
+
+from django.db import migrations
+
+CREATE_VIEW_SQL = """
+CREATE MATERIALIZED VIEW tasks_workload AS
+SELECT assignee_id, status, COUNT(*) AS task_count
+FROM tasks_task
+WHERE assignee_id IS NOT NULL
+GROUP BY assignee_id, status
+"""
+# REFRESH ... CONCURRENTLY требует уникального индекса по представлению
+CREATE_INDEX_SQL = (
+    "CREATE UNIQUE INDEX tasks_workload_key ON tasks_workload (assignee_id, status)"
+)
+
+
+def create_workload_view(apps, schema_editor):
+    """Материализованное представление есть только в PostgreSQL"""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(CREATE_VIEW_SQL)
+    schema_editor.execute(CREATE_INDEX_SQL)
+
+
+def drop_workload_view(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP MATERIALIZED VIEW IF EXISTS tasks_workload")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tasks", "0004_task_filter_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_workload_view, drop_workload_view),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:40
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("employees", "0003_timestamps"),
+        ("tasks", "0005_workload_view"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedTask",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                (
+                    "name",
+                    models.CharField(
+                        max_length=255, verbose_name="Наименование задачи"
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("todo", "К выполнению"),
+                            ("in_progress", "В работе"),
+                            ("done", "Выполнено"),
+                            ("canceled", "Отменено"),
+                        ],
+                        max_length=20,
+                        verbose_name="Статус",
+                    ),
+                ),
+                ("deadline", models.DateField(verbose_name="Срок выполнения")),
+                ("created_at", models.DateTimeField(verbose_name="Создана")),
+                ("updated_at", models.DateTimeField(verbose_name="Изменена")),
+                (
+                    "archived_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now,
+                        verbose_name="Перенесена в архив",
+                    ),
+                ),
+                (
+                    "assignee",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="archived_tasks",
+                        to="employees.employee",
+                        verbose_name="Исполнитель",
+                    ),
+                ),
+                (
+                    "parent",
+                    models.ForeignKey(
+                        blank=True,
+                        db_constraint=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="children",
+                        to="tasks.archivedtask",
+                        verbose_name="Родительская задача",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Архивная задача",
+                "verbose_name_plural": "Архивные задачи",
+                "indexes": [
+                    models.Index(
+                        fields=["status", "id"], name="archived_task_status_idx"
+                    ),
+                    models.Index(
+                        fields=["deadline", "id"], name="archived_task_deadline_idx"
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:40
+
+from django.db import migrations
+
+# Индекс по тому же выражению, что строят icontains (UPPER(...) LIKE) и поиск
+# (config/search.py), поэтому он обслуживает и подстроку, и операцию <%
+CREATE_INDEX_SQL = (
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS task_name_trgm_idx "
+    "ON tasks_task USING gin (UPPER(name) gin_trgm_ops)"
+)
+
+
+def create_trigram_index(apps, schema_editor):
+    """pg_trgm есть только в PostgreSQL"""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(CREATE_INDEX_SQL)
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX CONCURRENTLY IF EXISTS task_name_trgm_idx")
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY не выполняется внутри транзакции,
+    # зато не блокирует запись в таблицу на время построения индекса
+    atomic = False
+
+    dependencies = [
+        ("tasks", "0006_archived_task"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
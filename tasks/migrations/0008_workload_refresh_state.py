@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:20
+
+from django.db import migrations
+
+# Время обновления материализованного представления tasks_workload хранится
+# в базе: его видят все процессы сервера и команда обновления
+CREATE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS tasks_workload_refresh (
+    id smallint PRIMARY KEY CHECK (id = 1),
+    refreshed_at timestamp with time zone NOT NULL
+)
+"""
+
+
+def create_refresh_table(apps, schema_editor):
+    """Материализованное представление есть только в PostgreSQL"""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    # Строку добавит первое обновление: пока ее нет, представление
+    # считается устаревшим, и refresh_workload_view --if-stale его обновит
+    schema_editor.execute(CREATE_TABLE_SQL)
+
+
+def drop_refresh_table(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS tasks_workload_refresh")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tasks", "0007_task_name_trigram"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_refresh_table, drop_refresh_table),
+    ]
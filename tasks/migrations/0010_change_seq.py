@@ -0,0 +1,106 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:42
+
+from django.db import migrations, models
+
+# Номер изменения ставится в БД, потому что должен следовать порядку
+# фиксации транзакций, а не времени записи (см. tasks/changes.py):
+# - PostgreSQL: id транзакции записи. Все транзакции с id меньше
+#   pg_snapshot_xmin уже завершены, поэтому лента отдает только их строки;
+# - SQLite: счетчик в отдельной таблице. Пишущие транзакции SQLite идут
+#   по одной, поэтому номера растут в порядке фиксации
+POSTGRESQL_SQL = (
+    """
+    CREATE OR REPLACE FUNCTION tasks_stamp_change_seq() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        NEW.change_seq := pg_current_xact_id()::text::bigint;
+        RETURN NEW;
+    END
+    $$
+    """,
+    "CREATE TRIGGER task_change_seq BEFORE INSERT OR UPDATE ON tasks_task "
+    "FOR EACH ROW EXECUTE FUNCTION tasks_stamp_change_seq()",
+    "CREATE TRIGGER task_tombstone_change_seq BEFORE INSERT ON tasks_tasktombstone "
+    "FOR EACH ROW EXECUTE FUNCTION tasks_stamp_change_seq()",
+)
+POSTGRESQL_DROP_SQL = (
+    "DROP TRIGGER IF EXISTS task_change_seq ON tasks_task",
+    "DROP TRIGGER IF EXISTS task_tombstone_change_seq ON tasks_tasktombstone",
+    "DROP FUNCTION IF EXISTS tasks_stamp_change_seq()",
+)
+
+# Триггер SQLite меняет строку после записи; рекурсивные триггеры
+# в SQLite по умолчанию выключены, поэтому этот UPDATE их не вызывает
+SQLITE_STAMP = """
+    BEGIN
+        UPDATE tasks_change_seq SET value = value + 1;
+        UPDATE {table} SET change_seq = (SELECT value FROM tasks_change_seq)
+        WHERE id = NEW.id;
+    END
+"""
+SQLITE_SQL = (
+    "CREATE TABLE tasks_change_seq (value integer NOT NULL)",
+    "INSERT INTO tasks_change_seq (value) VALUES (0)",
+    "CREATE TRIGGER task_change_seq_insert AFTER INSERT ON tasks_task"
+    + SQLITE_STAMP.format(table="tasks_task"),
+    "CREATE TRIGGER task_change_seq_update AFTER UPDATE ON tasks_task"
+    + SQLITE_STAMP.format(table="tasks_task"),
+    "CREATE TRIGGER task_tombstone_change_seq AFTER INSERT ON tasks_tasktombstone"
+    + SQLITE_STAMP.format(table="tasks_tasktombstone"),
+)
+SQLITE_DROP_SQL = (
+    "DROP TRIGGER IF EXISTS task_change_seq_insert",
+    "DROP TRIGGER IF EXISTS task_change_seq_update",
+    "DROP TRIGGER IF EXISTS task_tombstone_change_seq",
+    "DROP TABLE IF EXISTS tasks_change_seq",
+)
+
+
+def create_triggers(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    statements = {"postgresql": POSTGRESQL_SQL, "sqlite": SQLITE_SQL}
+    for sql in statements.get(vendor, ()):
+        schema_editor.execute(sql)
+
+
+def drop_triggers(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    statements = {"postgresql": POSTGRESQL_DROP_SQL, "sqlite": SQLITE_DROP_SQL}
+    for sql in statements.get(vendor, ()):
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tasks", "0009_task_name_prefix_index"),
+    ]
+
+    # Существующим строкам достается номер 0: в ленте они идут первыми
+    operations = [
+        migrations.AddField(
+            model_name="task",
+            name="change_seq",
+            field=models.BigIntegerField(
+                db_default=0, default=0, editable=False, verbose_name="Номер изменения"
+            ),
+        ),
+        migrations.AddField(
+            model_name="tasktombstone",
+            name="change_seq",
+            field=models.BigIntegerField(
+                db_default=0, default=0, editable=False, verbose_name="Номер изменения"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(fields=["change_seq", "id"], name="task_change_seq_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="tasktombstone",
+            index=models.Index(
+                fields=["change_seq", "id"], name="task_tombstone_change_seq_idx"
+            ),
+        ),
+        migrations.RunPython(create_triggers, drop_triggers),
+    ]
@@ -1,7 +1,28 @@
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 
 from employees.models import Employee
 
+# Поля задачи, от которых зависит счетчик активных задач сотрудника
+WORKLOAD_FIELDS = {"status", "assignee", "assignee_id"}
+
+
+def set_null_and_touch(collector, field, sub_objs, using):
+    """
+    Как SET_NULL, но вместе со ссылкой обновляет и updated_at задач:
+    обнуление родителя или исполнителя - тоже изменение для ленты изменений
+    """
+    # Обновления выполняются в порядке добавления. updated_at - первым,
+    # пока связанные задачи еще находятся по ссылке на удаляемый объект
+    collector.add_field_update(
+        field.model._meta.get_field("updated_at"), timezone.now(), sub_objs
+    )
+    models.SET_NULL(collector, field, sub_objs, using)
+
+
+# Связанные задачи обновляются одним UPDATE, без загрузки в память
+set_null_and_touch.lazy_sub_objs = True
+
 
 class TaskStatus(models.TextChoices):
     """
@@ -16,6 +37,131 @@ class TaskStatus(models.TextChoices):
     CANCELED = "canceled", "Отменено"
 
 
+class TaskQuerySet(models.QuerySet):
+    """
+    QuerySet задач, который поддерживает Employee.active_task_count
+    и в массовых операциях, где save() и сигналы моделей не вызываются
+    """
+
+    def update(self, **kwargs):
+        # Импорт внутри метода во избежание циклического импорта
+        from .signals import tasks_bulk_changed
+        from .workload import recount_active_task_counts
+
+        # auto_now срабатывает только в save(), в UPDATE время ставлю сам
+        kwargs.setdefault("updated_at", timezone.now())
+
+        if not WORKLOAD_FIELDS & kwargs.keys():
+            rows = super().update(**kwargs)
+            # Массовые операции не вызывают post_save, о них сообщает отдельный сигнал
+            tasks_bulk_changed.send(sender=self.model)
+            return rows
+
+        with transaction.atomic(using=self.db):
+            # Затронуты прежние исполнители строк и, возможно, новый исполнитель
+            affected = set(
+                self.filter(assignee__isnull=False)
+                .order_by()
+                .values_list("assignee_id", flat=True)
+                .distinct()
+            )
+            new_assignee = kwargs.get("assignee", kwargs.get("assignee_id"))
+            if isinstance(new_assignee, Employee):
+                affected.add(new_assignee.pk)
+            elif isinstance(new_assignee, int):
+                affected.add(new_assignee)
+            elif new_assignee is not None:
+                # Выражение (F, Case...) - новых исполнителей заранее не узнать
+                affected = None
+            rows = super().update(**kwargs)
+            recount_active_task_counts(affected)
+            tasks_bulk_changed.send(sender=self.model)
+        return rows
+
+    update.alters_data = True
+
+    def bulk_create(self, objs, *args, **kwargs):
+        from .signals import tasks_bulk_changed
+        from .workload import (
+            active_assignee_id,
+            collect_deltas,
+            recount_active_task_counts,
+            shift_active_task_counts,
+        )
+
+        with transaction.atomic(using=self.db):
+            objs = super().bulk_create(objs, *args, **kwargs)
+            if kwargs.get("update_conflicts"):
+                # При upsert прежнее состояние перезаписанных строк неизвестно
+                recount_active_task_counts()
+            elif kwargs.get("ignore_conflicts"):
+                # Неизвестно, какие строки пропущены из-за конфликта: счетчики
+                # сотрудников из пачки пересчитываются по фактическим задачам
+                recount_active_task_counts({obj.assignee_id for obj in objs})
+            else:
+                shift_active_task_counts(
+                    collect_deltas(
+                        (None, active_assignee_id(obj.assignee_id, obj.status))
+                        for obj in objs
+                    )
+                )
+            tasks_bulk_changed.send(sender=self.model)
+        return objs
+
+    bulk_create.alters_data = True
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        from .signals import tasks_bulk_changed
+        from .workload import recount_active_task_counts
+
+        objs = list(objs)
+        fields = set(fields)
+        if "updated_at" not in fields:
+            now = timezone.now()
+            for obj in objs:
+                obj.updated_at = now
+            fields.add("updated_at")
+        if not WORKLOAD_FIELDS & fields:
+            rows = super().bulk_update(objs, fields, *args, **kwargs)
+            tasks_bulk_changed.send(sender=self.model)
+            return rows
+
+        with transaction.atomic(using=self.db):
+            affected = set(
+                self.filter(pk__in=[obj.pk for obj in objs], assignee__isnull=False)
+                .values_list("assignee_id", flat=True)
+                .distinct()
+            )
+            affected.update(obj.assignee_id for obj in objs)
+            rows = super().bulk_update(objs, fields, *args, **kwargs)
+            recount_active_task_counts(affected)
+            tasks_bulk_changed.send(sender=self.model)
+        return rows
+
+    bulk_update.alters_data = True
+
+    def delete(self):
+        from .workload import shift_active_task_counts
+
+        with transaction.atomic(using=self.db):
+            deltas = {
+                assignee_id: -count
+                for assignee_id, count in self.filter(
+                    status=TaskStatus.IN_PROGRESS, assignee__isnull=False
+                )
+                .order_by()
+                .values("assignee_id")
+                .annotate(count=models.Count("pk"))
+                .values_list("assignee_id", "count")
+            }
+            result = super().delete()
+            shift_active_task_counts(deltas)
+        return result
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+
 class Task(models.Model):
     """
     Модель, представляющая задачу в трекере
@@ -27,7 +173,7 @@ class Task(models.Model):
     parent = models.ForeignKey(
         "self",
         # Если родительскую задачу удалят, это поле станет NULL
-        on_delete=models.SET_NULL,
+        on_delete=set_null_and_touch,
         # Поле может быть пустым в базе данных
         null=True,
         # Поле не является обязательным для заполнения в формах
@@ -35,17 +181,21 @@ class Task(models.Model):
         # Ключевое поле! Позволяет обращаться к дочерним задачам (task.children.all())
         related_name="children",
         verbose_name="Родительская задача",
+        # Отдельный индекс не нужен: parent_id - первая колонка составного индекса
+        db_index=False,
     )
     # Связь с исполнителем задачи
     assignee = models.ForeignKey(
         Employee,
         # Если сотрудника удалят, задача останется, но без исполнителя
-        on_delete=models.SET_NULL,
+        on_delete=set_null_and_touch,
         null=True,
         blank=True,
         # Ключевое поле! Позволяет обращаться к задачам сотрудника (employee.tasks.all())
         related_name="tasks",
         verbose_name="Исполнитель",
+        # Отдельный индекс не нужен: assignee_id - первая колонка составного индекса
+        db_index=False,
     )
     status = models.CharField(
         max_length=20,
@@ -55,6 +205,18 @@ class Task(models.Model):
         verbose_name="Статус",
     )
     deadline = models.DateField(verbose_name="Срок выполнения")
+    created_at = models.DateTimeField(
+        auto_now_add=True, db_index=True, verbose_name="Создана"
+    )
+    # Меняется при любой записи, включая массовые операции (см. TaskQuerySet)
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Изменена")
+    # Номер изменения для ленты изменений (changes.py). Ставит триггер БД
+    # при любой вставке и изменении строки, значение из Django не пишется
+    change_seq = models.BigIntegerField(
+        default=0, db_default=0, editable=False, verbose_name="Номер изменения"
+    )
+
+    objects = TaskQuerySet.as_manager()
 
     def __str__(self):
         """
@@ -65,3 +227,169 @@ class Task(models.Model):
     class Meta:
         verbose_name = "Задача"
         verbose_name_plural = "Задачи"
+        # Индексы подобраны под горячие запросы: аналитика всегда фильтрует
+        # по статусу вместе с родителем или исполнителем
+        indexes = [
+            # Дочерние задачи в заданном статусе (task.children, "важные задачи")
+            models.Index(fields=["parent", "status"], name="task_parent_status_idx"),
+            # Задачи сотрудника в заданном статусе (prefetch, пересчет загрузки)
+            models.Index(
+                fields=["assignee", "status"], name="task_assignee_status_idx"
+            ),
+            # Частичные индексы только по строкам "В работе" - их немного,
+            # поэтому индексы маленькие и целиком лежат в памяти
+            models.Index(
+                fields=["parent"],
+                condition=models.Q(status=TaskStatus.IN_PROGRESS),
+                name="task_active_parent_idx",
+            ),
+            models.Index(
+                fields=["assignee"],
+                condition=models.Q(status=TaskStatus.IN_PROGRESS),
+                name="task_active_assignee_idx",
+            ),
+            # Выборка задач по статусу ("важные" задачи начинаются с TODO)
+            models.Index(fields=["status", "id"], name="task_status_idx"),
+            # Последняя запись (workload_view.py) и кандидаты в архив
+            models.Index(fields=["updated_at", "id"], name="task_updated_idx"),
+            # Лента изменений: задачи, измененные после позиции курсора
+            models.Index(fields=["change_seq", "id"], name="task_change_seq_idx"),
+            # Фильтры ?deadline__gte/lte и сортировка ?ordering=deadline
+            models.Index(fields=["deadline", "id"], name="task_deadline_idx"),
+            # ?status= вместе с ?ordering=deadline: страница читается из индекса
+            # в нужном порядке, без сортировки всех задач в этом статусе
+            models.Index(
+                fields=["status", "deadline", "id"], name="task_status_deadline_idx"
+            ),
+        ]
+
+    def _stored_state(self):
+        """
+        Читает из БД (с блокировкой строки) сохраненные исполнителя и статус
+        задачи - от них зависят счетчик загрузки и инвалидация кэша аналитики
+        """
+        return (
+            Task.objects.select_for_update()
+            .filter(pk=self.pk)
+            .values_list("assignee_id", "status")
+            .first()
+        )
+
+    def save(self, *args, **kwargs):
+        # Прежнее состояние нужно обработчикам post_save (см. signals.py)
+        self._previous_state = None
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            # Иначе auto_now изменит updated_at только в памяти
+            update_fields = kwargs["update_fields"] = {*update_fields, "updated_at"}
+        if update_fields is not None and not WORKLOAD_FIELDS & update_fields:
+            # Исполнитель и статус не меняются
+            self._previous_state = (self.assignee_id, self.status)
+            return super().save(*args, **kwargs)
+
+        from .workload import active_assignee_id, shift_active_task_counts
+
+        with transaction.atomic(using=kwargs.get("using")):
+            before = None
+            if not self._state.adding and self.pk is not None:
+                self._previous_state = self._stored_state()
+                if self._previous_state:
+                    before = active_assignee_id(*self._previous_state)
+            super().save(*args, **kwargs)
+            after = active_assignee_id(self.assignee_id, self.status)
+            if before != after:
+                shift_active_task_counts(
+                    {
+                        employee_id: delta
+                        for employee_id, delta in ((before, -1), (after, 1))
+                        if employee_id is not None
+                    }
+                )
+
+    def delete(self, *args, **kwargs):
+        from .workload import active_assignee_id, shift_active_task_counts
+
+        with transaction.atomic(using=kwargs.get("using")):
+            stored = self._stored_state()
+            before = active_assignee_id(*stored) if stored else None
+            result = super().delete(*args, **kwargs)
+            if before is not None:
+                shift_active_task_counts({before: -1})
+        return result
+
+
+class TaskTombstone(models.Model):
+    """
+    Запись об удаленной задаче. Нужна ленте изменений: удаленную строку
+    иначе невозможно отличить от строки, которая не менялась
+    """
+
+    task_id = models.BigIntegerField(verbose_name="ID задачи")
+    deleted_at = models.DateTimeField(default=timezone.now, verbose_name="Удалена")
+    # Номер изменения, как у Task.change_seq
+    change_seq = models.BigIntegerField(
+        default=0, db_default=0, editable=False, verbose_name="Номер изменения"
+    )
+
+    def __str__(self):
+        return f"#{self.task_id}"
+
+    class Meta:
+        verbose_name = "Удаленная задача"
+        verbose_name_plural = "Удаленные задачи"
+        indexes = [
+            models.Index(fields=["deleted_at", "id"], name="task_tombstone_idx"),
+            models.Index(
+                fields=["change_seq", "id"], name="task_tombstone_change_seq_idx"
+            ),
+        ]
+
+
+class ArchivedTask(models.Model):
+    """
+    Закрытая задача, перенесенная из рабочей таблицы командой archive_tasks
+    (см. archiving.py). id и связи сохраняются: родитель архивной задачи
+    может быть и в архиве, и еще в рабочей таблице, поэтому у parent нет
+    ограничения внешнего ключа, а задачи из рабочей таблицы на архив не ссылаются
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    name = models.CharField(max_length=255, verbose_name="Наименование задачи")
+    parent = models.ForeignKey(
+        "self",
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        blank=True,
+        related_name="children",
+        verbose_name="Родительская задача",
+    )
+    assignee = models.ForeignKey(
+        Employee,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="archived_tasks",
+        verbose_name="Исполнитель",
+    )
+    status = models.CharField(
+        max_length=20, choices=TaskStatus.choices, verbose_name="Статус"
+    )
+    deadline = models.DateField(verbose_name="Срок выполнения")
+    created_at = models.DateTimeField(verbose_name="Создана")
+    updated_at = models.DateTimeField(verbose_name="Изменена")
+    archived_at = models.DateTimeField(
+        default=timezone.now, verbose_name="Перенесена в архив"
+    )
+
+    def __str__(self):
+        return self.name
+
+    class Meta:
+        verbose_name = "Архивная задача"
+        verbose_name_plural = "Архивные задачи"
+        # Те же фильтры и сортировки, что у списка задач (см. filters.py)
+        indexes = [
+            models.Index(fields=["status", "id"], name="archived_task_status_idx"),
+            models.Index(fields=["deadline", "id"], name="archived_task_deadline_idx"),
+        ]
@@ -0,0 +1,169 @@
+"""
+Проверка планов выполнения аналитических запросов и фильтров
+списка задач через EXPLAIN.
+Находит полные проходы по большим таблицам (Seq Scan в PostgreSQL,
+SCAN в SQLite), которые на реальных объемах превращаются в тормоза
+"""
+
+import re
+from datetime import date, timedelta
+
+from django.db import connection
+from rest_framework.settings import api_settings
+
+from employees.models import Employee
+
+from .filters import DEADLINE_ORDERINGS, filter_tasks, has_deadline_range
+from .models import Task, TaskStatus
+from .services import (
+    active_children_queryset,
+    important_tasks_queryset,
+    least_busy_employees,
+)
+from .workload import actual_active_task_count
+
+# Таблицы, полный проход по которым в аналитике недопустим
+WATCHED_TABLES = {Task._meta.db_table}
+
+POSTGRES_SCAN = re.compile(r"Seq Scan on (\w+)")
+# "SCAN t" - полный проход по таблице, "SCAN t USING INDEX i" - по всему индексу.
+# SQLite показывает псевдоним таблицы, а не ее имя, поэтому проверяю
+# все проходы, кроме явно разрешенных
+SQLITE_SCAN = re.compile(r"\bSCAN (?!CONSTANT|SUBQUERY)(\w+)")
+
+
+def analytic_queries():
+    """
+    Возвращает список (название, QuerySet, таблицы с разрешенным полным проходом)
+    для запросов горячих эндпоинтов
+    """
+    employee_ids = list(Employee.objects.values_list("id", flat=True)[:10]) or [0]
+    task_id = Task.objects.values_list("id", flat=True).first() or 0
+    employees_table = Employee._meta.db_table
+    return [
+        (
+            # Сортировка всех сотрудников - это проход по индексу сотрудников
+            "busy-employees: сотрудники по загрузке",
+            Employee.objects.order_by("-active_task_count", "id"),
+            {employees_table},
+        ),
+        (
+            "busy-employees: prefetch задач",
+            Task.objects.filter(assignee_id__in=employee_ids),
+            set(),
+        ),
+        (
+            "important-tasks: наименее загруженный сотрудник",
+            least_busy_employees()[:1],
+            {employees_table},
+        ),
+        (
+            "important-tasks: важные задачи",
+            important_tasks_queryset().values("id", "name", "deadline"),
+            set(),
+        ),
+        (
+            "important-tasks: исполнители дочерних задач",
+            active_children_queryset()
+            .values_list("parent_id", "assignee_id")
+            .distinct(),
+            set(),
+        ),
+        (
+            "дочерние задачи в работе",
+            Task.objects.filter(parent_id=task_id, status=TaskStatus.IN_PROGRESS),
+            set(),
+        ),
+        (
+            "пересчет загрузки сотрудников",
+            Employee.objects.annotate(actual_count=actual_active_task_count()),
+            {employees_table},
+        ),
+    ]
+
+
+def filter_combinations(parent_id, assignee_id, deadline):
+    """Поддерживаемые сочетания фильтров списка задач (см. filters.py)"""
+    later = (deadline + timedelta(days=30)).isoformat()
+    deadline = deadline.isoformat()
+    return [
+        {"status": TaskStatus.TODO},
+        {"status": f"{TaskStatus.TODO},{TaskStatus.IN_PROGRESS}"},
+        {"assignee": assignee_id},
+        {"assignee": "null"},
+        {"parent": parent_id},
+        {"parent": "null"},
+        {"deadline__gte": deadline},
+        {"deadline__lte": deadline},
+        {"deadline__gte": deadline, "deadline__lte": later},
+        {"has_children": "true"},
+        {"status": TaskStatus.IN_PROGRESS, "assignee": assignee_id},
+        {"status": TaskStatus.TODO, "parent": parent_id},
+        {"status": TaskStatus.TODO, "deadline__lte": later},
+        {"status": TaskStatus.TODO, "has_children": "false"},
+        {"assignee": assignee_id, "has_children": "false"},
+        {"deadline__gte": deadline, "has_children": "true"},
+    ]
+
+
+def filter_queries():
+    """
+    (название, QuerySet страницы) для каждого сочетания фильтров списка
+    задач с каждой допустимой для него сортировкой
+    """
+    from .views import TaskViewSet
+
+    sample = (
+        Task.objects.filter(parent__isnull=False, assignee__isnull=False)
+        .values("parent_id", "assignee_id", "deadline")
+        .first()
+    ) or {"parent_id": 0, "assignee_id": 0, "deadline": date.today()}
+    queries = []
+    for params in filter_combinations(
+        str(sample["parent_id"]), str(sample["assignee_id"]), sample["deadline"]
+    ):
+        orderings = TaskViewSet.keyset_orderings
+        if has_deadline_range(params):
+            orderings = {key: orderings[key] for key in DEADLINE_ORDERINGS}
+        for key, ordering in orderings.items():
+            queryset = filter_tasks(Task.objects.all(), params).order_by(*ordering)
+            name = "tasks: " + "&".join(f"{k}={v}" for k, v in params.items())
+            queries.append(
+                (f"{name} ordering={key}", queryset[: api_settings.PAGE_SIZE + 1])
+            )
+    return queries
+
+
+def full_scans(plan, allowed_tables=()):
+    """Возвращает имена таблиц (или псевдонимов) с полным проходом в плане"""
+    if connection.vendor == "postgresql":
+        return [
+            table for table in POSTGRES_SCAN.findall(plan) if table in WATCHED_TABLES
+        ]
+    return [table for table in SQLITE_SCAN.findall(plan) if table not in allowed_tables]
+
+
+def check_query_plans(force_index=False):
+    """
+    Выполняет EXPLAIN для всех аналитических запросов.
+    Возвращает список (название, план, найденные полные проходы).
+
+    force_index=True запрещает планировщику PostgreSQL Seq Scan (enable_seqscan=off).
+    На маленьких данных PostgreSQL предпочитает полный проход даже при наличии
+    индекса, а с этим флагом Seq Scan в плане означает, что подходящего индекса нет
+    """
+    results = []
+    with connection.cursor() as cursor:
+        if force_index and connection.vendor == "postgresql":
+            cursor.execute("SET enable_seqscan = off")
+        try:
+            for name, queryset, allowed_tables in analytic_queries():
+                plan = queryset.explain()
+                results.append((name, plan, full_scans(plan, allowed_tables)))
+            for name, queryset in filter_queries():
+                plan = queryset.explain()
+                results.append((name, plan, full_scans(plan)))
+        finally:
+            if force_index and connection.vendor == "postgresql":
+                cursor.execute("RESET enable_seqscan")
+    return results
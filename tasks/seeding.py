@@ -0,0 +1,128 @@
+"""
+Генерация воспроизводимых наборов данных для замеров производительности
+Один и тот же seed всегда дает одни и те же сотрудников и задачи:
+сроки отсчитываются от фиксированной даты epoch, а не от текущего дня.
+Запись идет через bulk_create порциями, без save() по одной строке
+"""
+
+import random
+from datetime import date, timedelta
+
+from django.db import connection, transaction
+
+from config.cache import BUSY_EMPLOYEES, EMPLOYEES, IMPORTANT_TASKS, TASKS, invalidate
+from employees.models import Employee
+
+from .models import ArchivedTask, Task, TaskStatus, TaskTombstone
+
+DEFAULT_STATUS_MIX = {
+    TaskStatus.TODO: 40,
+    TaskStatus.IN_PROGRESS: 30,
+    TaskStatus.DONE: 20,
+    TaskStatus.CANCELED: 10,
+}
+
+LAST_NAMES = ("Иванов", "Петров", "Сидоров", "Смирнов", "Кузнецов", "Попов", "Волков")
+FIRST_NAMES = ("Иван", "Петр", "Анна", "Мария", "Олег", "Елена", "Сергей", "Ольга")
+POSITIONS = ("Разработчик", "Тестировщик", "Аналитик", "Дизайнер", "Менеджер")
+TASK_VERBS = ("Настроить", "Исправить", "Проверить", "Описать", "Ускорить")
+TASK_OBJECTS = ("CI/CD", "API", "отчет", "импорт", "интерфейс", "базу данных")
+# Дата, от которой по умолчанию отсчитываются сроки задач
+SEED_EPOCH = date(2026, 1, 1)
+
+
+def parse_status_mix(value):
+    """Разбирает строку вида "todo=40,in_progress=30" в словарь весов"""
+    mix = {}
+    for part in value.split(","):
+        status, _, weight = part.partition("=")
+        if status not in TaskStatus.values:
+            raise ValueError(f"Неизвестный статус: {status}")
+        mix[status] = int(weight)
+    if not any(mix.values()):
+        raise ValueError("Сумма весов статусов должна быть больше нуля")
+    return mix
+
+
+def root_count(tasks, depth, fanout):
+    """
+    Количество корневых задач, при котором лес из деревьев с fanout
+    потомками у каждого узла вмещает tasks задач на depth уровнях
+    """
+    per_tree = sum(fanout**level for level in range(max(depth, 1)))
+    return max(1, -(-tasks // per_tree))
+
+
+def clear_data():
+    """
+    Удаляет всех сотрудников, задачи, архив и надгробия прямыми DELETE,
+    без загрузки строк и сигналов на каждую из них
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        for model in (TaskTombstone, ArchivedTask, Task, Employee):
+            cursor.execute(f"DELETE FROM {model._meta.db_table}")
+    invalidate(TASKS, EMPLOYEES, BUSY_EMPLOYEES, IMPORTANT_TASKS)
+
+
+def seed_data(
+    employees,
+    tasks,
+    depth=3,
+    fanout=5,
+    status_mix=None,
+    unassigned=0.1,
+    seed=0,
+    batch_size=5000,
+    epoch=SEED_EPOCH,
+):
+    """
+    Создает employees сотрудников и tasks задач. Возвращает (сотрудники, задачи).
+
+    Задачи образуют лес: задачи создаются в порядке обхода в ширину, и у задачи
+    с номером i >= R (R - количество корней) родитель - задача (i - R) // fanout.
+    Так у каждой задачи не больше fanout детей, а глубина не больше depth уровней.
+    Родитель всегда создается раньше потомка, поэтому его id уже известен.
+    Сроки задач - от 30 дней до epoch до года после нее
+    """
+    rng = random.Random(seed)
+    status_mix = status_mix or DEFAULT_STATUS_MIX
+    statuses, weights = list(status_mix), list(status_mix.values())
+
+    employee_ids = []
+    for start in range(0, employees, batch_size):
+        batch = [
+            Employee(
+                full_name=f"{rng.choice(LAST_NAMES)} {rng.choice(FIRST_NAMES)} #{i}",
+                position=rng.choice(POSITIONS),
+            )
+            for i in range(start, min(start + batch_size, employees))
+        ]
+        employee_ids.extend(obj.pk for obj in Employee.objects.bulk_create(batch))
+
+    roots = root_count(tasks, depth, fanout) if fanout else tasks
+    task_ids = []
+    start = 0
+    while start < tasks:
+        # Порция заканчивается раньше первой задачи, чей родитель
+        # создается в этой же порции: id родителя должен быть уже известен
+        end = min(start + batch_size, tasks)
+        if fanout:
+            end = min(end, start * fanout + roots)
+        batch = []
+        for i in range(start, end):
+            parent_id = task_ids[(i - roots) // fanout] if i >= roots else None
+            assignee_id = None
+            if employee_ids and rng.random() >= unassigned:
+                assignee_id = rng.choice(employee_ids)
+            batch.append(
+                Task(
+                    name=f"{rng.choice(TASK_VERBS)} {rng.choice(TASK_OBJECTS)} #{i}",
+                    parent_id=parent_id,
+                    assignee_id=assignee_id,
+                    status=rng.choices(statuses, weights)[0],
+                    deadline=epoch + timedelta(days=rng.randint(-30, 365)),
+                )
+            )
+        task_ids.extend(obj.pk for obj in Task.objects.bulk_create(batch))
+        start = end
+    return len(employee_ids), len(task_ids)
@@ -1,9 +1,35 @@
 from datetime import date
 
+from django.conf import settings
 from rest_framework import serializers
 
+from employees.models import Employee
+
+from .filters import LIST_FILTERS
+
 # 1. ИСПРАВЛЕНИЕ: Импортируем и Task, и TaskStatus
-from .models import Task, TaskStatus
+from .models import ArchivedTask, Task, TaskStatus
+
+
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Поле связи, которое ищет объект в заранее загруженном словаре
+    context["prefetched"][модель] = {pk: объект} вместо отдельного запроса.
+    Без такого словаря в контексте работает как обычный PrimaryKeyRelatedField
+    """
+
+    def to_internal_value(self, data):
+        prefetched = self.context.get("prefetched", {}).get(self.queryset.model)
+        if prefetched is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        try:
+            return prefetched[int(data)]
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        except KeyError:
+            self.fail("does_not_exist", pk_value=data)
 
 
 class TaskSerializer(serializers.ModelSerializer):
@@ -12,6 +38,9 @@ class TaskSerializer(serializers.ModelSerializer):
     Включает в себя CRUD операции и кастомную бизнес-логику для валидации данных
     """
 
+    # Позволяет проверять пачку задач без запроса к БД на каждую связь
+    serializer_related_field = PrefetchedPrimaryKeyRelatedField
+
     class Meta:
         model = Task
         fields = ("id", "name", "parent", "assignee", "status", "deadline")
@@ -51,7 +80,8 @@ class TaskSerializer(serializers.ModelSerializer):
                 )
         # Проверка 2: Статус "Выполнено"
         # Логика для получения текущего исполнителя как при создании, так и при обновлении
-        current_assignee = assignee or (self.instance and self.instance.assignee)
+        # assignee_id, а не assignee: проверка не должна загружать сотрудника из БД
+        current_assignee = assignee or (self.instance and self.instance.assignee_id)
 
         # Обращаемся к TaskStatus напрямую
         if status == TaskStatus.DONE and not current_assignee:
@@ -62,6 +92,86 @@ class TaskSerializer(serializers.ModelSerializer):
         return data
 
 
+class TaskTreeNodeSerializer(TaskSerializer):
+    """
+    Сериализатор узла иерархии задач для эндпоинтов subtree и ancestors
+    Помимо полей задачи содержит глубину и путь (id от запрошенной задачи до узла)
+    """
+
+    depth = serializers.IntegerField(read_only=True)
+    path = serializers.ListField(child=serializers.IntegerField(), read_only=True)
+
+    class Meta(TaskSerializer.Meta):
+        fields = TaskSerializer.Meta.fields + ("depth", "path")
+
+
+class ArchivedTaskSerializer(serializers.ModelSerializer):
+    """
+    Архивная задача (только чтение): поля задачи, время создания
+    и последнего изменения и время переноса в архив
+    """
+
+    class Meta:
+        model = ArchivedTask
+        fields = TaskSerializer.Meta.fields + (
+            "created_at",
+            "updated_at",
+            "archived_at",
+        )
+        read_only_fields = fields
+
+
+class TaskChangeSerializer(serializers.Serializer):
+    """
+    Элемент ленты изменений: задача создана или изменена (upsert)
+    либо удалена (delete, task = null)
+    """
+
+    class ChangedTaskSerializer(TaskSerializer):
+        class Meta(TaskSerializer.Meta):
+            fields = TaskSerializer.Meta.fields + ("created_at", "updated_at")
+
+    op = serializers.ChoiceField(choices=("upsert", "delete"), read_only=True)
+    id = serializers.IntegerField(read_only=True)
+    changed_at = serializers.DateTimeField(read_only=True)
+    task = ChangedTaskSerializer(read_only=True, allow_null=True)
+
+
+class TaskChangesPageSerializer(serializers.Serializer):
+    """
+    Страница ленты изменений. since передается в следующий запрос,
+    has_more показывает, что изменения за страницей еще есть
+    """
+
+    since = serializers.CharField(read_only=True)
+    has_more = serializers.BooleanField(read_only=True)
+    results = TaskChangeSerializer(many=True, read_only=True)
+
+
+def prefetch_bulk_relations(items):
+    """
+    Загружает все задачи и сотрудников, на которые ссылается пачка задач,
+    одним запросом на модель. Возвращает словарь для context["prefetched"]
+    """
+    task_ids, employee_ids = set(), set()
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        for key, ids in (
+            ("id", task_ids),
+            ("parent", task_ids),
+            ("assignee", employee_ids),
+        ):
+            try:
+                ids.add(int(item[key]))
+            except (KeyError, TypeError, ValueError):
+                pass
+    return {
+        Task: Task.objects.in_bulk(task_ids) if task_ids else {},
+        Employee: Employee.objects.in_bulk(employee_ids) if employee_ids else {},
+    }
+
+
 class ImportantTaskSerializer(serializers.Serializer):
     """
     Сериализатор для специального эндпоинта "Важные задачи"
@@ -73,3 +183,82 @@ class ImportantTaskSerializer(serializers.Serializer):
     suitable_employees = serializers.ListField(
         child=serializers.CharField(), read_only=True
     )
+
+
+class PlanAssignmentsRequestSerializer(serializers.Serializer):
+    """Параметры эндпоинта плана назначений: apply=true записывает план в БД"""
+
+    apply = serializers.BooleanField(default=False)
+
+
+class PlannedAssignmentSerializer(serializers.Serializer):
+    """
+    Назначение исполнителя "важной" задаче в плане
+    assignee_load - нагрузка исполнителя с учетом назначений плана до этой задачи
+    включительно, child_assignee - исполнитель выбран среди исполнителей дочерних задач
+    """
+
+    task_id = serializers.IntegerField(read_only=True)
+    task_name = serializers.CharField(read_only=True)
+    deadline = serializers.DateField(read_only=True)
+    assignee = serializers.IntegerField(read_only=True)
+    assignee_full_name = serializers.CharField(read_only=True)
+    assignee_load = serializers.IntegerField(read_only=True)
+    child_assignee = serializers.BooleanField(read_only=True)
+
+
+class AssignmentPlanSerializer(serializers.Serializer):
+    """План назначений и признак того, что он записан в БД"""
+
+    applied = serializers.BooleanField(read_only=True)
+    assignments = PlannedAssignmentSerializer(many=True, read_only=True)
+
+
+class TaskTransitionRequestSerializer(serializers.Serializer):
+    """
+    Параметры массовой смены статуса: целевой статус и либо список id
+    задач, либо фильтр с теми же параметрами, что у списка задач
+    """
+
+    status = serializers.ChoiceField(choices=TaskStatus.choices)
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        required=False,
+        allow_empty=False,
+    )
+    filter = serializers.DictField(child=serializers.CharField(), required=False)
+
+    def validate_ids(self, value):
+        if len(value) > settings.TASKS_BULK_MAX_ITEMS:
+            raise serializers.ValidationError(
+                f"Не больше {settings.TASKS_BULK_MAX_ITEMS} задач за запрос."
+            )
+        return sorted(set(value))
+
+    def validate_filter(self, value):
+        unknown = set(value) - set(LIST_FILTERS)
+        if unknown:
+            raise serializers.ValidationError(
+                f"Допустимые фильтры: {', '.join(LIST_FILTERS)}."
+            )
+        # Пустой фильтр перевел бы в новый статус всю таблицу
+        if not any(value.values()):
+            raise serializers.ValidationError("Нужен хотя бы один фильтр.")
+        return value
+
+    def validate(self, data):
+        if ("ids" in data) == ("filter" in data):
+            raise serializers.ValidationError("Укажите либо ids, либо filter.")
+        return data
+
+
+class TaskTransitionSerializer(serializers.Serializer):
+    """
+    Результат массовой смены статуса: matched - задач в выборке,
+    ids - измененные задачи (уже бывшие в этом статусе не меняются)
+    """
+
+    status = serializers.CharField(read_only=True)
+    matched = serializers.IntegerField(read_only=True)
+    updated = serializers.IntegerField(read_only=True)
+    ids = serializers.ListField(child=serializers.IntegerField(), read_only=True)
@@ -0,0 +1,266 @@
+import asyncio
+import heapq
+
+from employees.models import Employee
+
+from .models import Task, TaskStatus
+
+# Допустимое превышение нагрузки исполнителя дочерней задачи над нагрузкой
+# наименее загруженного сотрудника (по ТЗ - не более чем на 2 задачи)
+MAX_EXTRA_LOAD = 2
+
+
+def least_busy_employees():
+    """
+    Сотрудники от наименее к наиболее загруженному.
+    Благодаря счетчику active_task_count это чтение индекса, а не GROUP BY
+    """
+    return Employee.objects.order_by("active_task_count", "-id")
+
+
+def important_tasks_queryset():
+    """Важные задачи: не взятые в работу, но блокирующие задачи в работе"""
+    return Task.objects.filter(
+        status=TaskStatus.TODO, children__status=TaskStatus.IN_PROGRESS
+    ).distinct()
+
+
+def active_children_queryset():
+    """Активные дочерние задачи с исполнителем сразу для всех "важных" задач"""
+    return Task.objects.filter(
+        parent__status=TaskStatus.TODO,
+        status=TaskStatus.IN_PROGRESS,
+        assignee__isnull=False,
+    )
+
+
+def select_suitable_employees(important_tasks, child_assignees, loads, least_busy):
+    """
+    Подбирает исполнителей для "важных" задач полностью в памяти, без запросов к БД
+
+    :param important_tasks: итерируемое из словарей с ключами id, name, deadline
+    :param child_assignees: пары (id родительской задачи, id исполнителя активной дочерней задачи)
+    :param loads: словарь {id сотрудника: (ФИО, количество активных задач)}
+    :param least_busy: словарь с ключами full_name и active_task_count
+    :return: список словарей в формате ImportantTaskSerializer
+    """
+    min_tasks_count = least_busy["active_task_count"]
+
+    # Группирую исполнителей дочерних задач по родительской задаче
+    assignees_by_parent = {}
+    for parent_id, assignee_id in child_assignees:
+        assignees_by_parent.setdefault(parent_id, set()).add(assignee_id)
+
+    result_data = []
+    for task in important_tasks:
+        # Критерий А: Наименее загруженный сотрудник подходит всегда.
+        # dict сохраняет порядок вставки и заодно исключает дубликаты ФИО
+        suitable_employees = {least_busy["full_name"]: None}
+
+        # Критерий Б: Исполнители дочерних задач, если они не сильно перегружены
+        for assignee_id in sorted(assignees_by_parent.get(task["id"], ())):
+            full_name, active_task_count = loads[assignee_id]
+            if active_task_count <= min_tasks_count + MAX_EXTRA_LOAD:
+                suitable_employees[full_name] = None
+
+        result_data.append(
+            {
+                "task_name": task["name"],
+                "deadline": task["deadline"],
+                "suitable_employees": list(suitable_employees),
+            }
+        )
+    return result_data
+
+
+def build_important_tasks_report():
+    """
+    Формирует отчет по "важным" задачам за фиксированное число запросов,
+    не зависящее от количества задач и сотрудников:
+    1. Наименее загруженный сотрудник
+    2. "Важные" задачи
+    3. Пары (задача, исполнитель активной дочерней задачи)
+    4. Полная загрузка этих исполнителей
+
+    Возвращает None, если в системе нет сотрудников
+    """
+    # Запрос 1: Наименее загруженный сотрудник - "эталон" для сравнения
+    least_busy = least_busy_employees().values("full_name", "active_task_count").first()
+    if least_busy is None:
+        return None
+
+    # Запрос 2: "Важные" задачи - не взятые в работу, но блокирующие задачи в работе
+    important_tasks = list(
+        important_tasks_queryset().values("id", "name", "deadline").order_by("id")
+    )
+
+    # Запрос 3: Исполнители активных дочерних задач сразу для всех важных задач
+    active_children = active_children_queryset()
+    child_assignees = list(
+        active_children.values_list("parent_id", "assignee_id").distinct()
+    )
+
+    # Запрос 4: Полная загрузка исполнителей дочерних задач.
+    # Подзапрос вместо списка id, чтобы не передавать в БД тысячи параметров
+    loads = {}
+    if child_assignees:
+        loads = {
+            employee_id: (full_name, active_task_count)
+            for employee_id, full_name, active_task_count in Employee.objects.filter(
+                id__in=active_children.values("assignee_id")
+            ).values_list("id", "full_name", "active_task_count")
+        }
+
+    return select_suitable_employees(
+        important_tasks, child_assignees, loads, least_busy
+    )
+
+
+async def collect(queryset):
+    """
+    Выполняет QuerySet через async ORM и возвращает список строк.
+    Только для values(): итератор values_list() в Django 5.2 выполняет
+    запрос еще при создании, прямо в цикле событий
+    """
+    return [row async for row in queryset.aiterator()]
+
+
+async def abuild_important_tasks_report():
+    """
+    Асинхронный вариант build_important_tasks_report для ASGI.
+    Все четыре запроса независимы (загрузка исполнителей берет их id
+    подзапросом), поэтому запускаются одновременно через asyncio.gather.
+    Пока запросы выполняются, цикл событий обслуживает другие запросы,
+    а не держит целый воркер, как синхронное представление.
+
+    Django пока выполняет async ORM через sync_to_async в одном потоке
+    на соединение, поэтому внутри одного HTTP-запроса SQL по-прежнему идет
+    последовательно; параллельным он станет с асинхронными драйверами БД
+    """
+    active_children = active_children_queryset()
+    least_busy, important_tasks, children, loads = await asyncio.gather(
+        least_busy_employees().values("full_name", "active_task_count").afirst(),
+        collect(
+            important_tasks_queryset().values("id", "name", "deadline").order_by("id")
+        ),
+        collect(active_children.values("parent_id", "assignee_id").distinct()),
+        collect(
+            Employee.objects.filter(
+                id__in=active_children.values("assignee_id")
+            ).values("id", "full_name", "active_task_count")
+        ),
+    )
+    if least_busy is None:
+        return None
+    return select_suitable_employees(
+        important_tasks,
+        [(child["parent_id"], child["assignee_id"]) for child in children],
+        {
+            employee["id"]: (employee["full_name"], employee["active_task_count"])
+            for employee in loads
+        },
+        least_busy,
+    )
+
+
+def plan_assignments(important_tasks, child_assignees, employees):
+    """
+    Назначает исполнителей сразу всем "важным" задачам полностью в памяти.
+    В отличие от отчета, каждое назначение увеличивает нагрузку сотрудника,
+    и следующие задачи сравниваются уже с обновленной нагрузкой.
+
+    Задачи обходятся по сроку. Задаче достается наименее загруженный
+    исполнитель ее активной дочерней задачи, если его нагрузка превышает
+    текущий минимум не более чем на MAX_EXTRA_LOAD, иначе - наименее
+    загруженный сотрудник компании. Минимум берется из кучи (нагрузка, -id):
+    при равной нагрузке, как и в least_busy_employees, выбирается больший id.
+    Устаревшие записи кучи не удаляются, а пропускаются при чтении вершины,
+    поэтому план строится за O(T log E) плюс число пар с дочерними задачами
+
+    :param important_tasks: словари с ключами id, name, deadline в порядке обхода
+    :param child_assignees: пары (id родительской задачи, id исполнителя активной дочерней задачи)
+    :param employees: словарь {id сотрудника: (ФИО, количество активных задач)}
+    :return: список словарей в формате PlannedAssignmentSerializer
+    """
+    if not employees:
+        return []
+    loads = {employee_id: load for employee_id, (_, load) in employees.items()}
+    heap = [(load, -employee_id) for employee_id, load in loads.items()]
+    heapq.heapify(heap)
+
+    assignees_by_parent = {}
+    for parent_id, assignee_id in child_assignees:
+        assignees_by_parent.setdefault(parent_id, set()).add(assignee_id)
+
+    plan = []
+    for task in important_tasks:
+        # Вершина кучи устарела, если нагрузку сотрудника уже увеличили
+        while heap[0][0] != loads[-heap[0][1]]:
+            heapq.heappop(heap)
+        min_load, least_busy_id = heap[0][0], -heap[0][1]
+
+        # Исполнитель дочерней задачи уже знаком с контекстом, поэтому он
+        # предпочтительнее, пока укладывается в лимит превышения нагрузки
+        candidates = [
+            (loads[assignee_id], -assignee_id)
+            for assignee_id in assignees_by_parent.get(task["id"], ())
+            if loads[assignee_id] <= min_load + MAX_EXTRA_LOAD
+        ]
+        employee_id = -min(candidates)[1] if candidates else least_busy_id
+
+        loads[employee_id] += 1
+        heapq.heappush(heap, (loads[employee_id], -employee_id))
+        plan.append(
+            {
+                "task_id": task["id"],
+                "task_name": task["name"],
+                "deadline": task["deadline"],
+                "assignee": employee_id,
+                "assignee_full_name": employees[employee_id][0],
+                "assignee_load": loads[employee_id],
+                "child_assignee": bool(candidates),
+            }
+        )
+    return plan
+
+
+def build_assignment_plan():
+    """
+    Строит план назначения исполнителей всем "важным" задачам
+    за три запроса, не зависящих от количества задач и сотрудников:
+    1. Нагрузка всех сотрудников
+    2. "Важные" задачи в порядке срока
+    3. Пары (задача, исполнитель активной дочерней задачи)
+
+    Возвращает None, если в системе нет сотрудников
+    """
+    # Запрос 1: все сотрудники - нагрузка меняется по мере назначений,
+    # поэтому одного наименее загруженного, как в отчете, недостаточно
+    employees = {
+        employee_id: (full_name, active_task_count)
+        for employee_id, full_name, active_task_count in Employee.objects.values_list(
+            "id", "full_name", "active_task_count"
+        )
+    }
+    if not employees:
+        return None
+
+    # Запрос 2: задачи с ближайшим сроком получают исполнителей первыми
+    important_tasks = important_tasks_queryset().values("id", "name", "deadline")
+    important_tasks = list(important_tasks.order_by("deadline", "id"))
+
+    # Запрос 3: исполнители активных дочерних задач сразу для всех важных задач
+    child_assignees = list(
+        active_children_queryset().values_list("parent_id", "assignee_id").distinct()
+    )
+    return plan_assignments(important_tasks, child_assignees, employees)
+
+
+def apply_assignment_plan(plan):
+    """
+    Записывает исполнителей из плана одним bulk_update.
+    Счетчики активных задач и версии кэша обновляет TaskQuerySet.bulk_update
+    """
+    tasks = [Task(id=item["task_id"], assignee_id=item["assignee"]) for item in plan]
+    if tasks:
+        Task.objects.bulk_update(tasks, ["assignee"])
@@ -0,0 +1,77 @@
+"""
+Реакция на изменения задач и сотрудников: смена версий данных
+(ETag, кэш аналитики) и надгробия удаленных задач для ленты изменений
+Обработчики подключаются в TasksConfig.ready()
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from config.cache import (
+    BUSY_EMPLOYEES,
+    EMPLOYEES,
+    IMPORTANT_TASKS,
+    TASKS,
+    invalidate,
+)
+from employees.models import Employee
+
+from .models import Task, TaskStatus, TaskTombstone
+
+# Отправляется массовыми операциями TaskQuerySet (update, bulk_create,
+# bulk_update), для которых Django не вызывает post_save
+tasks_bulk_changed = Signal()
+
+# Только задачи в этих статусах участвуют в расчете "важных задач"
+IMPORTANT_STATUSES = {TaskStatus.TODO, TaskStatus.IN_PROGRESS}
+
+
+def affected_resources(states):
+    """
+    Определяет, какие закэшированные ответы зависят от задачи
+    states - состояния задачи (исполнитель, статус) до и после изменения
+    """
+    resources = {TASKS}
+    for assignee_id, status in states:
+        # В "Занятых сотрудниках" есть все задачи, у которых есть исполнитель
+        if assignee_id is not None:
+            resources.add(BUSY_EMPLOYEES)
+        if status in IMPORTANT_STATUSES:
+            resources.add(IMPORTANT_TASKS)
+    return resources
+
+
+@receiver(post_save, sender=Task, dispatch_uid="tasks_cache_task_saved")
+def task_saved(sender, instance, **kwargs):
+    states = [(instance.assignee_id, instance.status)]
+    previous = getattr(instance, "_previous_state", None)
+    if previous:
+        states.append(previous)
+    invalidate(*affected_resources(states))
+
+
+@receiver(post_delete, sender=Task, dispatch_uid="tasks_cache_task_deleted")
+def task_deleted(sender, instance, **kwargs):
+    # Надгробие для ленты изменений, в той же транзакции, что и удаление
+    TaskTombstone.objects.create(task_id=instance.pk)
+    # У дочерних задач обнуляется parent, а они могут быть у кого угодно
+    resources = affected_resources([(instance.assignee_id, instance.status)])
+    invalidate(*resources | {BUSY_EMPLOYEES})
+
+
+@receiver(tasks_bulk_changed, dispatch_uid="tasks_cache_bulk_changed")
+def tasks_changed_in_bulk(sender, **kwargs):
+    invalidate(TASKS, BUSY_EMPLOYEES, IMPORTANT_TASKS)
+
+
+@receiver(post_save, sender=Employee, dispatch_uid="tasks_cache_employee_saved")
+def employee_saved(sender, instance, **kwargs):
+    # Новый сотрудник без задач может стать наименее загруженным,
+    # поэтому меняются оба аналитических ответа
+    invalidate(EMPLOYEES, BUSY_EMPLOYEES, IMPORTANT_TASKS)
+
+
+@receiver(post_delete, sender=Employee, dispatch_uid="tasks_cache_employee_deleted")
+def employee_deleted(sender, instance, **kwargs):
+    # У задач удаленного сотрудника обнуляется исполнитель
+    invalidate(EMPLOYEES, TASKS, BUSY_EMPLOYEES, IMPORTANT_TASKS)
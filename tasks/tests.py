@@ -1,11 +1,47 @@
-from django.test import TestCase
-from django.urls import reverse
+import base64
+import csv
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from datetime import date, datetime, timedelta
+from io import StringIO
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import Prefetch
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse, reverse_lazy
+from django.utils import timezone
 from rest_framework import status
-from rest_framework.test import APITestCase
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APITestCase
 
+from config.admin import EstimatedCountPaginator
+from config.cache import IMPORTANT_TASKS, get_stats, get_version
+from config.fast_serializers import ValuesReader
+from config.middleware import QueryRecorder
+from config.pagination import KeysetPagination
+from config.schema import schema_document, stored_schema
 from employees.models import Employee
+from employees.serializers import EmployeeSerializer
 
-from .models import Task, TaskStatus
+from .archiving import archive_tasks
+from .benchmark import compare_results, measure, run_benchmarks
+from .hierarchy import build_subtree, fetch_ancestors, fetch_subtree
+from .models import ArchivedTask, Task, TaskStatus, TaskTombstone
+from .query_plans import check_query_plans, filter_queries, full_scans
+from .seeding import SEED_EPOCH, clear_data, seed_data
+from .serializers import TaskSerializer
+from .services import plan_assignments
+from .workload import find_counter_drift
+from .workload_view import is_stale, live_counts
 
 
 class TestTaskModel(TestCase):
@@ -43,18 +79,1854 @@ class TestTaskAPI(APITestCase):
         url = reverse("task-list")
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data["results"]), 1)
 
-    # TODO: Написать тест для эндпоинта 'important-tasks'
     def test_important_tasks_endpoint(self):
         """
         Тест для эндпоинта "Важные задачи".
-        Это самый важный тест, который вам нужно будет реализовать.
+        Проверяет отбор важных задач и подбор подходящих исполнителей.
         """
-        # 1. Создайте сложную ситуацию с данными в setUp (родительская задача, дочерняя, несколько сотрудников с
-        # разной нагрузкой)
-        # 2. Сделайте GET-запрос на reverse('task-important-tasks')
-        # 3. Проверьте, что статус ответа 200 OK
-        # 4. Проверьте, что в ответе правильное количество важных задач
-        # 5. Проверьте, что для каждой важной задачи предложены правильные сотрудники
-        self.skipTest("Тест для 'important-tasks' еще не реализован.")
+        busy = Employee.objects.create(full_name="Занятой", position="B")
+        overloaded = Employee.objects.create(full_name="Перегруженный", position="C")
+        parent = Task.objects.create(name="Родительская", deadline="2025-12-31")
+        Task.objects.create(
+            name="Дочерняя 1",
+            parent=parent,
+            assignee=busy,
+            status=TaskStatus.IN_PROGRESS,
+            deadline="2025-12-01",
+        )
+        Task.objects.create(
+            name="Дочерняя 2",
+            parent=parent,
+            assignee=overloaded,
+            status=TaskStatus.IN_PROGRESS,
+            deadline="2025-12-01",
+        )
+        for i in range(3):
+            Task.objects.create(
+                name=f"Нагрузка {i}",
+                assignee=overloaded,
+                status=TaskStatus.IN_PROGRESS,
+                deadline="2025-12-01",
+            )
+
+        response = self.client.get(reverse("task-important-tasks"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]["task_name"], "Родительская")
+        # "Работник 1" свободен, "Занятой" укладывается в лимит +2,
+        # а у "Перегруженного" 4 активные задачи
+        self.assertEqual(
+            response.data[0]["suitable_employees"], ["Работник 1", "Занятой"]
+        )
+
+    def test_important_tasks_without_employees(self):
+        """Проверяет ответ 404, если в системе нет сотрудников."""
+        Employee.objects.all().delete()
+        response = self.client.get(reverse("task-important-tasks"))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class TestTaskPagination(APITestCase):
+    """
+    Набор тестов для курсорной пагинации списка задач.
+    """
+
+    def setUp(self):
+        # Дедлайны повторяются, чтобы проверить сортировку по (deadline, id)
+        self.tasks = [
+            Task.objects.create(name=f"Задача {i}", deadline=f"2025-12-{i % 3 + 1:02d}")
+            for i in range(7)
+        ]
+
+    def collect_pages(self, url, key="next"):
+        """Проходит все страницы по ссылкам key и возвращает id задач."""
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(task["id"] for task in response.data["results"])
+            url = response.data[key]
+        return ids
+
+    def test_pages_by_id(self):
+        url = reverse("task-list") + "?page_size=3"
+        self.assertEqual(self.collect_pages(url), [task.id for task in self.tasks])
+
+    def test_pages_by_deadline(self):
+        url = reverse("task-list") + "?page_size=2&ordering=deadline"
+        expected = [
+            task.id
+            for task in sorted(self.tasks, key=lambda task: (task.deadline, task.id))
+        ]
+        self.assertEqual(self.collect_pages(url), expected)
+
+    def test_previous_page(self):
+        first = self.client.get(reverse("task-list") + "?page_size=3")
+        second = self.client.get(first.data["next"])
+        self.assertIsNone(first.data["previous"])
+        previous = self.client.get(second.data["previous"])
+        self.assertEqual(previous.data["results"], first.data["results"])
+
+    def test_page_size_is_limited(self):
+        with mock.patch.object(KeysetPagination, "max_page_size", 5):
+            response = self.client.get(reverse("task-list") + "?page_size=100")
+        self.assertEqual(len(response.data["results"]), 5)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse("task-list") + "?cursor=broken")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cursor_with_wrong_types(self):
+        """Курсор правильной структуры, но со значениями не того типа."""
+        cases = [
+            ("task-list", "", ["abc"]),
+            ("task-list", "", [{}]),
+            ("task-list", "", [None]),
+            ("task-list", "&ordering=deadline", ["abc", 1]),
+            ("task-list", "&ordering=deadline", ["2025-12-01", [1]]),
+            ("employee-list", "", ["abc"]),
+        ]
+        for name, query, position in cases:
+            with self.subTest(name=name, query=query, position=position):
+                cursor = base64.urlsafe_b64encode(
+                    json.dumps({"p": position}).encode()
+                ).decode()
+                response = self.client.get(f"{reverse(name)}?cursor={cursor}{query}")
+                self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class TestTaskFilters(APITestCase):
+    """
+    Проверяет фильтры списка задач и их ошибки.
+    """
+
+    url = reverse_lazy("task-list")
+
+    def setUp(self):
+        self.employee = Employee.objects.create(full_name="Иванов И.И.", position="A")
+        self.parent = Task.objects.create(name="Родитель", deadline="2025-12-31")
+        self.child = Task.objects.create(
+            name="Дочерняя",
+            parent=self.parent,
+            assignee=self.employee,
+            status=TaskStatus.IN_PROGRESS,
+            deadline="2025-11-01",
+        )
+        self.free = Task.objects.create(
+            name="Свободная", status=TaskStatus.DONE, deadline="2025-10-01"
+        )
+
+    def names(self, params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        return [task["name"] for task in response.data["results"]]
+
+    def test_filters(self):
+        cases = [
+            ({"status": "todo,done"}, ["Родитель", "Свободная"]),
+            ({"assignee": self.employee.id}, ["Дочерняя"]),
+            ({"assignee": "null"}, ["Родитель", "Свободная"]),
+            ({"parent": self.parent.id}, ["Дочерняя"]),
+            ({"parent": "null", "status": "done"}, ["Свободная"]),
+            ({"has_children": "true"}, ["Родитель"]),
+            ({"has_children": "false", "status": "todo,done"}, ["Свободная"]),
+            # С фильтром по сроку список по умолчанию отсортирован по сроку
+            ({"deadline__gte": "2025-10-15"}, ["Дочерняя", "Родитель"]),
+            (
+                {"deadline__lte": "2025-11-01", "ordering": "-deadline"},
+                ["Дочерняя", "Свободная"],
+            ),
+        ]
+        for params, expected in cases:
+            with self.subTest(params):
+                self.assertEqual(self.names(params), expected)
+
+    def test_deadline_pages_follow_deadline_order(self):
+        first = self.client.get(
+            self.url, {"deadline__gte": "2025-01-01", "page_size": 2}
+        )
+        second = self.client.get(first.data["next"])
+        self.assertEqual(
+            [task["name"] for task in first.data["results"] + second.data["results"]],
+            ["Свободная", "Дочерняя", "Родитель"],
+        )
+
+    def test_invalid_filters(self):
+        for params in (
+            {"status": "lost"},
+            {"assignee": "me"},
+            {"deadline__gte": "31.12.2025"},
+            {"has_children": "maybe"},
+            {"has_children": "false"},
+            {"deadline__gte": "2025-01-01", "ordering": "id"},
+        ):
+            with self.subTest(params):
+                response = self.client.get(self.url, params)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn(list(params)[-1], response.data)
+
+
+class TestTaskSearch(APITestCase):
+    """
+    Проверяет поиск ?search= по задачам: ранжирование и пагинацию.
+    В SQLite это запасной путь через icontains, ранг по виду совпадения
+    """
+
+    url = reverse_lazy("task-list")
+
+    def setUp(self):
+        for name in ("Годовой Отчет", "Отчеты за год", "Другое", "Отчет"):
+            Task.objects.create(
+                name=name, status=TaskStatus.IN_PROGRESS, deadline="2025-12-31"
+            )
+        Task.objects.create(name="Отчет за май", deadline="2025-12-31")
+
+    def names(self, params, url=None):
+        response = self.client.get(url or self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        return [task["name"] for task in response.data["results"]]
+
+    def test_results_ranked_by_match(self):
+        self.assertEqual(
+            self.names({"search": "Отчет"}),
+            ["Отчет", "Отчеты за год", "Отчет за май", "Годовой Отчет"],
+        )
+        # Поиск сочетается с фильтрами и с явной сортировкой
+        self.assertEqual(
+            self.names({"search": " Отчет ", "status": "in_progress"}),
+            ["Отчет", "Отчеты за год", "Годовой Отчет"],
+        )
+        self.assertEqual(
+            self.names({"search": "Отчет", "ordering": "-id"}),
+            ["Отчет за май", "Отчет", "Отчеты за год", "Годовой Отчет"],
+        )
+        self.assertEqual(self.names({"search": "нет такого"}), [])
+        # Пустой поиск не меняет список
+        self.assertEqual(len(self.names({"search": ""})), 5)
+
+    def test_pages_follow_rank(self):
+        names, params = [], {"search": "Отчет", "page_size": 1}
+        response = self.client.get(self.url, params)
+        while True:
+            names += [task["name"] for task in response.data["results"]]
+            if not response.data["next"]:
+                break
+            response = self.client.get(response.data["next"])
+        self.assertEqual(
+            names, ["Отчет", "Отчеты за год", "Отчет за май", "Годовой Отчет"]
+        )
+
+    def test_archive_search(self):
+        Task.objects.filter(name="Отчет за май").update(
+            status=TaskStatus.DONE,
+            updated_at=timezone.now() - timedelta(days=365),
+        )
+        archive_tasks(timezone.now() - timedelta(days=30), batch_size=10)
+        self.assertEqual(
+            self.names({"search": "май"}, reverse("archived-task-list")),
+            ["Отчет за май"],
+        )
+        self.assertEqual(
+            self.names({"search": "Отчет", "include_archived": "1"}),
+            ["Отчет", "Отчеты за год", "Отчет за май", "Годовой Отчет"],
+        )
+
+
+class TestTaskBulkAPI(APITestCase):
+    """
+    Набор тестов для массового создания и обновления задач.
+    """
+
+    def setUp(self):
+        self.url = reverse("task-bulk")
+        self.employee = Employee.objects.create(full_name="Исполнитель", position="A")
+        self.parent = Task.objects.create(name="Родитель", deadline="2099-12-31")
+
+    def make_items(self, count):
+        return [
+            {
+                "name": f"Задача {i}",
+                "parent": self.parent.id,
+                "assignee": self.employee.id,
+                "status": TaskStatus.IN_PROGRESS,
+                "deadline": "2099-12-01",
+            }
+            for i in range(count)
+        ]
+
+    def test_bulk_create(self):
+        response = self.client.post(self.url, self.make_items(3), format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data), 3)
+        self.assertEqual(self.parent.children.count(), 3)
+        self.employee.refresh_from_db()
+        self.assertEqual(self.employee.active_task_count, 3)
+
+    def test_bulk_create_query_count_is_flat(self):
+        # Связи, запись, счетчик и точки сохранения - независимо от числа задач
+        with self.assertNumQueries(8):
+            self.client.post(self.url, self.make_items(2), format="json")
+        with self.assertNumQueries(8):
+            self.client.post(self.url, self.make_items(50), format="json")
+
+    def test_bulk_create_errors_per_item(self):
+        items = self.make_items(4)
+        items[1]["deadline"] = "2000-01-01"
+        items[2]["deadline"] = "2100-01-01"
+        items[3].update(assignee=None, status=TaskStatus.DONE)
+
+        response = self.client.post(self.url, items, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0], {})
+        self.assertIn("deadline", response.data[1])
+        self.assertIn("deadline", response.data[2])
+        self.assertIn("status", response.data[3])
+        # Ни одна задача не создана
+        self.assertEqual(Task.objects.count(), 1)
+
+    def test_bulk_update(self):
+        tasks = self.client.post(self.url, self.make_items(3), format="json").data
+        items = [{"id": task["id"], "status": TaskStatus.DONE} for task in tasks]
+        items.append({"id": 0, "status": TaskStatus.DONE})
+
+        response = self.client.patch(self.url, items, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[3], {"id": ["Задача не найдена."]})
+
+        response = self.client.patch(self.url, items[:3], format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            Task.objects.filter(status=TaskStatus.DONE).count(), len(items[:3])
+        )
+        self.employee.refresh_from_db()
+        self.assertEqual(self.employee.active_task_count, 0)
+
+    def test_not_a_list(self):
+        response = self.client.post(self.url, {"name": "Задача"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TestTaskTransition(APITestCase):
+    """
+    Проверяет массовую смену статуса POST /tasks/transition/.
+    """
+
+    url = reverse_lazy("task-transition")
+
+    def setUp(self):
+        self.employee = Employee.objects.create(full_name="Исполнитель", position="A")
+        self.active = [
+            Task.objects.create(
+                name=f"В работе {i}",
+                assignee=self.employee,
+                status=TaskStatus.IN_PROGRESS,
+                deadline="2099-12-31",
+            )
+            for i in range(3)
+        ]
+        self.unassigned = Task.objects.create(
+            name="Без исполнителя", deadline="2099-12-31"
+        )
+        self.done = Task.objects.create(
+            name="Выполнена",
+            assignee=self.employee,
+            status=TaskStatus.DONE,
+            deadline="2099-12-31",
+        )
+
+    def statuses(self):
+        return dict(Task.objects.values_list("id", "status"))
+
+    def test_ids_to_done_in_one_update(self):
+        ids = [task.id for task in self.active] + [self.done.id]
+        version = get_version(IMPORTANT_TASKS)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                self.url, {"ids": ids, "status": "done"}, format="json"
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertEqual(response.data["matched"], 4)
+        # Уже выполненная задача не меняется
+        self.assertEqual(response.data["ids"], ids[:3])
+        self.assertEqual(response.data["updated"], 3)
+
+        task_updates = [
+            query["sql"]
+            for query in queries.captured_queries
+            if query["sql"].startswith('UPDATE "tasks_task"')
+        ]
+        self.assertEqual(len(task_updates), 1)
+        self.assertIn("RETURNING", task_updates[0])
+        self.employee.refresh_from_db()
+        self.assertEqual(self.employee.active_task_count, 0)
+        self.assertEqual(list(find_counter_drift()), [])
+        self.assertNotEqual(get_version(IMPORTANT_TASKS), version)
+
+    def test_done_requires_assignee(self):
+        before = self.statuses()
+        response = self.client.post(
+            self.url,
+            {"ids": [self.active[0].id, self.unassigned.id], "status": "done"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("status", response.data)
+        self.assertEqual(self.statuses(), before)
+
+    def test_filter_transition_updates_counters(self):
+        Task.objects.filter(id=self.unassigned.id).update(assignee=self.employee)
+        response = self.client.post(
+            self.url,
+            {
+                "filter": {"assignee": self.employee.id, "status": "todo"},
+                "status": "in_progress",
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertEqual(response.data["ids"], [self.unassigned.id])
+        self.employee.refresh_from_db()
+        self.assertEqual(self.employee.active_task_count, 4)
+
+        response = self.client.post(
+            self.url,
+            {"filter": {"status": "in_progress"}, "status": "canceled"},
+            format="json",
+        )
+        self.assertEqual(response.data["updated"], 4)
+        self.employee.refresh_from_db()
+        self.assertEqual(self.employee.active_task_count, 0)
+        self.assertEqual(list(find_counter_drift()), [])
+
+    def test_invalid_requests(self):
+        before = self.statuses()
+        cases = [
+            ({"status": "done"}, "non_field_errors"),
+            (
+                {"ids": [1], "filter": {"status": "todo"}, "status": "done"},
+                "non_field_errors",
+            ),
+            ({"ids": [self.active[0].id], "status": "lost"}, "status"),
+            ({"ids": [self.active[0].id, 10**9], "status": "todo"}, "ids"),
+            ({"filter": {"name": "x"}, "status": "todo"}, "filter"),
+            ({"filter": {"status": ""}, "status": "todo"}, "filter"),
+            ({"filter": {"assignee": "me"}, "status": "todo"}, "filter"),
+        ]
+        for data, key in cases:
+            with self.subTest(data):
+                response = self.client.post(self.url, data, format="json")
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn(key, response.data)
+        self.assertEqual(self.statuses(), before)
+
+
+class TestActiveTaskCounter(TestCase):
+    """
+    Проверяет, что Employee.active_task_count остается точным
+    при любых способах изменения задач.
+    """
+
+    def setUp(self):
+        self.first = Employee.objects.create(full_name="Первый", position="A")
+        self.second = Employee.objects.create(full_name="Второй", position="B")
+
+    def assertCounts(self, first, second):
+        self.first.refresh_from_db()
+        self.second.refresh_from_db()
+        self.assertEqual(
+            (self.first.active_task_count, self.second.active_task_count),
+            (first, second),
+        )
+
+    def create_task(self, **kwargs):
+        kwargs.setdefault("status", TaskStatus.IN_PROGRESS)
+        return Task.objects.create(name="Задача", deadline="2025-12-31", **kwargs)
+
+    def test_save_and_delete(self):
+        task = self.create_task(assignee=self.first)
+        self.assertCounts(1, 0)
+
+        task.assignee = self.second
+        task.save()
+        self.assertCounts(0, 1)
+
+        task.status = TaskStatus.DONE
+        task.save()
+        self.assertCounts(0, 0)
+
+        task.status = TaskStatus.IN_PROGRESS
+        task.save(update_fields=["status"])
+        self.assertCounts(0, 1)
+
+        task.delete()
+        self.assertCounts(0, 0)
+
+    def test_queryset_update(self):
+        self.create_task(assignee=self.first)
+        self.create_task(assignee=self.first, status=TaskStatus.TODO)
+
+        Task.objects.update(status=TaskStatus.IN_PROGRESS)
+        self.assertCounts(2, 0)
+
+        Task.objects.update(assignee=self.second)
+        self.assertCounts(0, 2)
+
+        Task.objects.filter(status=TaskStatus.IN_PROGRESS).update(
+            status=TaskStatus.DONE
+        )
+        self.assertCounts(0, 0)
+
+    def test_bulk_operations(self):
+        tasks = Task.objects.bulk_create(
+            [
+                Task(name="1", deadline="2025-12-31", assignee=self.first),
+                Task(
+                    name="2",
+                    deadline="2025-12-31",
+                    assignee=self.first,
+                    status=TaskStatus.IN_PROGRESS,
+                ),
+                Task(
+                    name="3",
+                    deadline="2025-12-31",
+                    assignee=self.second,
+                    status=TaskStatus.IN_PROGRESS,
+                ),
+            ]
+        )
+        self.assertCounts(1, 1)
+
+        for task in tasks:
+            task.status = TaskStatus.IN_PROGRESS
+            task.assignee = self.second
+        Task.objects.bulk_update(tasks, ["status", "assignee"])
+        self.assertCounts(0, 3)
+
+        Task.objects.filter(pk__in=[tasks[0].pk, tasks[1].pk]).delete()
+        self.assertCounts(0, 1)
+
+    def test_bulk_create_ignore_conflicts(self):
+        existing = self.create_task(assignee=self.first)
+        Task.objects.bulk_create(
+            [
+                # Строка с существующим id пропускается и счетчик не меняет
+                Task(
+                    id=existing.id,
+                    name="Дубль",
+                    deadline="2025-12-31",
+                    assignee=self.first,
+                    status=TaskStatus.IN_PROGRESS,
+                ),
+                Task(
+                    name="Новая",
+                    deadline="2025-12-31",
+                    assignee=self.second,
+                    status=TaskStatus.IN_PROGRESS,
+                ),
+            ],
+            ignore_conflicts=True,
+        )
+        self.assertCounts(1, 1)
+        self.assertEqual(list(find_counter_drift()), [])
+
+    def test_recount_repairs_drift(self):
+        self.create_task(assignee=self.first)
+        Employee.objects.update(active_task_count=5)
+
+        call_command("recount_active_tasks", stdout=StringIO())
+        self.assertCounts(1, 0)
+
+
+@override_settings(TASK_CHANGES_SAFETY_WINDOW=5)
+class TestWorkloadView(TestCase):
+    """
+    Проверяет признак устаревания материализованного представления нагрузки
+    и подсчет по таблице задач там, где представления нет.
+    """
+
+    def test_live_counts_for_requested_employees(self):
+        employee = Employee.objects.create(full_name="Иванов", position="A")
+        other = Employee.objects.create(full_name="Петров", position="A")
+        for assignee in (employee, other):
+            Task.objects.create(
+                name="Задача",
+                assignee=assignee,
+                status=TaskStatus.IN_PROGRESS,
+                deadline="2025-12-01",
+            )
+        self.assertEqual(
+            live_counts([employee.id]), {(employee.id, TaskStatus.IN_PROGRESS): 1}
+        )
+
+    def test_staleness_by_last_write(self):
+        def stale(refreshed):
+            with mock.patch("tasks.workload_view.refreshed_at", return_value=refreshed):
+                return is_stale()
+
+        now = timezone.now()
+        # Обновления еще не было - представление считается устаревшим
+        self.assertTrue(stale(None))
+        # Записей нет
+        self.assertFalse(stale(now))
+
+        task = Task.objects.create(name="Задача", deadline="2025-12-01")
+        self.assertTrue(stale(now - timedelta(minutes=1)))
+        # Запись незадолго до начала обновления могла быть не зафиксирована
+        self.assertTrue(stale(task.updated_at + timedelta(seconds=3)))
+        self.assertFalse(stale(task.updated_at + timedelta(seconds=10)))
+        # Задач не осталось, удаление видно по надгробию
+        task.delete()
+        deleted_at = TaskTombstone.objects.get().deleted_at
+        self.assertTrue(stale(deleted_at + timedelta(seconds=3)))
+        self.assertFalse(stale(deleted_at + timedelta(seconds=10)))
+
+    def test_refresh_command_requires_view(self):
+        with self.assertRaises(CommandError):
+            call_command("refresh_workload_view", stdout=StringIO())
+
+
+class TestTaskAdmin(TestCase):
+    """
+    Проверяет админку задач: число запросов списка, виджеты связей
+    и массовую смену статуса.
+    """
+
+    def setUp(self):
+        user = get_user_model().objects.create_superuser("admin", "a@a.ru", "pass")
+        self.client.force_login(user)
+        self.employee = Employee.objects.create(full_name="Иванов", position="A")
+        self.other = Employee.objects.create(full_name="Петров", position="B")
+
+    def create_tasks(self, count, **kwargs):
+        return Task.objects.bulk_create(
+            Task(name=f"Задача {i}", deadline="2025-12-01", **kwargs)
+            for i in range(count)
+        )
+
+    def test_changelist_query_count_is_flat(self):
+        url = reverse("admin:tasks_task_changelist")
+        self.create_tasks(3, assignee=self.employee)
+        with CaptureQueriesContext(connection) as small:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        self.create_tasks(30, assignee=self.other)
+        with CaptureQueriesContext(connection) as large:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(len(small), len(large))
+
+    def test_change_form_uses_autocomplete(self):
+        task = self.create_tasks(1, assignee=self.employee)[0]
+        response = self.client.get(reverse("admin:tasks_task_change", args=[task.id]))
+        self.assertEqual(response.status_code, 200)
+        # Выбранный исполнитель есть в форме, остальные сотрудники - нет
+        self.assertContains(response, "Иванов")
+        self.assertNotContains(response, "Петров")
+        self.assertContains(response, "admin-autocomplete")
+
+    def test_search_and_filters(self):
+        url = reverse("admin:tasks_task_changelist")
+        for params in ({"q": "Задача"}, {"q": "42"}, {"status__exact": "todo"}):
+            self.assertEqual(self.client.get(url, params).status_code, 200)
+
+    def test_bulk_status_actions(self):
+        assigned = self.create_tasks(2, assignee=self.employee)
+        unassigned = self.create_tasks(1)
+        ids = [task.id for task in assigned + unassigned]
+        url = reverse("admin:tasks_task_changelist")
+
+        self.client.post(url, {"action": "mark_in_progress", "_selected_action": ids})
+        self.employee.refresh_from_db()
+        self.assertEqual(self.employee.active_task_count, 2)
+
+        self.client.post(url, {"action": "mark_done", "_selected_action": ids})
+        statuses = dict(Task.objects.filter(id__in=ids).values_list("id", "status"))
+        # Задачу без исполнителя завершить нельзя, она осталась в работе
+        self.assertEqual(statuses[unassigned[0].id], TaskStatus.IN_PROGRESS)
+        self.assertEqual(statuses[assigned[0].id], TaskStatus.DONE)
+        self.employee.refresh_from_db()
+        self.assertEqual(self.employee.active_task_count, 0)
+
+    @override_settings(ADMIN_EXACT_COUNT_LIMIT=5)
+    def test_paginator_count_is_bounded(self):
+        self.create_tasks(8)
+        paginator = EstimatedCountPaginator(Task.objects.order_by("id"), 2)
+        self.assertEqual(paginator.count, 5)
+        paginator = EstimatedCountPaginator(
+            Task.objects.filter(id__lt=0).order_by("id"), 2
+        )
+        self.assertEqual(paginator.count, 0)
+
+
+class TestOpenApiSchema(TestCase):
+    """
+    Проверяет, что сохраненная схема OpenAPI совпадает с кодом
+    и отдается с ETag без повторной генерации.
+    """
+
+    def setUp(self):
+        for cached in (stored_schema, schema_document):
+            cached.cache_clear()
+            self.addCleanup(cached.cache_clear)
+
+    def test_stored_schema_matches_code(self):
+        # При расхождении: python manage.py openapi_schema
+        call_command("openapi_schema", "--check", stdout=StringIO())
+
+    def test_schema_is_generated_once(self):
+        url = reverse("schema")
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "openapi.yaml")
+            with override_settings(OPENAPI_SCHEMA_FILE=path), mock.patch(
+                "config.schema.generate_schema", return_value=b"openapi: 3.0.3\n"
+            ) as generate:
+                first = self.client.get(url)
+                second = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+                as_json = self.client.get(url, {"format": "json"})
+
+        # Файла нет - схема строится при первом запросе и только один раз
+        generate.assert_called_once()
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.content, b"openapi: 3.0.3\n")
+        self.assertFalse(first["ETag"].startswith("W/"))
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(json.loads(as_json.content), {"openapi": "3.0.3"})
+        self.assertNotEqual(as_json["ETag"], first["ETag"])
+
+    def test_drift_is_reported(self):
+        with tempfile.NamedTemporaryFile(suffix=".yaml") as file:
+            file.write(b"openapi: 3.0.3\n")
+            file.flush()
+            with self.assertRaises(CommandError):
+                call_command(
+                    "openapi_schema", "--check", "--file", file.name, stdout=StringIO()
+                )
+
+
+class TestArchival(APITestCase):
+    """
+    Проверяет перенос закрытых задач в архив, архивный эндпоинт
+    и списки задач с ?include_archived=1.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.employee = Employee.objects.create(full_name="Иванов", position="A")
+        # Закрытый родитель с закрытым потомком - уходят в архив оба
+        self.parent = Task.objects.create(
+            name="Родитель", status=TaskStatus.DONE, deadline="2025-12-31"
+        )
+        self.child = Task.objects.create(
+            name="Потомок",
+            parent=self.parent,
+            assignee=self.employee,
+            status=TaskStatus.CANCELED,
+            deadline="2025-12-01",
+        )
+        # Закрытая задача с открытым потомком остается в рабочей таблице
+        self.blocked = Task.objects.create(
+            name="С открытым потомком", status=TaskStatus.DONE, deadline="2025-12-31"
+        )
+        self.open = Task.objects.create(
+            name="Открытая", parent=self.blocked, deadline="2025-12-01"
+        )
+
+    def archive(self):
+        # Граница в будущем: все закрытые задачи старше нее
+        return archive_tasks(timezone.now() + timedelta(minutes=1), batch_size=1)
+
+    def test_archive_keeps_parent_links(self):
+        self.assertEqual(self.archive(), 2)
+
+        self.assertEqual(
+            set(Task.objects.values_list("id", flat=True)),
+            {self.blocked.id, self.open.id},
+        )
+        archived = ArchivedTask.objects.get(id=self.child.id)
+        self.assertEqual(archived.parent_id, self.parent.id)
+        self.assertEqual(archived.assignee_id, self.employee.id)
+        self.assertTrue(ArchivedTask.objects.filter(id=self.parent.id).exists())
+        # Для ленты изменений перенесенные задачи удалены, по одному надгробию
+        self.assertEqual(
+            sorted(TaskTombstone.objects.values_list("task_id", flat=True)),
+            sorted([self.parent.id, self.child.id]),
+        )
+        # Повторный запуск ничего не переносит
+        self.assertEqual(self.archive(), 0)
+
+    def test_clear_data_removes_archive(self):
+        self.archive()
+        clear_data()
+        self.assertFalse(ArchivedTask.objects.exists())
+        self.assertFalse(Employee.objects.exists())
+
+    def test_recent_tasks_stay(self):
+        out = StringIO()
+        call_command("archive_tasks", stdout=out)
+        self.assertIn("Всего перенесено в архив: 0", out.getvalue())
+        self.assertFalse(ArchivedTask.objects.exists())
+
+    def test_archive_endpoint(self):
+        self.archive()
+        response = self.client.get(reverse("archived-task-list"), {"status": "done"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item["id"] for item in response.data["results"]], [self.parent.id]
+        )
+        response = self.client.get(
+            reverse("archived-task-detail", args=[self.child.id])
+        )
+        self.assertEqual(response.data["parent"], self.parent.id)
+        self.assertIsNotNone(response.data["archived_at"])
+        # Только чтение
+        response = self.client.delete(
+            reverse("archived-task-detail", args=[self.child.id])
+        )
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    def test_list_include_archived(self):
+        self.archive()
+        url = reverse("task-list")
+        response = self.client.get(url)
+        self.assertEqual(len(response.data["results"]), 2)
+
+        # Страницы по 1 задаче проходят обе таблицы в порядке id
+        ids, params = [], {"include_archived": "1", "page_size": 1}
+        while url:
+            response = self.client.get(url, params)
+            ids.extend(item["id"] for item in response.data["results"])
+            url, params = response.data["next"], None
+        expected = [self.parent.id, self.child.id, self.blocked.id, self.open.id]
+        self.assertEqual(ids, expected)
+
+        # Фильтры применяются к обеим таблицам
+        response = self.client.get(
+            reverse("task-list"),
+            {"include_archived": "1", "status": "done,canceled", "ordering": "-id"},
+        )
+        self.assertEqual(
+            [item["id"] for item in response.data["results"]],
+            [self.blocked.id, self.child.id, self.parent.id],
+        )
+
+    async def test_async_list_include_archived(self):
+        await sync_to_async(self.archive)()
+        query = "?include_archived=1&page_size=3"
+        sync_response = await self.async_client.get(reverse("task-list") + query)
+        async_response = await self.async_client.get(reverse("async-task-list") + query)
+        self.assertEqual(
+            async_response.content.decode().replace("/async", ""),
+            sync_response.content.decode(),
+        )
+
+
+class TestImportTasksCommand(TestCase):
+    """
+    Набор тестов для потокового импорта задач.
+    """
+
+    def write_file(self, suffix, content):
+        handle = tempfile.NamedTemporaryFile(
+            "w", suffix=suffix, encoding="utf-8", delete=False
+        )
+        with handle:
+            handle.write(content)
+        self.addCleanup(os.remove, handle.name)
+        return handle.name
+
+    def test_import_csv_with_forward_parent(self):
+        employees = self.write_file(
+            ".csv", "id,full_name,position\n7,Импортированный,Инженер\n"
+        )
+        tasks = self.write_file(
+            ".csv",
+            "id,name,parent_id,assignee_id,status,deadline\n"
+            # Дочерняя задача идет раньше родительской
+            "101,Дочерняя,100,7,in_progress,2099-01-01\n"
+            "100,Родительская,,,todo,2099-12-31\n",
+        )
+        out = StringIO()
+        call_command("import_tasks", tasks, employees=employees, stdout=out)
+
+        child = Task.objects.get(pk=101)
+        self.assertEqual(child.parent_id, 100)
+        self.assertEqual(child.assignee.full_name, "Импортированный")
+        self.assertEqual(child.assignee.active_task_count, 1)
+        self.assertIn("строк/с", out.getvalue())
+
+    def test_import_ndjson_updates_existing(self):
+        task = Task.objects.create(name="Старое имя", deadline="2099-01-01")
+        tasks = self.write_file(
+            ".ndjson",
+            f'{{"id": {task.id}, "name": "Новое имя", "deadline": "2099-02-01"}}\n',
+        )
+        call_command("import_tasks", tasks, stdout=StringIO())
+        task.refresh_from_db()
+        self.assertEqual(task.name, "Новое имя")
+
+    def test_invalid_rows_cancel_import(self):
+        tasks = self.write_file(
+            ".csv",
+            "id,name,parent_id,assignee_id,status,deadline\n"
+            "1,Корректная,,,todo,2099-01-01\n"
+            "2,Без исполнителя,,,done,2099-01-01\n"
+            "3,Позже родителя,1,,todo,2099-05-01\n",
+        )
+        with self.assertRaises(CommandError):
+            call_command("import_tasks", tasks, stdout=StringIO(), stderr=StringIO())
+        self.assertFalse(Task.objects.exists())
+
+        call_command(
+            "import_tasks",
+            tasks,
+            skip_invalid=True,
+            stdout=StringIO(),
+            stderr=StringIO(),
+        )
+        self.assertEqual(list(Task.objects.values_list("id", flat=True)), [1])
+
+    def test_parent_cycles_are_rejected(self):
+        root = Task.objects.create(name="Корень", deadline="2099-12-31")
+        child = Task.objects.create(name="Дочерняя", parent=root, deadline="2099-12-31")
+        tasks = self.write_file(
+            ".csv",
+            "id,name,parent_id,assignee_id,status,deadline\n"
+            "1001,Сама себе родитель,1001,,todo,2099-01-01\n"
+            "1002,Цикл A,1003,,todo,2099-01-01\n"
+            "1003,Цикл B,1002,,todo,2099-01-01\n"
+            "1004,Потомок цикла,1002,,todo,2099-01-01\n"
+            # Цикл через задачу, которой нет в файле
+            f"{root.id},Корень,{child.id},,todo,2099-12-31\n"
+            f"1005,Корректная,{root.id},,todo,2099-01-01\n",
+        )
+        with self.assertRaisesMessage(CommandError, "своего потомка"):
+            call_command("import_tasks", tasks, stdout=StringIO(), stderr=StringIO())
+
+        call_command(
+            "import_tasks",
+            tasks,
+            skip_invalid=True,
+            stdout=StringIO(),
+            stderr=StringIO(),
+        )
+        self.assertEqual(
+            sorted(Task.objects.values_list("id", flat=True)),
+            sorted([root.id, child.id, 1005]),
+        )
+        root.refresh_from_db()
+        self.assertIsNone(root.parent_id)
+
+    def test_skip_many_invalid_rows(self):
+        """Отбракованных строк больше, чем параметров в одном запросе SQLite."""
+        count = 40000
+        lines = "".join(
+            f"{i},Задача,,999999,todo,2099-01-01\n" for i in range(1, count + 1)
+        )
+        tasks = self.write_file(
+            ".csv",
+            "id,name,parent_id,assignee_id,status,deadline\n"
+            + lines
+            + f"{count + 1},Корректная,,,todo,2099-01-01\n",
+        )
+        call_command(
+            "import_tasks",
+            tasks,
+            skip_invalid=True,
+            stdout=StringIO(),
+            stderr=StringIO(),
+        )
+        self.assertEqual(list(Task.objects.values_list("id", flat=True)), [count + 1])
+
+    def test_past_deadlines(self):
+        tasks = self.write_file(
+            ".csv",
+            "id,name,parent_id,assignee_id,status,deadline\n1,Старая,,,todo,2000-01-01\n",
+        )
+        with self.assertRaises(CommandError):
+            call_command("import_tasks", tasks, stdout=StringIO(), stderr=StringIO())
+        call_command(
+            "import_tasks", tasks, allow_past_deadlines=True, stdout=StringIO()
+        )
+        self.assertTrue(Task.objects.filter(pk=1).exists())
+
+
+class TestExport(APITestCase):
+    """
+    Набор тестов для потоковой выгрузки задач и сотрудников.
+    """
+
+    def setUp(self):
+        self.employee = Employee.objects.create(full_name="Иванов, Иван", position="A")
+        self.parent = Task.objects.create(name="Родитель", deadline="2099-12-31")
+        Task.objects.create(
+            name="Дочерняя",
+            parent=self.parent,
+            assignee=self.employee,
+            deadline="2099-12-01",
+        )
+
+    def test_export_csv_with_names(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("task-export"), {"with_names": 1})
+            rows = list(
+                csv.reader(b"".join(response.streaming_content).decode().splitlines())
+            )
+        self.assertEqual(rows[0][-2:], ["assignee_name", "parent_name"])
+        self.assertEqual(rows[2][-2:], ["Иванов, Иван", "Родитель"])
+        self.assertEqual(len(rows), 3)
+
+    def test_export_ndjson(self):
+        response = self.client.get(reverse("task-export"), {"file_format": "ndjson"})
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertEqual(json.loads(lines[1])["parent_id"], self.parent.id)
+        self.assertEqual(json.loads(lines[1])["deadline"], "2099-12-01")
+
+    def test_export_employees_command(self):
+        out = StringIO()
+        call_command("export_data", "employees", stdout=out)
+        rows = list(csv.reader(out.getvalue().splitlines()))
+        self.assertEqual(rows[0], ["id", "full_name", "position", "active_task_count"])
+        self.assertEqual(rows[1][1], "Иванов, Иван")
+
+
+class TestTaskHierarchy(APITestCase):
+    """
+    Набор тестов для эндпоинтов subtree и ancestors.
+    """
+
+    def setUp(self):
+        self.root = Task.objects.create(name="Корень", deadline="2099-12-31")
+        self.child = Task.objects.create(
+            name="Дочерняя", parent=self.root, deadline="2099-12-01"
+        )
+        self.grandchild = Task.objects.create(
+            name="Внучатая",
+            parent=self.child,
+            status=TaskStatus.IN_PROGRESS,
+            deadline="2099-11-01",
+        )
+
+    def test_subtree(self):
+        url = reverse("task-subtree", args=[self.root.id])
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(
+            [(node["id"], node["depth"], node["path"]) for node in response.data],
+            [
+                (self.root.id, 0, [self.root.id]),
+                (self.child.id, 1, [self.root.id, self.child.id]),
+                (
+                    self.grandchild.id,
+                    2,
+                    [self.root.id, self.child.id, self.grandchild.id],
+                ),
+            ],
+        )
+
+    def test_subtree_filters(self):
+        url = reverse("task-subtree", args=[self.root.id])
+        response = self.client.get(url, {"max_depth": 1})
+        self.assertEqual(len(response.data), 2)
+
+        response = self.client.get(url, {"status": TaskStatus.IN_PROGRESS})
+        self.assertEqual([node["id"] for node in response.data], [self.grandchild.id])
+
+    def test_ancestors(self):
+        url = reverse("task-ancestors", args=[self.grandchild.id])
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(
+            [node["path"] for node in response.data],
+            [
+                [self.grandchild.id],
+                [self.grandchild.id, self.child.id],
+                [self.grandchild.id, self.child.id, self.root.id],
+            ],
+        )
+
+    def test_cycle_stops_walk(self):
+        """Цикл, записанный в базу в обход проверок, обход останавливает сразу."""
+        Task.objects.filter(pk=self.root.id).update(parent=self.grandchild)
+        ids = [self.root.id, self.child.id, self.grandchild.id]
+        subtree = fetch_subtree(self.root.id, 10_000)
+        self.assertEqual([row.id for row in subtree], ids)
+        response = self.client.get(reverse("task-subtree", args=[self.root.id]))
+        self.assertEqual([node["id"] for node in response.data], ids)
+
+        ancestors = fetch_ancestors(self.root.id, 10_000)
+        self.assertEqual(
+            [(row.id, row.depth) for row in ancestors],
+            [(self.root.id, 0), (self.grandchild.id, 1), (self.child.id, 2)],
+        )
+        response = self.client.get(reverse("task-ancestors", args=[self.root.id]))
+        self.assertEqual(len(response.data), 3)
+
+        # Цикл выше задачи: внук -> сын -> корень -> сын
+        Task.objects.filter(pk=self.root.id).update(parent=self.child)
+        ancestors = fetch_ancestors(self.grandchild.id, 10_000)
+        self.assertEqual(
+            [row.id for row in ancestors],
+            [self.grandchild.id, self.child.id, self.root.id],
+        )
+
+    def test_not_found(self):
+        response = self.client.get(reverse("task-subtree", args=[0]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_large_trees_take_one_query(self):
+        """Дерево из 10 000 узлов - одна цепочка или один уровень - читается одним запросом."""
+        size = 10_000
+        first_id = self.grandchild.id + 1
+        Task.objects.bulk_create(
+            Task(
+                id=first_id + i,
+                name=f"Цепочка {i}",
+                parent_id=first_id + i - 1 if i else None,
+                deadline="2099-01-01",
+            )
+            for i in range(size)
+        )
+        with self.assertNumQueries(1):
+            deep = fetch_subtree(first_id, size)
+        self.assertEqual(len(deep), size)
+        self.assertEqual(deep[-1].depth, size - 1)
+
+        wide_root = Task.objects.create(name="Широкий корень", deadline="2099-01-01")
+        Task.objects.bulk_create(
+            Task(name=f"Лист {i}", parent=wide_root, deadline="2099-01-01")
+            for i in range(size)
+        )
+        with self.assertNumQueries(1):
+            wide = build_subtree(wide_root.id, size)
+        self.assertEqual(len(wide), size + 1)
+
+
+class TestImportantTasksQueryCount(APITestCase):
+    """
+    Проверяет, что число запросов эндпоинта "Важные задачи"
+    не растет вместе с количеством задач и сотрудников.
+    """
+
+    def create_important_tasks(self, count):
+        """Создает count важных задач, у каждой - активная дочерняя задача."""
+        for i in range(count):
+            employee = Employee.objects.create(full_name=f"Сотрудник {i}", position="A")
+            parent = Task.objects.create(name=f"Важная {i}", deadline="2025-12-31")
+            Task.objects.create(
+                name=f"Дочерняя {i}",
+                parent=parent,
+                assignee=employee,
+                status=TaskStatus.IN_PROGRESS,
+                deadline="2025-12-01",
+            )
+
+    def test_query_count_is_flat(self):
+        url = reverse("task-important-tasks")
+        self.create_important_tasks(2)
+        with self.assertNumQueries(4):
+            response = self.client.get(url)
+        self.assertEqual(len(response.data), 2)
+
+        self.create_important_tasks(40)
+        with self.assertNumQueries(4):
+            response = self.client.get(url)
+        self.assertEqual(len(response.data), 42)
+
+
+class TestPlanAssignments(APITestCase):
+    """
+    Набор тестов для плана назначений исполнителей "важным" задачам.
+    """
+
+    url = reverse_lazy("task-plan-assignments")
+
+    def setUp(self):
+        self.free1 = Employee.objects.create(full_name="Свободный 1", position="A")
+        self.free2 = Employee.objects.create(full_name="Свободный 2", position="A")
+        self.worker = Employee.objects.create(full_name="Исполнитель", position="B")
+        # Три важные задачи: у первых двух дочерние задачи в работе у worker,
+        # у третьей дочерняя задача в работе без исполнителя
+        self.important = []
+        for i, assignee in enumerate((self.worker, self.worker, None)):
+            parent = Task.objects.create(
+                name=f"Важная {i}", deadline=f"2025-12-0{i + 1}"
+            )
+            Task.objects.create(
+                name=f"Дочерняя {i}",
+                parent=parent,
+                assignee=assignee,
+                status=TaskStatus.IN_PROGRESS,
+                deadline="2025-11-01",
+            )
+            self.important.append(parent)
+
+    def test_plan_updates_loads(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, {}, format="json")
+        # Три запроса на чтение, кроме точки сохранения транзакции
+        selects = [q for q in queries if q["sql"].startswith("SELECT")]
+        self.assertEqual(len(selects), 3)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data["applied"])
+        plan = [
+            (item["task_id"], item["assignee"], item["assignee_load"])
+            for item in response.data["assignments"]
+        ]
+        # worker (2 задачи) укладывается в лимит min+2 только для первой задачи,
+        # после нее его нагрузка 3, и вторая уходит наименее загруженному
+        self.assertEqual(
+            plan,
+            [
+                (self.important[0].id, self.worker.id, 3),
+                (self.important[1].id, self.free2.id, 1),
+                (self.important[2].id, self.free1.id, 1),
+            ],
+        )
+        self.assertTrue(response.data["assignments"][0]["child_assignee"])
+        self.assertFalse(response.data["assignments"][1]["child_assignee"])
+        # Без apply ничего не записывается
+        self.assertFalse(
+            Task.objects.filter(
+                id__in=[task.id for task in self.important], assignee__isnull=False
+            ).exists()
+        )
+
+    def test_apply_plan(self):
+        response = self.client.post(self.url, {"apply": True}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data["applied"])
+        assigned = dict(
+            Task.objects.filter(
+                id__in=[task.id for task in self.important]
+            ).values_list("id", "assignee_id")
+        )
+        self.assertEqual(
+            assigned,
+            {
+                self.important[0].id: self.worker.id,
+                self.important[1].id: self.free2.id,
+                self.important[2].id: self.free1.id,
+            },
+        )
+        # Назначенные задачи не в работе, счетчики активных задач прежние
+        self.worker.refresh_from_db()
+        self.assertEqual(self.worker.active_task_count, 2)
+
+    def test_plan_without_employees(self):
+        Employee.objects.all().delete()
+        response = self.client.post(self.url, {}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_plan_balances_loads(self):
+        employees = {1: ("A", 0), 2: ("B", 0), 3: ("C", 5)}
+        tasks = [{"id": i, "name": f"T{i}", "deadline": None} for i in range(10)]
+        plan = plan_assignments(tasks, [], employees)
+        loads = {}
+        for item in plan:
+            loads[item["assignee"]] = loads.get(item["assignee"], 0) + 1
+        # Каждое назначение сдвигает минимум, и C получает задачи только
+        # после того, как A и B догонят его нагрузку
+        self.assertEqual(loads, {1: 5, 2: 5})
+        self.assertEqual(plan_assignments(tasks, [], {}), [])
+
+
+class TestAnalyticsCache(APITestCase):
+    """
+    Проверяет кэширование аналитических эндпоинтов и инвалидацию по сигналам.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.employee = Employee.objects.create(full_name="Иванов И.И.", position="A")
+        self.parent = Task.objects.create(name="Важная", deadline="2025-12-31")
+        self.child = Task.objects.create(
+            name="Дочерняя",
+            parent=self.parent,
+            assignee=self.employee,
+            status=TaskStatus.IN_PROGRESS,
+            deadline="2025-12-01",
+        )
+        self.url = reverse("task-important-tasks")
+
+    def test_second_request_is_served_from_cache(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first["X-Cache"], "MISS")
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(second.data, first.data)
+
+        busy_url = reverse("employee-busy-employees")
+        self.client.get(busy_url)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(busy_url)["X-Cache"], "HIT")
+
+    def test_unrelated_task_keeps_important_tasks_cached(self):
+        self.client.get(self.url)
+        Task.objects.create(
+            name="Готово", status=TaskStatus.DONE, deadline="2025-12-31"
+        )
+        self.assertEqual(self.client.get(self.url)["X-Cache"], "HIT")
+
+    def test_status_change_invalidates_by_previous_state(self):
+        self.client.get(self.url)
+        self.child.status = TaskStatus.DONE
+        self.child.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data, [])
+
+    def test_bulk_operations_and_employees_invalidate(self):
+        self.client.get(self.url)
+        Task.objects.filter(pk=self.child.pk).update(status=TaskStatus.DONE)
+        self.assertEqual(self.client.get(self.url)["X-Cache"], "MISS")
+
+        Employee.objects.create(full_name="Петров П.П.", position="B")
+        self.assertEqual(self.client.get(self.url)["X-Cache"], "MISS")
+
+    def test_invalidation_runs_again_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.child.status = TaskStatus.DONE
+            self.child.save()
+            version = get_version(IMPORTANT_TASKS)
+        self.assertTrue(callbacks)
+        # Значение, построенное до фиксации, после нее уже не будет найдено
+        self.assertNotEqual(get_version(IMPORTANT_TASKS), version)
+
+    def test_stats_endpoint(self):
+        self.client.get(self.url)
+        self.client.get(self.url)
+        stats = self.client.get(reverse("analytics-cache-stats")).data
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["rebuilds"], 1)
+
+
+class TestTaskChanges(APITestCase):
+    """
+    Проверяет ленту изменений /tasks/changes/ и надгробия удаленных задач.
+    """
+
+    url = reverse_lazy("task-changes")
+
+    def setUp(self):
+        self.employee = Employee.objects.create(full_name="Иванов И.И.", position="A")
+        self.parent = Task.objects.create(name="Родитель", deadline="2025-12-31")
+        self.child = Task.objects.create(
+            name="Дочерняя", parent=self.parent, deadline="2025-12-31"
+        )
+        self.other = Task.objects.create(
+            name="Другая", assignee=self.employee, deadline="2025-12-31"
+        )
+
+    def sync(self, since=None, page_size=100):
+        params = {"page_size": page_size}
+        if since:
+            params["since"] = since
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_pages_and_incremental_changes(self):
+        first = self.sync(page_size=2)
+        self.assertTrue(first["has_more"])
+        second = self.sync(first["since"], page_size=2)
+        self.assertFalse(second["has_more"])
+        ids = [item["id"] for item in first["results"] + second["results"]]
+        self.assertEqual(ids, [self.parent.id, self.child.id, self.other.id])
+        self.assertIn("updated_at", second["results"][0]["task"])
+
+        # Без новых изменений лента пуста
+        self.assertEqual(self.sync(second["since"])["results"], [])
+
+        Task.objects.filter(pk=self.other.pk).update(name="Переименована")
+        changes = self.sync(second["since"])
+        self.assertEqual(
+            [(item["op"], item["id"]) for item in changes["results"]],
+            [("upsert", self.other.id)],
+        )
+
+        # Удаление: надгробие и обнуленная ссылка у дочерней задачи
+        parent_id = self.parent.id
+        self.parent.delete()
+        self.employee.delete()
+        changes = self.sync(changes["since"])
+        self.assertEqual(
+            sorted((item["op"], item["id"]) for item in changes["results"]),
+            [
+                ("delete", parent_id),
+                ("upsert", self.child.id),
+                ("upsert", self.other.id),
+            ],
+        )
+        by_id = {item["id"]: item for item in changes["results"]}
+        self.assertIsNone(by_id[self.child.id]["task"]["parent"])
+        self.assertIsNone(by_id[self.other.id]["task"]["assignee"])
+
+    def test_late_commit_is_not_skipped(self):
+        """
+        Строка, время записи которой раньше позиции курсора, а фиксация -
+        позже выдачи курсора, все равно попадает в ленту.
+        """
+        since = self.sync()["since"]
+        stamped = timezone.now() - timedelta(hours=1)
+        late = Task.objects.create(name="Импорт", deadline="2025-12-31")
+        Task.objects.filter(pk=late.pk).update(updated_at=stamped)
+        TaskTombstone.objects.create(task_id=0, deleted_at=stamped)
+        changes = self.sync(since)["results"]
+        self.assertEqual(
+            [(item["op"], item["id"]) for item in changes],
+            [("upsert", late.id), ("delete", 0)],
+        )
+        self.assertEqual(datetime.fromisoformat(changes[0]["changed_at"]), stamped)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.url, {"since": "не курсор"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TestConditionalGet(APITestCase):
+    """
+    Проверяет ETag и ответ 304 на основе версий данных.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.employee = Employee.objects.create(full_name="Иванов И.И.", position="A")
+        self.task = Task.objects.create(
+            name="Задача", assignee=self.employee, deadline="2025-12-31"
+        )
+        self.url = reverse("task-list")
+
+    def test_not_modified_without_queries(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("Last-Modified", response)
+        etag = response["ETag"]
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+        self.assertFalse(response.content)
+
+        # Другой URL - другой тег при тех же данных
+        detail = self.client.get(reverse("task-detail", args=[self.task.pk]))
+        self.assertNotEqual(detail["ETag"], etag)
+
+    def test_writes_change_etag(self):
+        etag = self.client.get(self.url)["ETag"]
+        self.task.name = "Новое название"
+        self.task.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response["ETag"]
+
+        # Удаление сотрудника обнуляет исполнителя задач без сигналов Task
+        self.employee.delete()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_analytics_and_employees(self):
+        for name in (
+            "task-important-tasks",
+            "employee-busy-employees",
+            "employee-list",
+        ):
+            with self.subTest(name):
+                url = reverse(name)
+                etag = self.client.get(url)["ETag"]
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_data_version(self):
+        url = reverse("data-version")
+        versions = self.client.get(url).data
+        Employee.objects.create(full_name="Петров П.П.", position="B")
+        changed = self.client.get(url).data
+        self.assertNotEqual(changed["data"], versions["data"])
+        self.assertNotEqual(changed["employees"], versions["employees"])
+        self.assertEqual(changed["tasks"], versions["tasks"])
+
+    @override_settings(
+        CACHES={"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+    )
+    def test_without_cache(self):
+        """Кэш, который ничего не хранит, отключает 304, но не ломает ответы."""
+        for name in ("task-list", "employee-list", "data-version"):
+            with self.subTest(name):
+                url = reverse(name)
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertIn("Last-Modified", response)
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class TestQueryInstrumentation(APITestCase):
+    """
+    Проверяет middleware инструментирования SQL и поиск N+1.
+    """
+
+    def setUp(self):
+        cache.clear()
+        employee = Employee.objects.create(full_name="Иванов И.И.", position="A")
+        self.tasks = Task.objects.bulk_create(
+            Task(name=f"Задача {i}", assignee=employee, deadline="2025-12-31")
+            for i in range(6)
+        )
+
+    @override_settings(SQL_INSTRUMENTATION_SAMPLE_RATE=1)
+    def test_headers_and_log(self):
+        with self.assertLogs("config.sql", "INFO") as logs:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse("task-important-tasks"))
+        self.assertEqual(response["X-Query-Count"], str(len(queries)))
+        self.assertIn("db;dur=", response["Server-Timing"])
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record["queries"], len(queries))
+        self.assertEqual(record["n_plus_one"], [])
+        self.assertLessEqual(len(record["slowest"]), 3)
+
+    @override_settings(SQL_INSTRUMENTATION_SAMPLE_RATE=0)
+    def test_not_sampled(self):
+        response = self.client.get(reverse("task-list"))
+        self.assertNotIn("X-Query-Count", response)
+
+    def test_repeated_query_shapes(self):
+        recorder = QueryRecorder(slow_limit=2)
+        with connection.execute_wrapper(recorder):
+            for task in self.tasks:
+                Task.objects.get(pk=task.pk)
+            list(Task.objects.filter(pk__in=[1, 2]))
+            list(Task.objects.filter(pk__in=[1, 2, 3]))
+        self.assertEqual(recorder.count, 8)
+        self.assertEqual(len(recorder.slowest_queries()), 2)
+        repeated = recorder.repeated_shapes(threshold=5)
+        self.assertEqual(len(repeated), 1)
+        self.assertEqual(repeated[0][1], 6)
+        # Списки IN разной длины - одна форма запроса
+        self.assertEqual(len(recorder.repeated_shapes(threshold=2)), 2)
+
+
+class TestValuesReader(APITestCase):
+    """
+    Проверяет, что списки через values() совпадают с выводом сериализаторов
+    байт в байт.
+    """
+
+    def setUp(self):
+        cache.clear()
+        call_command("seed", employees=6, tasks=40, seed=3, stdout=StringIO())
+        # Сотрудник без задач и задачи без родителя и исполнителя
+        Employee.objects.create(full_name="Без задач", position="A")
+
+    def render(self, data):
+        return JSONRenderer().render(data)
+
+    def test_same_output_as_serializers(self):
+        cases = [
+            (TaskSerializer, Task.objects.order_by("id")),
+            (
+                EmployeeSerializer,
+                Employee.objects.order_by("id").prefetch_related(
+                    Prefetch("tasks", Task.objects.order_by("id"))
+                ),
+            ),
+        ]
+        for serializer_class, queryset in cases:
+            with self.subTest(serializer_class.__name__):
+                reader = ValuesReader(serializer_class)
+                self.assertEqual(
+                    self.render(reader.serialize(reader.values(queryset))),
+                    self.render(serializer_class(queryset, many=True).data),
+                )
+
+    def test_endpoints_use_values_without_n_plus_one(self):
+        # Страница сотрудников и задачи всей страницы
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("employee-list") + "?include=tasks")
+        employees = Employee.objects.order_by("id").prefetch_related(
+            Prefetch("tasks", Task.objects.order_by("id"))
+        )
+        expected = EmployeeSerializer(employees, many=True).data
+        self.assertEqual(
+            response.content,
+            self.render({"next": None, "previous": None, "results": expected}),
+        )
+
+        response = self.client.get(reverse("task-list") + "?ordering=-deadline")
+        tasks = Task.objects.order_by("-deadline", "-id")[:100]
+        self.assertEqual(
+            json.loads(response.content)["results"],
+            json.loads(self.render(TaskSerializer(tasks, many=True).data)),
+        )
+
+
+class TestSeedAndBenchmark(TestCase):
+    """
+    Проверяет генератор данных и сравнение результатов замеров.
+    """
+
+    def snapshot(self):
+        """Данные без id и меток времени, которые зависят от базы"""
+        tasks = list(
+            Task.objects.order_by("id").values_list(
+                "name", "parent__name", "assignee__full_name", "status", "deadline"
+            )
+        )
+        return list(Employee.objects.values_list("full_name", "position")), tasks
+
+    def test_seed_is_deterministic_and_respects_hierarchy(self):
+        call_command(
+            "seed",
+            employees=10,
+            tasks=200,
+            depth=3,
+            fanout=4,
+            seed=7,
+            stdout=StringIO(),
+        )
+        first = self.snapshot()
+        self.assertEqual((len(first[0]), len(first[1])), (10, 200))
+
+        for task in Task.objects.filter(parent__isnull=True)[:3]:
+            nodes = build_subtree(task.id, 100)
+            self.assertLessEqual(max(node.depth for node in nodes), 2)
+            self.assertLessEqual(Task.objects.filter(parent=task).count(), 4)
+        self.assertEqual(list(find_counter_drift()), [])
+
+        call_command(
+            "seed",
+            employees=10,
+            tasks=200,
+            depth=3,
+            fanout=4,
+            seed=7,
+            clear=True,
+            stdout=StringIO(),
+        )
+        self.assertEqual(self.snapshot(), first)
+
+    def test_seed_deadlines_do_not_depend_on_today(self):
+        seed_data(2, 20)
+        first = self.snapshot()
+        self.assertTrue(
+            all(
+                SEED_EPOCH - timedelta(days=30)
+                <= deadline
+                <= SEED_EPOCH + timedelta(days=365)
+                for *_, deadline in first[1]
+            )
+        )
+        # Тот же seed в другой день дает те же сроки
+        with mock.patch("tasks.seeding.date") as fake_date:
+            fake_date.today.return_value = date(2030, 1, 1)
+            clear_data()
+            seed_data(2, 20)
+        self.assertEqual(self.snapshot(), first)
+
+        clear_data()
+        call_command(
+            "seed", "--epoch=2030-01-01", employees=2, tasks=20, stdout=StringIO()
+        )
+        shift = date(2030, 1, 1) - SEED_EPOCH
+        self.assertEqual(
+            [row[-1] - shift for row in self.snapshot()[1]],
+            [row[-1] for row in first[1]],
+        )
+
+    def test_measure_keeps_foreign_cache_keys(self):
+        """Замер мерит холодный ответ, но не очищает общий кэш."""
+        seed_data(3, 30)
+        cache.set("other-app:key", "value", None)
+        misses = get_stats()["misses"]
+        measure(APIClient(), reverse("task-important-tasks"), repeat=2)
+        # Прогревочный вызов и оба замера строят ответ заново
+        self.assertEqual(get_stats()["misses"] - misses, 3)
+        self.assertEqual(cache.get("other-app:key"), "value")
+
+    def test_run_and_compare(self):
+        results = run_benchmarks([(3, 30)], repeat=2)
+        self.assertIn("important-tasks", results["3x30"])
+        self.assertEqual(results["3x30"]["tasks-detail"]["queries"], 1)
+        self.assertEqual(results["3x30"]["serialize-tasks"]["rows"], 30)
+
+        baseline = json.loads(json.dumps(results))
+        self.assertEqual(compare_results(results, baseline), [])
+        stats = results["3x30"]["tasks-list"]
+        stats["queries"] += 1
+        stats["p50_ms"] = baseline["3x30"]["tasks-list"]["p50_ms"] * 2 + 10
+        self.assertEqual(len(compare_results(results, baseline)), 2)
+        results["3x30"]["serialize-employees"]["values_rows_per_sec"] = 0
+        self.assertEqual(len(compare_results(results, baseline)), 3)
+        search = results["3x30"]["search-tasks"]
+        self.assertEqual(search["term"], "отчет")
+        search["search_p50_ms"] = search["icontains_p50_ms"] * 2 + 10
+        self.assertEqual(len(compare_results(results, baseline)), 4)
+
+
+class TestQueryPlans(TestCase):
+    """
+    Проверяет через EXPLAIN, что аналитические запросы не делают
+    полный проход по таблице задач.
+    """
+
+    def test_analytic_queries_use_indexes(self):
+        employees = Employee.objects.bulk_create(
+            Employee(full_name=f"Сотрудник {i}", position="A") for i in range(20)
+        )
+        parents = Task.objects.bulk_create(
+            Task(name=f"Родитель {i}", deadline="2025-12-31") for i in range(50)
+        )
+        Task.objects.bulk_create(
+            Task(
+                name=f"Задача {i}",
+                deadline="2025-12-01",
+                parent=parents[i % len(parents)],
+                assignee=employees[i % len(employees)],
+                status=TaskStatus.values[i % len(TaskStatus.values)],
+            )
+            for i in range(500)
+        )
+
+        for name, plan, scans in check_query_plans():
+            with self.subTest(name):
+                self.assertEqual(scans, [], plan)
+
+        # Запрос без подходящего индекса проверка должна поймать
+        self.assertTrue(full_scans(Task.objects.filter(name="Задача 1").explain()))
+
+    def test_task_filters_use_indexes(self):
+        call_command("seed", employees=50, tasks=3000, seed=1, stdout=StringIO())
+        queries = filter_queries()
+        self.assertGreater(len(queries), 40)
+        for name, queryset in queries:
+            plan = queryset.explain()
+            with self.subTest(name):
+                self.assertEqual(full_scans(plan), [], plan)
+
+    def test_command_succeeds(self):
+        out = StringIO()
+        call_command("check_query_plans", stdout=out)
+        self.assertIn("Все запросы используют индексы", out.getvalue())
+
+
+class TestAsyncEndpoints(APITestCase):
+    """
+    Проверяет, что async-версии эндпоинтов отвечают так же, как синхронные.
+    """
+
+    def setUp(self):
+        cache.clear()
+        employees = Employee.objects.bulk_create(
+            Employee(full_name=f"Сотрудник {i}", position="A") for i in range(5)
+        )
+        for i in range(6):
+            parent = Task.objects.create(name=f"Важная {i}", deadline="2025-12-31")
+            Task.objects.create(
+                name=f"Дочерняя {i}",
+                parent=parent,
+                assignee=employees[i % len(employees)],
+                status=TaskStatus.IN_PROGRESS,
+                deadline="2025-12-01",
+            )
+
+    async def assert_same_response(self, sync_url, async_url):
+        sync_response = await self.async_client.get(sync_url)
+        cache.clear()
+        async_response = await self.async_client.get(async_url)
+        self.assertEqual(async_response.status_code, sync_response.status_code)
+        # Ссылки пагинации ведут каждая на свой эндпоинт
+        self.assertEqual(
+            async_response.content.decode().replace("/async", ""),
+            sync_response.content.decode(),
+        )
+        return async_response
+
+    async def test_responses_match_sync_endpoints(self):
+        cases = [
+            ("task-list", "?page_size=4"),
+            ("task-list", "?page_size=4&ordering=-deadline"),
+            ("task-list", "?page_size=2&status=in_progress&deadline__lte=2025-12-31"),
+            ("task-list", "?page_size=4&search=Важная"),
+            ("task-important-tasks", ""),
+            ("employee-list", "?page_size=2"),
+            ("employee-list", "?include=tasks&tasks_status=in_progress&tasks_limit=1"),
+            ("employee-list", "?fields=full_name&tasks_limit=0"),
+            ("employee-list", "?page_size=2&search=Сотрудник"),
+            ("employee-busy-employees", ""),
+            ("employee-busy-employees", "?page_size=2"),
+        ]
+        for name, query in cases:
+            with self.subTest(name + query):
+                await self.assert_same_response(
+                    reverse(name) + query, reverse(f"async-{name}") + query
+                )
+
+        # Вторая страница по курсору из ответа async-эндпоинта
+        response = await self.async_client.get(
+            reverse("async-task-list") + "?page_size=4"
+        )
+        next_url = json.loads(response.content)["next"]
+        await self.assert_same_response(
+            next_url.replace("/async", ""), next_url.replace("http://testserver", "")
+        )
+
+    async def test_important_tasks_cache_and_no_employees(self):
+        url = reverse("async-task-important-tasks")
+        self.assertEqual((await self.async_client.get(url))["X-Cache"], "MISS")
+        self.assertEqual((await self.async_client.get(url))["X-Cache"], "HIT")
+
+        await Employee.objects.all().adelete()
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_invalid_cursor(self):
+        response = await self.async_client.get(
+            reverse("async-task-list") + "?cursor=bad"
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(SQL_INSTRUMENTATION_SAMPLE_RATE=1)
+    async def test_instrumentation_counts_async_queries(self):
+        with self.assertLogs("config.sql", "INFO"):
+            response = await self.async_client.get(
+                reverse("async-employee-list") + "?include=tasks"
+            )
+        # Страница сотрудников и их задачи одним запросом
+        self.assertEqual(response["X-Query-Count"], "2")
+
+
+class TestEnvSample(TestCase):
+    """
+    Проверяет, что настройки загружаются из .env, скопированного из env.sample.
+    """
+
+    def test_empty_keys_use_defaults(self):
+        settings_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        with open(os.path.join(settings_dir, "env.sample"), encoding="utf-8") as file:
+            keys = [line.split("=", 1)[0] for line in file if "=" in line]
+        env = {**os.environ, **dict.fromkeys(keys, "")}
+        code = (
+            "import config.settings as s; "
+            "print(s.API_MAX_PAGE_SIZE, s.SQL_INSTRUMENTATION_SAMPLE_RATE, "
+            "s.CACHES['default']['BACKEND'])"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=settings_dir,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(
+            result.stdout.split(),
+            ["1000", "0.05", "django.core.cache.backends.locmem.LocMemCache"],
+        )
@@ -0,0 +1,88 @@
+"""
+Массовая смена статуса задач одним запросом
+Вместо PATCH на каждую задачу (проверка сериализатором и UPDATE на строку)
+выборка задач проверяется одним агрегирующим запросом, а статус меняется
+одним UPDATE ... WHERE ... RETURNING. По строкам RETURNING в той же
+транзакции обновляются счетчики активных задач сотрудников и версии кэша
+"""
+
+from django.db import connections, transaction
+from django.db.models import Count, Q, sql
+from django.utils import timezone
+
+from .models import Task, TaskStatus
+from .signals import tasks_bulk_changed
+from .workload import (
+    collect_deltas,
+    recount_active_task_counts,
+    shift_active_task_counts,
+)
+
+# Колонки, которые UPDATE возвращает через RETURNING
+RETURNING_COLUMNS = ("id", "assignee_id")
+
+
+def check_transition(queryset, status):
+    """
+    Одним агрегирующим запросом считает задачи выборки и те из них,
+    которые нельзя перевести в status: "Выполнено" требует исполнителя.
+    Возвращает (найдено задач, задач без исполнителя)
+    """
+    aggregates = {"matched": Count("pk")}
+    if status == TaskStatus.DONE:
+        # Уже выполненные задачи не меняются, их не проверяю
+        aggregates["unassigned"] = Count(
+            "pk", filter=Q(assignee__isnull=True) & ~Q(status=status)
+        )
+    result = queryset.order_by().aggregate(**aggregates)
+    return result["matched"], result.get("unassigned", 0)
+
+
+def update_returning(queryset, **values):
+    """
+    queryset.update(**values) одним UPDATE с RETURNING id, assignee_id
+    Запрос строит компилятор Django, как и в QuerySet.update(), RETURNING
+    дописывается к нему (PostgreSQL, SQLite 3.35+). Возвращает строки RETURNING
+    """
+    query = queryset.query.chain(sql.UpdateQuery)
+    query.add_update_values(values)
+    query.annotations = {}
+    compiler = query.get_compiler(queryset.db)
+    compiler.pre_sql_setup()
+    update_sql, params = compiler.as_sql()
+    table = compiler.quote_name_unless_alias(queryset.model._meta.db_table)
+    returning = ", ".join(
+        f"{table}.{compiler.quote_name_unless_alias(column)}"
+        for column in RETURNING_COLUMNS
+    )
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(f"{update_sql} RETURNING {returning}", params)
+        return cursor.fetchall()
+
+
+def transition_tasks(queryset, status):
+    """
+    Переводит задачи выборки в status одним UPDATE. Задачи, уже
+    находящиеся в этом статусе, не меняются; в "Выполнено" переводятся
+    только задачи с исполнителем, даже если исполнителя сняли после проверки.
+    Возвращает id измененных задач
+    """
+    queryset = queryset.exclude(status=status)
+    if status == TaskStatus.DONE:
+        queryset = queryset.filter(assignee__isnull=False)
+    with transaction.atomic(using=queryset.db):
+        rows = update_returning(queryset, status=status, updated_at=timezone.now())
+        if not rows:
+            return []
+        assignee_ids = [assignee_id for _, assignee_id in rows]
+        if status == TaskStatus.IN_PROGRESS:
+            # Все измененные задачи стали активными: дельта известна точно
+            shift_active_task_counts(
+                collect_deltas((None, assignee_id) for assignee_id in assignee_ids)
+            )
+        else:
+            # Прежний статус RETURNING не возвращает, поэтому счетчики
+            # затронутых сотрудников пересчитываются одним UPDATE
+            recount_active_task_counts(assignee_ids)
+        tasks_bulk_changed.send(sender=Task)
+    return [task_id for task_id, _ in rows]
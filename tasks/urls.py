@@ -1,8 +1,19 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
 
-from .views import TaskViewSet
+from . import async_views
+from .views import ArchivedTaskViewSet, TaskViewSet
 
 router = DefaultRouter()
 router.register(r"tasks", TaskViewSet, basename="task")
+router.register(r"archived-tasks", ArchivedTaskViewSet, basename="archived-task")
 
-urlpatterns = router.urls
+urlpatterns = router.urls + [
+    # Асинхронные версии эндпоинтов для запуска под ASGI (см. async_views.py)
+    path("async/tasks/", async_views.task_list, name="async-task-list"),
+    path(
+        "async/tasks/important-tasks/",
+        async_views.important_tasks,
+        name="async-task-important-tasks",
+    ),
+]
@@ -1,15 +1,54 @@
-from django.db.models import Count, Q
-from rest_framework import viewsets
+from django.conf import settings
+from django.db import transaction
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+from rest_framework import status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.response import Response
 
-from employees.models import Employee
+from config.cache import (
+    EMPLOYEES,
+    IMPORTANT_TASKS,
+    TASKS,
+    get_or_build,
+    mark_response,
+)
+from config.conditional import ConditionalGetMixin
+from config.fast_serializers import ValuesListMixin, ValuesReader
+from config.pagination import KeysetPagination
+from config.search import RANK_ORDERING, TrigramSearchFilter, search_requested
 
-from .models import Task, TaskStatus
-from .serializers import ImportantTaskSerializer, TaskSerializer
+from .changes import decode_since, fetch_changes
+from .exporting import export_response
+from .filters import (
+    TaskFilterBackend,
+    filter_tasks,
+    has_deadline_range,
+    include_archived,
+)
+from .hierarchy import build_ancestors, build_subtree
+from .models import ArchivedTask, Task
+from .serializers import (
+    ArchivedTaskSerializer,
+    AssignmentPlanSerializer,
+    ImportantTaskSerializer,
+    PlanAssignmentsRequestSerializer,
+    TaskChangesPageSerializer,
+    TaskSerializer,
+    TaskTransitionRequestSerializer,
+    TaskTransitionSerializer,
+    TaskTreeNodeSerializer,
+    prefetch_bulk_relations,
+)
+from .services import (
+    apply_assignment_plan,
+    build_assignment_plan,
+    build_important_tasks_report,
+)
+from .transitions import check_transition, transition_tasks
 
 
-class TaskViewSet(viewsets.ModelViewSet):
+class TaskViewSet(ConditionalGetMixin, ValuesListMixin, viewsets.ModelViewSet):
     """
     ViewSet для CRUD-операций с задачами
     Содержит кастомный эндпоинт для поиска "важных задач"
@@ -17,6 +56,69 @@ class TaskViewSet(viewsets.ModelViewSet):
 
     queryset = Task.objects.all()
     serializer_class = TaskSerializer
+    # Список читается через values() без создания моделей, ответ тот же
+    values_reader = ValuesReader(TaskSerializer)
+    # Фильтры ?status=, ?assignee=, ?parent=, ?deadline__gte/lte=, ?has_children=
+    # и поиск ?search= по наименованию (см. config/search.py)
+    filter_backends = [TaskFilterBackend, TrigramSearchFilter]
+    search_fields = ("name",)
+    # Допустимые значения ?ordering= для курсорной пагинации.
+    # id в конце делает сортировку уникальной, без этого курсор неоднозначен
+    keyset_orderings = {
+        "id": ("id",),
+        "-id": ("-id",),
+        "deadline": ("deadline", "id"),
+        "-deadline": ("-deadline", "-id"),
+    }
+    # Версии данных для ETag: задачи зависят только от задач (удаление
+    # сотрудника тоже меняет версию задач - у них обнуляется исполнитель)
+    etag_resources = (TASKS,)
+    etag_action_resources = {
+        "important_tasks": (IMPORTANT_TASKS,),
+        # Выгрузка с ?with_names=1 содержит ФИО сотрудников
+        "export": (TASKS, EMPLOYEES),
+        # Содержимое ленты меняется и без записи: строки выходят из окна
+        # безопасности по времени, поэтому ETag здесь неприменим
+        "changes": (),
+    }
+
+    @property
+    def keyset_ordering(self):
+        """
+        Сортировка списка по умолчанию. С поиском - по релевантности,
+        с фильтром по сроку - по сроку: тогда страница читается из индекса
+        (deadline, id) без сортировки
+        """
+        request = getattr(self, "request", None)
+        if search_requested(request):
+            return RANK_ORDERING
+        if request is not None and has_deadline_range(request.query_params):
+            return ("deadline", "id")
+        return ("id",)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "include_archived",
+                bool,
+                description="Вместе с архивными задачами (см. /archived-tasks/)",
+            )
+        ]
+    )
+    def list(self, request, *args, **kwargs):
+        """
+        Список задач. С ?include_archived=1 - вместе с архивными: фильтры
+        применяются к обеим таблицам, а страницы сливаются по курсору
+        """
+        if not include_archived(request.query_params):
+            return super().list(request, *args, **kwargs)
+        reader = self.get_values_reader()
+        querysets = [
+            reader.values(self.filter_queryset(queryset), *self.ordering_columns())
+            for queryset in (self.get_queryset(), ArchivedTask.objects.all())
+        ]
+        page = self.paginator.paginate_querysets(querysets, request, view=self)
+        return self.get_paginated_response(reader.serialize(page))
 
     @action(detail=False, methods=["get"], url_path="important-tasks")
     def important_tasks(self, request):
@@ -26,69 +128,283 @@ class TaskViewSet(viewsets.ModelViewSet):
         2. Подбирает для них подходящих исполнителей по заданным критериям.
         3. Возвращает результат в формате {Задача, Срок, [ФИО сотрудников]}.
         """
-        # Шаг 1: Нахожу "важные" задачи, как они определены в ТЗ
-        important_tasks = Task.objects.filter(
-            status=TaskStatus.TODO, children__status=TaskStatus.IN_PROGRESS
-        ).distinct()
 
-        # Шаг 2: Нахожу наименее загруженного сотрудника. Это мой "эталон" для сравнения
-        employees_load = Employee.objects.annotate(
-            active_tasks_count=Count(
-                "tasks", filter=Q(tasks__status=TaskStatus.IN_PROGRESS)
-            )
-        ).order_by("active_tasks_count")
+        def build():
+            # Весь отчет строится за фиксированное число запросов (см. services.py),
+            # поэтому время ответа не растет линейно с количеством важных задач
+            result_data = build_important_tasks_report()
+            if result_data is None:
+                return None
+            # Так как я сам формирую данные для вывода, я передаю их в 'instance'
+            # Вызов is_valid() здесь не нужен и привел бы к ошибке
+            return list(ImportantTaskSerializer(instance=result_data, many=True).data)
 
-        if not employees_load.exists():
-            return Response(
+        # Отчет кэшируется до ближайшего изменения задач или сотрудников
+        data, hit = get_or_build(IMPORTANT_TASKS, "report", build)
+        if data is None:
+            response = Response(
                 {"message": "В системе нет сотрудников для назначения задач."},
                 status=404,
             )
+        else:
+            response = Response(data)
+        return mark_response(response, hit)
 
-        least_busy_employee = employees_load.first()
-        min_tasks_count = least_busy_employee.active_tasks_count
-
-        # Шаг 3: Для каждой важной задачи формирую список подходящих исполнителей
-        result_data = []
-        for task in important_tasks:
-            # Использую set для автоматического исключения дубликатов
-            suitable_employees = set()
-            # Критерий А: Наименее загруженный сотрудник подходит всегда
-            suitable_employees.add(least_busy_employee.full_name)
-
-            # Критерий Б: Исполнители дочерних задач, если они не сильно перегружены
-            # Для корректного подсчета их полной загрузки я разделяю логику на 2 запроса
-            # 1. Сначала нахожу ID исполнителей активных дочерних задач
-            child_assignee_ids = (
-                Employee.objects.filter(
-                    tasks__parent=task, tasks__status=TaskStatus.IN_PROGRESS
-                )
-                .values_list("id", flat=True)
-                .distinct()
-            )
+    @extend_schema(
+        request=PlanAssignmentsRequestSerializer, responses=AssignmentPlanSerializer
+    )
+    @action(detail=False, methods=["post"], url_path="plan-assignments")
+    def plan_assignments(self, request):
+        """
+        Назначает исполнителей сразу всем "важным" задачам с учетом того,
+        что каждое назначение увеличивает нагрузку сотрудника (см. services.py).
+        По умолчанию только возвращает план, с apply=true записывает его
+        одним bulk_update в той же транзакции, в которой план построен
+        """
+        params = PlanAssignmentsRequestSerializer(data=request.data)
+        params.is_valid(raise_exception=True)
+        apply = params.validated_data["apply"]
 
-            # 2. Если такие исполнители есть, делаю НОВЫЙ запрос, чтобы получить их реальную ПОЛНУЮ загрузку
-            if child_assignee_ids:
-                child_assignees_with_load = Employee.objects.filter(
-                    id__in=child_assignee_ids
-                ).annotate(
-                    active_tasks_count=Count(
-                        "tasks", filter=Q(tasks__status=TaskStatus.IN_PROGRESS)
-                    )
+        with transaction.atomic():
+            plan = build_assignment_plan()
+            if plan is None:
+                return Response(
+                    {"message": "В системе нет сотрудников для назначения задач."},
+                    status=404,
                 )
+            if apply:
+                apply_assignment_plan(plan)
+        return Response(
+            AssignmentPlanSerializer({"applied": apply, "assignments": plan}).data
+        )
 
-                # 3. Теперь проверяю условие с правильными данными о нагрузке
-                for assignee in child_assignees_with_load:
-                    if assignee.active_tasks_count <= min_tasks_count + 2:
-                        suitable_employees.add(assignee.full_name)
+    @extend_schema(
+        request=TaskTransitionRequestSerializer, responses=TaskTransitionSerializer
+    )
+    @action(detail=False, methods=["post"])
+    def transition(self, request):
+        """
+        Переводит в статус сразу все задачи из списка ids или подходящие
+        под filter (параметры как у списка задач). Правило "Выполнено только
+        с исполнителем" проверяется одним агрегирующим запросом по всей
+        выборке, статус меняется одним UPDATE (см. transitions.py)
+        """
+        params = TaskTransitionRequestSerializer(data=request.data)
+        params.is_valid(raise_exception=True)
+        target = params.validated_data["status"]
+        ids = params.validated_data.get("ids")
+        if ids is not None:
+            queryset = Task.objects.filter(id__in=ids)
+        else:
+            try:
+                queryset = filter_tasks(
+                    Task.objects.all(), params.validated_data["filter"]
+                )
+            except ValidationError as error:
+                raise ValidationError({"filter": error.detail})
 
-            result_data.append(
+        with transaction.atomic():
+            matched, unassigned = check_transition(queryset, target)
+            if ids is not None and matched < len(ids):
+                return Response(
+                    {"ids": [f"Не найдено задач: {len(ids) - matched}."]},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            if unassigned:
+                return Response(
+                    {
+                        "status": [
+                            "Нельзя завершить задачи, у которых нет исполнителя: "
+                            f"{unassigned}."
+                        ]
+                    },
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            updated = transition_tasks(queryset, target)
+        return Response(
+            TaskTransitionSerializer(
                 {
-                    "task_name": task.name,
-                    "deadline": task.deadline,
-                    "suitable_employees": list(suitable_employees),
+                    "status": target,
+                    "matched": matched,
+                    "updated": len(updated),
+                    "ids": updated,
                 }
+            ).data
+        )
+
+    def tree_response(self, request, build):
+        """
+        Общая часть subtree и ancestors: разбор параметров и сериализация
+        ?max_depth= - ограничение глубины (не больше TASK_TREE_MAX_DEPTH),
+        ?status= - статусы через запятую, остальные узлы не попадают в ответ
+        """
+        try:
+            max_depth = int(
+                request.query_params.get("max_depth", settings.TASK_TREE_MAX_DEPTH)
             )
-        # Так как я сам формирую данные для вывода, я передаю их в 'instance'
-        # Вызов is_valid() здесь не нужен и привел бы к ошибке
-        serializer = ImportantTaskSerializer(instance=result_data, many=True)
+        except ValueError:
+            return Response(
+                {"max_depth": ["Ожидается целое число."]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        max_depth = min(max(max_depth, 0), settings.TASK_TREE_MAX_DEPTH)
+        statuses = None
+        if request.query_params.get("status"):
+            statuses = set(request.query_params["status"].split(","))
+
+        try:
+            task_id = int(self.kwargs["pk"])
+        except ValueError:
+            raise NotFound()
+        nodes = build(task_id, max_depth, statuses)
+        # Пустой ответ при фильтре по статусу еще не значит, что задачи нет
+        if not nodes and not Task.objects.filter(pk=task_id).exists():
+            raise NotFound()
+        return Response(TaskTreeNodeSerializer(nodes, many=True).data)
+
+    @extend_schema(responses=TaskTreeNodeSerializer(many=True))
+    @action(detail=True, methods=["get"])
+    def subtree(self, request, pk=None):
+        """
+        Задача и все ее потомки плоским списком с глубиной и путем
+        Строится одним рекурсивным запросом независимо от размера дерева
+        """
+        return self.tree_response(request, build_subtree)
+
+    @extend_schema(responses=TaskTreeNodeSerializer(many=True))
+    @action(detail=True, methods=["get"])
+    def ancestors(self, request, pk=None):
+        """
+        Задача и цепочка ее родителей до корня одним рекурсивным запросом
+        """
+        return self.tree_response(request, build_ancestors)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "since", str, description="Курсор из поля since предыдущего ответа"
+            ),
+            OpenApiParameter("page_size", int, description="Изменений на странице"),
+        ],
+        responses=TaskChangesPageSerializer,
+    )
+    @action(detail=False, methods=["get"])
+    def changes(self, request):
+        """
+        Лента изменений для инкрементальной синхронизации: задачи, созданные,
+        измененные или удаленные после курсора ?since=, в порядке изменения.
+        Без курсора лента начинается с самого начала
+        """
+        try:
+            since = decode_since(request.query_params.get("since"))
+        except ValueError as error:
+            return Response({"since": [str(error)]}, status=status.HTTP_400_BAD_REQUEST)
+        page_size = KeysetPagination().get_page_size(request)
+        results, cursor, has_more = fetch_changes(since, page_size)
+        serializer = TaskChangesPageSerializer(
+            {"since": cursor, "has_more": has_more, "results": results}
+        )
         return Response(serializer.data)
+
+    @action(detail=False, methods=["get"], url_path="export")
+    def export(self, request):
+        """
+        Потоковая выгрузка всех задач в CSV или NDJSON без DRF-сериализации
+        Параметры: ?file_format=csv|ndjson, ?with_names=1 - добавить ФИО
+        исполнителя и название родительской задачи
+        """
+        return export_response(request, "tasks")
+
+    @extend_schema(
+        request=TaskSerializer(many=True), responses=TaskSerializer(many=True)
+    )
+    @action(detail=False, methods=["post", "patch"], url_path="bulk")
+    def bulk(self, request):
+        """
+        Массовое создание (POST) или частичное обновление (PATCH) задач
+        Все связанные задачи и сотрудники загружаются одним запросом на модель,
+        проверки TaskSerializer выполняются в памяти, а запись идет через
+        bulk_create/bulk_update в одной транзакции.
+        При ошибках возвращается 400 со списком ошибок по каждому элементу
+        """
+        items = request.data
+        if not isinstance(items, list):
+            return Response(
+                {"non_field_errors": ["Ожидается список задач."]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(items) > settings.TASKS_BULK_MAX_ITEMS:
+            return Response(
+                {
+                    "non_field_errors": [
+                        f"Не больше {settings.TASKS_BULK_MAX_ITEMS} задач за запрос."
+                    ]
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        partial = request.method == "PATCH"
+        prefetched = prefetch_bulk_relations(items)
+        context = {**self.get_serializer_context(), "prefetched": prefetched}
+
+        validated, errors = [], []
+        for item in items:
+            instance = None
+            if partial:
+                instance = self.find_bulk_instance(item, prefetched[Task])
+                if instance is None:
+                    errors.append({"id": ["Задача не найдена."]})
+                    continue
+            serializer = TaskSerializer(
+                instance, data=item, partial=partial, context=context
+            )
+            serializer.is_valid()
+            validated.append(serializer)
+            errors.append(serializer.errors)
+        if any(errors):
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            if partial:
+                tasks, fields = [], set()
+                for serializer in validated:
+                    for field, value in serializer.validated_data.items():
+                        setattr(serializer.instance, field, value)
+                    fields.update(serializer.validated_data)
+                    tasks.append(serializer.instance)
+                if fields:
+                    Task.objects.bulk_update(tasks, fields)
+                response_status = status.HTTP_200_OK
+            else:
+                tasks = Task.objects.bulk_create(
+                    [Task(**serializer.validated_data) for serializer in validated]
+                )
+                response_status = status.HTTP_201_CREATED
+        return Response(TaskSerializer(tasks, many=True).data, status=response_status)
+
+    @staticmethod
+    def find_bulk_instance(item, tasks):
+        """Находит задачу элемента PATCH-запроса среди загруженных заранее"""
+        try:
+            return tasks.get(int(item["id"]))
+        except (KeyError, TypeError, ValueError):
+            return None
+
+
+class ArchivedTaskViewSet(
+    ConditionalGetMixin, ValuesListMixin, viewsets.ReadOnlyModelViewSet
+):
+    """
+    Архивные задачи только для чтения (переносятся командой archive_tasks)
+    Фильтры, сортировки и курсорная пагинация - как у списка задач
+    """
+
+    queryset = ArchivedTask.objects.all()
+    serializer_class = ArchivedTaskSerializer
+    values_reader = ValuesReader(ArchivedTaskSerializer)
+    filter_backends = TaskViewSet.filter_backends
+    search_fields = TaskViewSet.search_fields
+    keyset_orderings = TaskViewSet.keyset_orderings
+    keyset_ordering = TaskViewSet.keyset_ordering
+    # Архив меняется только переносом задач, а он меняет версию задач
+    etag_resources = (TASKS,)
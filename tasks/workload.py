@@ -0,0 +1,88 @@
+from django.db.models import Case, Count, F, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce, Greatest
+
+from employees.models import Employee
+
+from .models import Task, TaskStatus
+
+
+def active_assignee_id(assignee_id, status):
+    """
+    Возвращает id сотрудника, которому задача добавляет активную нагрузку,
+    или None, если задача не в работе или без исполнителя
+    """
+    return assignee_id if status == TaskStatus.IN_PROGRESS else None
+
+
+def collect_deltas(changes):
+    """
+    Сводит пары (id до изменения, id после изменения) в словарь
+    {id сотрудника: изменение счетчика}, отбрасывая нулевые изменения
+    """
+    deltas = {}
+    for before, after in changes:
+        if before == after:
+            continue
+        if before is not None:
+            deltas[before] = deltas.get(before, 0) - 1
+        if after is not None:
+            deltas[after] = deltas.get(after, 0) + 1
+    return {employee_id: delta for employee_id, delta in deltas.items() if delta}
+
+
+def shift_active_task_counts(deltas):
+    """
+    Применяет изменения счетчиков одним UPDATE.
+    Счетчик меняется выражением F() в БД, поэтому конкурирующие
+    изменения одного сотрудника не теряются
+    """
+    if not deltas:
+        return 0
+    # Группирую сотрудников по величине изменения, чтобы CASE был коротким
+    by_delta = {}
+    for employee_id, delta in deltas.items():
+        by_delta.setdefault(delta, []).append(employee_id)
+    shift = Case(
+        *[When(id__in=ids, then=Value(delta)) for delta, ids in by_delta.items()],
+        default=Value(0),
+    )
+    return Employee.objects.filter(id__in=list(deltas)).update(
+        active_task_count=Greatest(F("active_task_count") + shift, Value(0))
+    )
+
+
+def actual_active_task_count():
+    """Подзапрос с реальным количеством активных задач сотрудника"""
+    active_tasks = (
+        Task.objects.filter(assignee=OuterRef("pk"), status=TaskStatus.IN_PROGRESS)
+        .order_by()
+        .values("assignee")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    return Coalesce(Subquery(active_tasks), Value(0))
+
+
+def recount_active_task_counts(employee_ids=None):
+    """
+    Пересчитывает счетчики с нуля одним UPDATE с подзапросом.
+    Используется там, где дельту посчитать нельзя (массовые изменения
+    с выражениями, upsert) и для починки рассинхронизации.
+    employee_ids=None пересчитывает всех сотрудников
+    """
+    employees = Employee.objects.all()
+    if employee_ids is not None:
+        employee_ids = {employee_id for employee_id in employee_ids if employee_id}
+        if not employee_ids:
+            return 0
+        employees = employees.filter(id__in=employee_ids)
+    return employees.update(active_task_count=actual_active_task_count())
+
+
+def find_counter_drift():
+    """Возвращает QuerySet сотрудников, у которых счетчик разошелся с реальностью"""
+    return (
+        Employee.objects.annotate(actual_count=actual_active_task_count())
+        .exclude(active_task_count=F("actual_count"))
+        .order_by("id")
+    )
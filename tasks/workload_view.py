@@ -0,0 +1,142 @@
+"""
+Количество задач сотрудников по статусам из материализованного представления
+На больших данных GROUP BY по всей таблице задач на каждый запрос дорог,
+поэтому в PostgreSQL агрегат хранится в материализованном представлении
+tasks_workload (миграция 0005) и обновляется REFRESH ... CONCURRENTLY:
+чтение во время обновления не блокируется.
+
+Чтение всегда берет текущее содержимое представления и никогда его
+не обновляет. Обновляет его команда refresh_workload_view, запущенная
+с --interval (каждые WORKLOAD_VIEW_MAX_STALENESS секунд, если после
+обновления были записи). Время обновления хранится в базе, в таблице
+tasks_workload_refresh (миграция 0008), а время последней записи берется
+из самих задач: updated_at и надгробия удаленных задач. Поэтому граница
+отставания одна для всех процессов и не зависит от кэша.
+Где представления нет (SQLite в тестах, не примененная миграция),
+счетчики считаются запросом к таблице задач
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Max
+
+from .models import Task, TaskStatus, TaskTombstone
+
+VIEW_NAME = "tasks_workload"
+# Одна строка со временем начала последнего обновления представления
+REFRESH_TABLE = "tasks_workload_refresh"
+
+
+def view_exists():
+    """Есть ли материализованное представление в текущей базе"""
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [VIEW_NAME])
+        return cursor.fetchone()[0]
+
+
+def refreshed_at():
+    """Время начала последнего обновления представления или None"""
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT refreshed_at FROM {REFRESH_TABLE}")
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def last_write_at():
+    """
+    Время последнего изменения задач: изменения и переносы в архив видны
+    по updated_at, удаления - по надгробиям. Оба максимума читаются
+    из индексов (task_updated_idx, task_tombstone_idx)
+    """
+    times = [
+        Task.objects.aggregate(last=Max("updated_at"))["last"],
+        TaskTombstone.objects.aggregate(last=Max("deleted_at"))["last"],
+    ]
+    times = [value for value in times if value is not None]
+    return max(times) if times else None
+
+
+def is_stale():
+    """
+    Были ли записи после начала последнего обновления. updated_at ставится
+    до фиксации транзакции, поэтому записи за TASK_CHANGES_SAFETY_WINDOW
+    секунд до обновления тоже считаются: их транзакция могла зафиксироваться
+    уже после того, как обновление прочитало задачи
+    """
+    refreshed = refreshed_at()
+    if refreshed is None:
+        return True
+    last_write = last_write_at()
+    if last_write is None:
+        return False
+    return last_write > refreshed - timedelta(
+        seconds=settings.TASK_CHANGES_SAFETY_WINDOW
+    )
+
+
+def refresh_view(concurrently=True):
+    """
+    Обновляет представление и в той же транзакции запоминает время ее
+    начала: все записи, зафиксированные раньше, в представлении учтены
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            "REFRESH MATERIALIZED VIEW "
+            + ("CONCURRENTLY " if concurrently else "")
+            + VIEW_NAME
+        )
+        cursor.execute(
+            f"INSERT INTO {REFRESH_TABLE} (id, refreshed_at) VALUES (1, now()) "
+            "ON CONFLICT (id) DO UPDATE SET refreshed_at = EXCLUDED.refreshed_at"
+        )
+
+
+def live_counts(employee_ids):
+    """Пары ((id сотрудника, статус), количество задач) запросом к задачам"""
+    rows = (
+        Task.objects.filter(assignee_id__in=employee_ids)
+        .order_by()
+        .values_list("assignee_id", "status")
+        .annotate(count=Count("pk"))
+    )
+    return {(assignee_id, status): count for assignee_id, status, count in rows}
+
+
+def view_counts(employee_ids):
+    """
+    Пары ((id сотрудника, статус), количество задач) из представления,
+    по уникальному индексу (assignee_id, status)
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT assignee_id, status, task_count FROM {VIEW_NAME} "
+            "WHERE assignee_id = ANY(%s)",
+            [list(employee_ids)],
+        )
+        return {
+            (assignee_id, status): count
+            for assignee_id, status, count in cursor.fetchall()
+        }
+
+
+def workload_counts(employee_ids):
+    """
+    Возвращает ({id сотрудника: {статус: количество}}, источник) для
+    переданных сотрудников. Источник - "view" или "live", если представления нет
+    """
+    employee_ids = list(employee_ids)
+    source = "view" if view_exists() else "live"
+    counts = {}
+    if employee_ids:
+        read = view_counts if source == "view" else live_counts
+        counts = read(employee_ids)
+    by_employee = {
+        employee_id: dict.fromkeys(TaskStatus.values, 0) for employee_id in employee_ids
+    }
+    for (assignee_id, status), count in counts.items():
+        by_employee[assignee_id][status] = count
+    return by_employee, source